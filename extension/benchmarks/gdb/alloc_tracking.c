@@ -0,0 +1,29 @@
+#include <stdlib.h>
+
+// Allocation-heavy program used to measure the overhead of allocation tracking.
+// The number of iterations can be passed as the first argument.
+int main(int argc, char** argv) {
+    int iterations = argc > 1 ? atoi(argv[1]) : 10000;
+
+    void* blocks[16] = { 0 };
+    for (int i = 0; i < iterations; i++) {
+        int slot = i % 16;
+        switch (i % 3) {
+            case 0:
+                free(blocks[slot]);
+                blocks[slot] = malloc(16 + i % 64);
+                break;
+            case 1:
+                blocks[slot] = realloc(blocks[slot], 32 + i % 128);
+                break;
+            case 2:
+                free(blocks[slot]);
+                blocks[slot] = calloc(4, 8);
+                break;
+        }
+    }
+    for (int i = 0; i < 16; i++) {
+        free(blocks[i]);
+    }
+    return 0;
+}
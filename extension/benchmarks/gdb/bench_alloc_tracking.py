@@ -0,0 +1,81 @@
+"""
+Measures how much slower allocation tracking makes a debugged C program.
+
+The benchmark compiles `alloc_tracking.c` and runs it natively, under GDB without
+allocation tracking and under GDB with each allocation tracking engine of `gdb_script.py`
+(breakpoints and the preload allocation shim).
+
+Usage: python3 bench_alloc_tracking.py [--iterations N] [--repeat R]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+GDB_SCRIPT = os.path.join(BENCH_DIR, "..", "..", "static", "scripts", "gdb", "gdb_script.py")
+PROGRAM_SOURCE = os.path.join(BENCH_DIR, "alloc_tracking.c")
+
+
+def compile_program(output_dir: str) -> str:
+    binary = os.path.join(output_dir, "alloc_tracking")
+    subprocess.run(["cc", "-g", "-O0", PROGRAM_SOURCE, "-o", binary], check=True)
+    return binary
+
+
+def gdb_command(binary: str, iterations: int, engine: Optional[str]) -> List[str]:
+    args = [
+        "gdb", "-q", "-batch", "-nx",
+        "-ex", f"source {GDB_SCRIPT}",
+    ]
+    if engine == "preload":
+        args += ["-ex", "py prepare_alloc_shim()"]
+    args += [
+        "-ex", "break main",
+        "-ex", "run",
+    ]
+    if engine is not None:
+        args += ["-ex", f"py configure_alloc_tracking('{engine}')"]
+    args += ["-ex", "continue", "--args", binary, str(iterations)]
+    return args
+
+
+def measure(command: List[str], repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        binary = compile_program(tmp_dir)
+        native = measure([binary, str(args.iterations)], args.repeat)
+        untracked = measure(gdb_command(binary, args.iterations, engine=None), args.repeat)
+        tracked = {
+            engine: measure(gdb_command(binary, args.iterations, engine=engine), args.repeat)
+            for engine in ("breakpoint", "preload")
+        }
+
+    print(f"Iterations:           {args.iterations}")
+    print(f"Native:               {native:.3f}s")
+    print(f"GDB (no tracking):    {untracked:.3f}s")
+    for (engine, duration) in tracked.items():
+        overhead = duration - untracked
+        print(f"GDB ({engine}):{' ' * (15 - len(engine))}{duration:.3f}s")
+        print(f"  Tracking slowdown:  {duration / untracked:.1f}x")
+        print(f"  Overhead/iteration: {overhead / args.iterations * 1e6:.1f}us")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
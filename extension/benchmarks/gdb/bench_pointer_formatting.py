@@ -0,0 +1,106 @@
+"""
+Compares the cost of formatting addresses of local variables with `gdb.Value.format_string`
+and with `int(value)` followed by formatting in Python.
+
+The benchmark generates a C program with a function that has many locals, stops GDB inside it
+and formats the addresses of all its locals repeatedly with both approaches.
+It also measures the duration of `get_frame_places` of `gdb_script.py` on that frame.
+
+Usage: python3 bench_pointer_formatting.py [--locals N] [--repeat R]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+GDB_SCRIPT = os.path.join(BENCH_DIR, "..", "..", "static", "scripts", "gdb", "gdb_script.py")
+
+# Executed inside GDB, stopped in the function with many locals
+MEASURE_SCRIPT = """
+import time
+
+frame = gdb.selected_frame()
+values = [symbol.value(frame) for symbol in frame.block() if symbol.is_variable]
+addresses = [value.address for value in values]
+
+def format_string(address):
+    return address.format_string(
+        raw=True,
+        address=True,
+        symbols=False,
+        pretty_arrays=False,
+        pretty_structs=False,
+        array_indexes=False,
+        actual_objects=False,
+        format="x"
+    )
+
+def format_int(address):
+    return hex(int(address))
+
+assert [format_string(a) for a in addresses] == [format_int(a) for a in addresses]
+
+def measure(fn):
+    start = time.perf_counter()
+    for _ in range({repeat}):
+        fn()
+    return (time.perf_counter() - start) / {repeat}
+
+results = [
+    ("format_string", measure(lambda: [format_string(a) for a in addresses])),
+    ("int + hex", measure(lambda: [format_int(a) for a in addresses])),
+    ("get_frame_places", measure(lambda: get_frame_places(0))),
+]
+print(f"Locals: {{len(addresses)}}")
+for (name, duration) in results:
+    print(f"{{name + ':':<20}}{{duration * 1000:.3f}}ms per frame")
+"""
+
+
+def generate_program(local_count: int) -> str:
+    locals_decl = "\n".join(f"    int local_{i} = {i};" for i in range(local_count))
+    locals_sum = " + ".join(f"local_{i}" for i in range(local_count))
+    return f"""
+int many_locals(void) {{
+{locals_decl}
+    return {locals_sum};
+}}
+
+int main(void) {{
+    return many_locals() == 0;
+}}
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--locals", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, "many_locals.c")
+        binary = os.path.join(tmp_dir, "many_locals")
+        script = os.path.join(tmp_dir, "measure.py")
+        with open(source, "w") as f:
+            f.write(generate_program(args.locals))
+        with open(script, "w") as f:
+            f.write(MEASURE_SCRIPT.format(repeat=args.repeat))
+        subprocess.run(["cc", "-g", "-O0", source, "-o", binary], check=True)
+
+        # Stop on the return statement, where all locals are initialized
+        line = args.locals + 3
+        subprocess.run([
+            "gdb", "-q", "-batch", "-nx",
+            "-ex", f"source {GDB_SCRIPT}",
+            "-ex", f"break many_locals.c:{line}",
+            "-ex", "run",
+            "-ex", f"source {script}",
+            binary,
+        ], check=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
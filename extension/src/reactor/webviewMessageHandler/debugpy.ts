@@ -1,10 +1,18 @@
 import type { MemvizToExtensionMsg } from "memviz-ui";
 import type {
   ExtensionToMemvizDebugpyResponse,
+  GetCellReq,
+  GetCellRes,
   GetDictEntriesReq,
   GetDictEntriesRes,
   GetFlatCollectionElementsReq,
   GetFlatCollectionElementsRes,
+  GetFrameReq,
+  GetFrameRes,
+  GetFunctionReq,
+  GetFunctionRes,
+  GetGeneratorReq,
+  GetGeneratorRes,
   GetObjectReq,
   GetObjectRes,
   GetPythonVariablesRepresentationReq,
@@ -40,6 +48,18 @@ export class DebugpyWebviewMessageHandler extends WebviewMessageHandler<
     if (message.kind === "get-object") {
       return this.performGetObjectRequest(message, session);
     }
+    if (message.kind === "get-function") {
+      return this.performGetFunctionRequest(message, session);
+    }
+    if (message.kind === "get-generator") {
+      return this.performGetGeneratorRequest(message, session);
+    }
+    if (message.kind === "get-frame") {
+      return this.performGetFrameRequest(message, session);
+    }
+    if (message.kind === "get-cell") {
+      return this.performGetCellRequest(message, session);
+    }
     return super.getHandleCallback(message, session);
   }
 
@@ -232,4 +252,68 @@ export class DebugpyWebviewMessageHandler extends WebviewMessageHandler<
       };
     };
   }
+
+  private performGetFunctionRequest(
+    message: GetFunctionReq,
+    session: DebugpyDebuggerSession,
+  ): () => Promise<Omit<GetFunctionRes, "requestId" | "resolverId">> {
+    return async () => {
+      const frameId = await this.getCurrentFrameId(session);
+      const functionVal = await session.getFunction(frameId, message.id);
+      return {
+        kind: "get-function",
+        data: {
+          function: functionVal,
+        },
+      };
+    };
+  }
+
+  private performGetGeneratorRequest(
+    message: GetGeneratorReq,
+    session: DebugpyDebuggerSession,
+  ): () => Promise<Omit<GetGeneratorRes, "requestId" | "resolverId">> {
+    return async () => {
+      const frameId = await this.getCurrentFrameId(session);
+      const generatorVal = await session.getGenerator(frameId, message.id);
+      return {
+        kind: "get-generator",
+        data: {
+          generator: generatorVal,
+        },
+      };
+    };
+  }
+
+  private performGetFrameRequest(
+    message: GetFrameReq,
+    session: DebugpyDebuggerSession,
+  ): () => Promise<Omit<GetFrameRes, "requestId" | "resolverId">> {
+    return async () => {
+      const frameId = await this.getCurrentFrameId(session);
+      const frameVal = await session.getFrame(frameId, message.id);
+      return {
+        kind: "get-frame",
+        data: {
+          frame: frameVal,
+        },
+      };
+    };
+  }
+
+  private performGetCellRequest(
+    message: GetCellReq,
+    session: DebugpyDebuggerSession,
+  ): () => Promise<Omit<GetCellRes, "requestId" | "resolverId">> {
+    return async () => {
+      const frameId = await this.getCurrentFrameId(session);
+      const cellVal = await session.getCell(frameId, message.id);
+      return {
+        kind: "get-cell",
+        data: {
+          cell: cellVal,
+        },
+      };
+    };
+  }
 }
@@ -5,6 +5,10 @@ import {
   SessionType,
 } from "process-def";
 import type {
+  CellVal,
+  FrameVal,
+  FunctionVal,
+  GeneratorVal,
   KeyValuePair,
   ObjectVal,
   Value,
@@ -90,6 +94,38 @@ export class DebugpyDebuggerSession extends DebuggerSession<DebugpyEvaluator> {
     return result;
   }
 
+  async getFunction(frameId: FrameId, id: AddressStr): Promise<FunctionVal> {
+    const result = await this.pythonEvaluate<FunctionVal>(
+      `get_function("${id}")`,
+      frameId,
+    );
+    return result;
+  }
+
+  async getGenerator(frameId: FrameId, id: AddressStr): Promise<GeneratorVal> {
+    const result = await this.pythonEvaluate<GeneratorVal>(
+      `get_generator("${id}")`,
+      frameId,
+    );
+    return result;
+  }
+
+  async getFrame(frameId: FrameId, id: AddressStr): Promise<FrameVal> {
+    const result = await this.pythonEvaluate<FrameVal>(
+      `get_frame("${id}")`,
+      frameId,
+    );
+    return result;
+  }
+
+  async getCell(frameId: FrameId, id: AddressStr): Promise<CellVal> {
+    const result = await this.pythonEvaluate<CellVal>(
+      `get_cell("${id}")`,
+      frameId,
+    );
+    return result;
+  }
+
   async handleStoppedEvent(frameId: FrameId): Promise<void> {
     await this.pythonEvaluate<void>("clear_id_map()", frameId);
   }
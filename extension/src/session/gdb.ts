@@ -80,7 +80,7 @@ export class GDBDebuggerSession extends DebuggerSession<GDBEvaluator> {
   }
 
   async takeAllocEvents(frameId: FrameId): Promise<MemoryAllocEvent[]> {
-    const records = await this.pythonEvaluate<FunctionCallRecord[]>(
+    const { records, dropped } = await this.pythonEvaluate<AllocRecordList>(
       "take_alloc_records()",
       frameId,
     );
@@ -119,6 +119,12 @@ export class GDBDebuggerSession extends DebuggerSession<GDBEvaluator> {
         );
       }
     }
+    if (dropped > 0) {
+      events.push({
+        kind: "mem-events-dropped",
+        count: dropped,
+      });
+    }
     return events;
   }
 
@@ -168,3 +174,8 @@ interface FunctionCallRecord {
   args: unknown[];
   return_value: unknown | null;
 }
+
+interface AllocRecordList {
+  records: FunctionCallRecord[];
+  dropped: number;
+}
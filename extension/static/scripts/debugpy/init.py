@@ -1,11 +1,68 @@
 import importlib.util
+import marshal
 import os
 import sys
+import time
+
+start = time.perf_counter()
 
 module_name = "memviz_get_variables_info"
-module_path = os.path.join(os.path.dirname(__file__), f"{module_name}.py")
+module_dir = os.path.dirname(__file__)
+module_path = os.path.join(module_dir, f"{module_name}.py")
+
+with open(module_path, "rb") as f:
+    source = f.read()
+# The same hash is used by hash-based .pyc files, computing it is much cheaper than compiling the module
+source_hash = importlib.util.source_hash(source).hex()
+
+module = sys.modules.get(module_name)
+reused = module is not None and getattr(module, "__memviz_source_hash__", None) == source_hash
+bytecode_cached = False
+
+if not reused:
+    # Compiled bytecode is cached per source hash and Python version, because
+    # the module is loaded in every debugging session and its compilation is slow
+    cache_path = os.path.join(
+        module_dir,
+        "__pycache__",
+        f"{module_name}.{sys.implementation.cache_tag}.{source_hash}.bin",
+    )
+    code = None
+    try:
+        with open(cache_path, "rb") as f:
+            code = marshal.load(f)
+        bytecode_cached = True
+    except Exception:
+        pass
+    if code is None:
+        code = compile(source, module_path, "exec")
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                marshal.dump(code, f)
+            os.replace(tmp_path, cache_path)
+            # Bytecode of previous versions of the module is not needed anymore
+            cache_prefix = f"{module_name}.{sys.implementation.cache_tag}."
+            for name in os.listdir(os.path.dirname(cache_path)):
+                if name.startswith(cache_prefix) and name != os.path.basename(cache_path):
+                    os.remove(os.path.join(os.path.dirname(cache_path), name))
+        except OSError:
+            # The extension directory can be read-only
+            pass
+
+    spec = importlib.util.spec_from_file_location(module_name, module_path)
+    module = importlib.util.module_from_spec(spec)
+    module.__memviz_source_hash__ = source_hash
+    sys.modules[module_name] = module
+    exec(code, module.__dict__)
+
+if reused:
+    # The previous session's limits, history, trace and ids must not leak into this one
+    module.reset_session()
 
-spec = importlib.util.spec_from_file_location(module_name, module_path)
-module = importlib.util.module_from_spec(spec)
-sys.modules[module_name] = module
-spec.loader.exec_module(module)
+module.BOOTSTRAP_INFO = module.BootstrapInfo(
+    duration=time.perf_counter() - start,
+    bytecode_cached=bytecode_cached,
+    reused=reused,
+)
@@ -1,10 +1,25 @@
+# Only modules that are built in or already imported by dataclasses are imported here,
+# the others are imported on first use to keep the startup fast
+import collections
 import dataclasses
+import dis
+import gc
 import inspect
 import itertools
-import json
+import os
 import sys
+import weakref
 from abc import ABC
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from types import (
+    AsyncGeneratorType,
+    CellType,
+    CoroutineType,
+    FrameType,
+    FunctionType,
+    GeneratorType,
+    MethodType,
+)
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from weakref import WeakValueDictionary
 
 
@@ -14,6 +29,77 @@ PythonId = str
 RETURN_VALUES_DICT_NAME = "__pydevd_ret_val_dict"
 SEQUENCE_LOAD_ITEM_COUNT = 20
 STR_LOAD_CHAR_COUNT = 100
+# Value of declared object fields that were not assigned yet
+UNSET_FIELD = object()
+# Keep in sync with snapshot_reader.py and gdb_script.py
+SNAPSHOT_MAGIC = b"MVZSNAP\0"
+SNAPSHOT_VERSION = 1
+# Magic, version, reserved, index offset, index entry count, manifest offset, manifest length
+SNAPSHOT_HEADER_FORMAT = "<8sIIQQQQ"
+# Key, offset, length
+SNAPSHOT_INDEX_ENTRY_FORMAT = "<QQQ"
+# Prefix of the frame/running/suspended attributes of generator-like objects
+GENERATOR_ATTRIBUTE_PREFIXES = {
+    GeneratorType: "gi",
+    CoroutineType: "cr",
+    AsyncGeneratorType: "ag",
+}
+
+
+@dataclasses.dataclass()
+class Limits:
+    # Number of elements (or pairs) of collections loaded together with their place
+    eager_element_count: Optional[int] = SEQUENCE_LOAD_ITEM_COUNT
+    # Number of characters of strings loaded together with their value
+    str_char_count: Optional[int] = STR_LOAD_CHAR_COUNT
+    # Number of attributes returned by get_object
+    attribute_count: Optional[int] = None
+    # Number of values returned in a single response
+    max_values: Optional[int] = None
+    # Size of a single (JSON encoded) response
+    max_response_bytes: Optional[int] = None
+
+
+# Limits of the current debugging session, set by configure
+LIMITS = Limits()
+
+
+def configure(limits: Dict[str, Optional[int]]) -> Limits:
+    """
+    Sets the limits of the current session. Limits that are not passed keep their value,
+    None means unlimited. Returns the limits that will be used.
+    """
+    global LIMITS
+    names = set(field.name for field in dataclasses.fields(Limits))
+    for name, limit in limits.items():
+        if name not in names:
+            raise ValueError(f"Unknown limit {name}, expected one of {sorted(names)}.")
+        if limit is not None and (not isinstance(limit, int) or isinstance(limit, bool) or limit < 0):
+            raise ValueError(f"Limit {name} must be a non-negative integer or None, got {limit}.")
+    LIMITS = dataclasses.replace(LIMITS, **limits)
+    return LIMITS
+
+
+def apply_limit(count: int, limit: Optional[int]) -> int:
+    return count if limit is None else min(count, limit)
+
+
+@dataclasses.dataclass()
+class BootstrapInfo:
+    # Time spent by init.py loading this module (in seconds)
+    duration: float
+    # True if compiled bytecode was loaded from the cache
+    bytecode_cached: bool
+    # True if the module was already loaded by a previous session
+    reused: bool
+
+
+# Set by init.py
+BOOTSTRAP_INFO: Optional[BootstrapInfo] = None
+
+
+def get_bootstrap_info() -> Optional[BootstrapInfo]:
+    return BOOTSTRAP_INFO
 
 
 class IdMap:
@@ -48,6 +134,58 @@ class IdMap:
         cls._strongrefMap.clear()
 
 
+class SnapshotHistory:
+    """
+    Bounded history of variables returned by get_variables, kept inside the debugged process.
+    Snapshots are stored as compressed JSON, and the oldest ones are dropped once the history
+    has more than `max_entries` snapshots or they take more than `max_bytes` bytes.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # Incremented whenever the debugged program stops
+        self.step = 0
+        self.byte_count = 0
+        # (step, frame name, place occurrence) -> (line, compressed variables)
+        self.entries: "collections.OrderedDict[Tuple[int, str, int], Tuple[int, bytes]]" = (
+            collections.OrderedDict()
+        )
+
+    def next_step(self) -> None:
+        self.step += 1
+
+    def record(self, frame_name: str, frame_line: int, place_occurrence: int, variables: "Variables") -> None:
+        import json
+        import zlib
+
+        data = zlib.compress(json.dumps(dataclasses.asdict(variables)).encode(), 1)
+        key = (self.step, frame_name, place_occurrence)
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.byte_count -= len(previous[1])
+        self.entries[key] = (frame_line, data)
+        self.byte_count += len(data)
+
+        while self.entries and (len(self.entries) > self.max_entries or self.byte_count > self.max_bytes):
+            (_, (_, evicted)) = self.entries.popitem(last=False)
+            self.byte_count -= len(evicted)
+
+    def get_steps(self, frame_name: str, place_occurrence: int, from_step: int, to_step: int) -> List["HistoryStep"]:
+        import json
+        import zlib
+
+        steps = []
+        for (step, name, occurrence), (line, data) in self.entries.items():
+            if name == frame_name and occurrence == place_occurrence and from_step <= step <= to_step:
+                steps.append(HistoryStep(step=step, line=line, variables=json.loads(zlib.decompress(data))))
+        return steps
+
+
+# Set by configure_history, history is not recorded by default
+HISTORY: Optional[SnapshotHistory] = None
+
+
 @dataclasses.dataclass(frozen=True)
 class Place:
     name: str
@@ -164,6 +302,13 @@ class RangeVal(BaseVal):
     step: str
 
 
+@dataclasses.dataclass()
+class Attribute:
+    name: str
+    value: Optional[BaseVal] = None
+    is_descriptor: bool = False
+
+
 @dataclasses.dataclass()
 class FunctionVal(BaseVal):
     kind: str = dataclasses.field(init=False, default="function")
@@ -171,13 +316,10 @@ class FunctionVal(BaseVal):
     qualified_name: str
     module: str | None
     signature: str | None
-
-
-@dataclasses.dataclass()
-class Attribute:
-    name: str
-    value: Optional[BaseVal] = None
-    is_descriptor: bool = False
+    # Free variables of closures, loaded by get_function
+    free_variables: Optional[List[Attribute]] = None
+    # Object that a bound method is bound to, loaded by get_function
+    receiver: Optional[BaseVal] = None
 
 
 @dataclasses.dataclass(kw_only=True)
@@ -186,6 +328,42 @@ class ObjectVal(BaseVal, ABC):
     size: int
     type_name: str
     attributes: Optional[List[Attribute]] = None
+    # True if some attributes were left out because of the attribute limit
+    attributes_truncated: bool = False
+
+
+@dataclasses.dataclass(kw_only=True)
+class GeneratorVal(BaseVal):
+    kind: str = dataclasses.field(init=False, default="generator")
+    size: int
+    # "generator", "coroutine" or "async_generator"
+    type_name: str
+    name: str
+    # "created", "running", "suspended" or "closed"
+    state: str
+    line: Optional[int]
+    # Locals of the suspended frame, loaded by get_generator
+    locals: Optional[List[Attribute]] = None
+
+
+@dataclasses.dataclass(kw_only=True)
+class FrameVal(BaseVal):
+    kind: str = dataclasses.field(init=False, default="frame")
+    size: int
+    name: str
+    file: str
+    line: Optional[int]
+    # Loaded by get_frame
+    locals: Optional[List[Attribute]] = None
+
+
+@dataclasses.dataclass(kw_only=True)
+class CellVal(BaseVal):
+    kind: str = dataclasses.field(init=False, default="cell")
+    size: int
+    empty: bool
+    # Contents of the cell, loaded by get_cell
+    value: Optional[BaseVal] = None
 
 
 @dataclasses.dataclass()
@@ -205,14 +383,194 @@ class TypeVal(BaseVal):
 class Variables:
     places: List[Place]
     values: List[BaseVal]
+    # True if some places were left out because of the value limit
+    truncated: bool = False
+
+
+@dataclasses.dataclass()
+class HistoryStep:
+    step: int
+    line: int
+    # Variables as they were returned by get_variables at this step
+    variables: Dict[str, Any]
+
+
+@dataclasses.dataclass()
+class History:
+    # Step of the current stop
+    current_step: int
+    # The oldest step is first
+    steps: List[HistoryStep]
+
+
+@dataclasses.dataclass()
+class FrameVariables:
+    name: str
+    line: int
+    places: List[Place]
+
+
+@dataclasses.dataclass()
+class ThreadVariables:
+    thread_id: int
+    thread_name: Optional[str]
+    # The newest frame is first
+    frames: List[FrameVariables]
+
+
+@dataclasses.dataclass()
+class ThreadsVariables:
+    threads: List[ThreadVariables]
+    # Values shared by places of all threads
+    values: List[BaseVal]
+    truncated: bool = False
+
+
+@dataclasses.dataclass()
+class CoroutineFrame:
+    name: str
+    line: Optional[int]
+    places: List[Place]
+
+
+@dataclasses.dataclass()
+class AsyncTask:
+    id: PythonId
+    name: str
+    # "pending", "done" or "cancelled"
+    state: str
+    # The outermost coroutine is first
+    frames: List[CoroutineFrame]
+    # Innermost awaited object that is not a coroutine (e.g. a future)
+    awaiting: Optional[BaseVal] = None
+
+
+@dataclasses.dataclass()
+class AsyncTasks:
+    task_count: int
+    tasks: List[AsyncTask]
+    values: List[BaseVal]
+    truncated: bool = False
+
+
+@dataclasses.dataclass()
+class TypeCount:
+    type_name: str
+    count: int
+
+
+@dataclasses.dataclass()
+class CollectionSummary:
+    id: PythonId
+    length: int
+    # Types of set elements or dict keys, the most common type is first
+    key_types: List[TypeCount]
+    # Types of dict values (None for sets)
+    value_types: Optional[List[TypeCount]]
+    # Uniform random sample in iteration order, elements for sets and pairs for dicts
+    elements: Optional[List[BaseVal]] = None
+    pairs: Optional[List[KeyValuePair]] = None
+
+
+@dataclasses.dataclass()
+class TraceEvent:
+    index: int
+    # Qualified name of the function that has written the variable
+    function: str
+    line: int
+    name: str
+    # The value is shared with the variable, so mutable values show their current state
+    value: BaseVal
+
+
+@dataclasses.dataclass()
+class TraceLog:
+    # Index of the oldest event that is still kept in the log
+    first_index: int
+    # Number of all recorded events, including dropped ones
+    event_count: int
+    running: bool
+    events: List[TraceEvent]
+
+
+@dataclasses.dataclass()
+class SnapshotExport:
+    path: str
+    object_count: int
+    byte_count: int
+    # True if some objects were left out because of `max_objects`
+    truncated: bool
+
+
+@dataclasses.dataclass()
+class HeapMarkInfo:
+    mark: int
+    object_count: int
+    byte_count: int
+
+
+@dataclasses.dataclass()
+class TypeDelta:
+    type_name: str
+    count_delta: int
+    byte_delta: int
+    # Objects that were not alive when the heap was marked
+    new_count: int
+    # Marked objects that are no longer alive
+    freed_count: int
+
+
+@dataclasses.dataclass()
+class HeapDiff:
+    mark: int
+    # Types whose objects have changed, the largest byte delta is first
+    types: List[TypeDelta]
+    # Number of new objects (of the requested type)
+    new_object_count: int
+    # Requested page of the new objects
+    new_objects: List[BaseVal]
+
+
+@dataclasses.dataclass()
+class Referrer:
+    value: BaseVal
+    # How the referrer refers to the value: "local", "attribute", "item" (dict value),
+    # "key" (dict key), "element" or "referent" if it is not known
+    relation: str
+    # Name of the local or attribute, repr of the key or index of the element
+    name: Optional[str] = None
+
+
+@dataclasses.dataclass()
+class Referrers:
+    id: PythonId
+    # Number of objects that refer to the value directly
+    referrer_count: int
+    referrers: List[Referrer]
 
 
 class MissingPlaceOccurrenceError(ValueError):
     pass
 
 
+class ValueCollector:
+    """
+    Collects values of places of a single response, up to the configured value limit.
+    """
+
+    def __init__(self) -> None:
+        self.values: Dict[PythonId, BaseVal] = {}
+        self.truncated = False
+
+    def is_full(self) -> bool:
+        return LIMITS.max_values is not None and len(self.values) >= LIMITS.max_values
+
+    def get_values(self) -> List[BaseVal]:
+        return list(self.values.values())
+
+
 def get_str_default_load_content(val: str) -> str:
-    count = min(len(val), STR_LOAD_CHAR_COUNT)
+    count = apply_limit(len(val), LIMITS.str_char_count)
     return val[:count]
 
 
@@ -253,6 +611,9 @@ def make_value(val: Any) -> BaseVal:
         return DeferredDictVal(id=val_id, size=size, pair_count=len(val))
     elif isinstance(val, list):
         return DeferredListVal(id=val_id, size=size, element_count=len(val))
+    elif isinstance(val, tuple) and is_namedtuple(val):
+        # Fields of named tuples are shown by their names
+        return ObjectVal(id=val_id, size=size, type_name=type(val).__name__)
     elif isinstance(val, tuple):
         return DeferredTupleVal(id=val_id, size=size, element_count=len(val))
     elif isinstance(val, set):
@@ -271,6 +632,26 @@ def make_value(val: Any) -> BaseVal:
             stop=str(val.stop),
             step=str(val.step),
         )
+    elif type(val) in GENERATOR_ATTRIBUTE_PREFIXES:
+        (state, frame) = get_generator_state(val)
+        return GeneratorVal(
+            id=val_id,
+            size=size,
+            type_name=type(val).__name__,
+            name=val.__qualname__,
+            state=state,
+            line=frame.f_lineno if frame is not None else None,
+        )
+    elif inspect.isframe(val):
+        return FrameVal(
+            id=val_id,
+            size=size,
+            name=val.f_code.co_name,
+            file=val.f_code.co_filename,
+            line=val.f_lineno,
+        )
+    elif isinstance(val, CellType):
+        return CellVal(id=val_id, size=size, empty=is_cell_empty(val))
     elif inspect.isfunction(val) or inspect.ismethod(val):
         try:
             signature = inspect.signature(val)
@@ -293,23 +674,77 @@ def make_value(val: Any) -> BaseVal:
         )
 
 
+def get_generator_state(generator: Any) -> Tuple[str, Optional[FrameType]]:
+    """
+    Returns the state and the frame of a generator, coroutine or async generator.
+    """
+    prefix = GENERATOR_ATTRIBUTE_PREFIXES[type(generator)]
+    frame = getattr(generator, f"{prefix}_frame")
+    if frame is None:
+        return ("closed", None)
+    if getattr(generator, f"{prefix}_running"):
+        return ("running", frame)
+    # The *_suspended attributes only exist since Python 3.11 (3.12 for async generators)
+    suspended = getattr(generator, f"{prefix}_suspended", None)
+    if suspended is None:
+        suspended = frame.f_lasti != -1
+    return ("suspended" if suspended else "created", frame)
+
+
+def is_cell_empty(cell: CellType) -> bool:
+    try:
+        cell.cell_contents
+    except ValueError:
+        return True
+    return False
+
+
+def iter_frames(frame: Optional[FrameType]) -> Iterator[FrameType]:
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+
+
+def get_thread_stacks() -> List[Tuple[int, FrameType]]:
+    """
+    Returns (thread id, newest frame) of all threads, starting with the current thread.
+    All stacks are captured at once, so that they are consistent with each other.
+    """
+    import threading
+
+    frames = sys._current_frames()
+    current_id = threading.get_ident()
+    stacks = []
+    # The newest frame of the current thread belongs to this function
+    current = frames.pop(current_id, None)
+    if current is not None and current.f_back is not None:
+        stacks.append((current_id, current.f_back))
+    # A local that refers to the own frame creates a cycle, which would keep the callers'
+    # locals alive until the next garbage collection
+    del current
+    stacks.extend(frames.items())
+    return stacks
+
+
 def get_frame_by_place(
     debugged_file_path: str,
     frame_name: str,
     frame_line: int,
     place_occurrence: int,
-) -> inspect.FrameInfo:
-    stack = inspect.stack()
+) -> FrameType:
     occurence_counter = 0
-    for frame in stack:
-        if (
-            frame.filename == debugged_file_path
-            and frame.function == frame_name
-            and frame.lineno == frame_line
-        ):
-            if occurence_counter == place_occurrence:
-                return frame
-            occurence_counter += 1
+    # Frames of the current thread are searched first
+    for _, stack in get_thread_stacks():
+        for frame in iter_frames(stack):
+            code = frame.f_code
+            if (
+                code.co_filename == debugged_file_path
+                and code.co_name == frame_name
+                and frame.f_lineno == frame_line
+            ):
+                if occurence_counter == place_occurrence:
+                    return frame
+                occurence_counter += 1
 
     raise MissingPlaceOccurrenceError(
         f"Could not find place occurrence {place_occurrence} for function '{frame_name}' at line {frame_line} in file {debugged_file_path}"
@@ -339,18 +774,19 @@ def validate_slicing_params(
         or (start_index == collection_length and count == 0)
     ):
         raise ValueError(
-            f"Start_index {start_index} out of range [0, {collection_length}] for {value}."
+            f"Start_index {start_index} out of range [0, {collection_length}]."
         )
     if start_index + count > collection_length:
+        # The collection itself is not formatted, it can be huge and its repr can run user code
         raise ValueError(
-            f"Count {count} out of range. Collection {value} has length {collection_length}, "
+            f"Count {count} out of range. Collection has length {collection_length}, "
             f"so maximum allowed count is {collection_length - start_index} for start_index {start_index}."
         )
     return collection_length
 
 
-def get_argument_names(frame: inspect.FrameInfo) -> List[str]:
-    argvalues = inspect.getargvalues(frame.frame)
+def get_argument_names(frame: FrameType) -> List[str]:
+    argvalues = inspect.getargvalues(frame)
     arg_names = list(argvalues.args)
     if argvalues.varargs:
         arg_names.append(argvalues.varargs)
@@ -370,7 +806,7 @@ def get_variables(
     place_occurrence: int,
 ) -> Variables:
     try:
-        frame_info = get_frame_by_place(
+        frame = get_frame_by_place(
             debugged_file_path,
             frame_name,
             frame_line,
@@ -385,11 +821,315 @@ def get_variables(
         # that the place is not accessible anymore instead
         # of just returning empty variables info
         return Variables(places=[], values=[])
-    arg_names = get_argument_names(frame_info)
-    frame = frame_info.frame
 
+    values = ValueCollector()
+    places = get_frame_places(frame, values)
+    variables = Variables(
+        places=places,
+        values=values.get_values(),
+        truncated=values.truncated,
+    )
+    if HISTORY is not None:
+        HISTORY.record(frame_name, frame_line, place_occurrence, variables)
+    return variables
+
+
+# Instructions that write a local variable
+LOCAL_STORE_INSTRUCTIONS = frozenset((
+    "STORE_FAST",
+    "STORE_FAST_MAYBE_NULL",
+    "STORE_FAST_LOAD_FAST",
+    "STORE_FAST_STORE_FAST",
+    "STORE_DEREF",
+    "STORE_NAME",
+    "DELETE_FAST",
+    "DELETE_DEREF",
+    "DELETE_NAME",
+))
+
+
+def get_stored_names(code: Any) -> Dict[int, Tuple[str, ...]]:
+    """
+    Returns names of local variables written by the bytecode of each line of the code object.
+    """
+    stores = collections.defaultdict(list)
+    for instruction in dis.get_instructions(code):
+        line = instruction.positions.lineno
+        if instruction.opname not in LOCAL_STORE_INSTRUCTIONS or line is None:
+            continue
+        names = instruction.argval
+        if instruction.opname == "STORE_FAST_LOAD_FAST":
+            # (stored name, loaded name)
+            names = names[:1]
+        elif not isinstance(names, tuple):
+            names = (names,)
+        for name in names:
+            if name not in stores[line] and not (name.startswith("__") and name.endswith("__")):
+                stores[line].append(name)
+    return {line: tuple(names) for (line, names) in stores.items()}
+
+
+def get_code_argument_names(code: Any) -> Tuple[str, ...]:
+    count = code.co_argcount + code.co_kwonlyargcount
+    count += bool(code.co_flags & inspect.CO_VARARGS) + bool(code.co_flags & inspect.CO_VARKEYWORDS)
+    return code.co_varnames[:count]
+
+
+class LocalsTracer:
+    """
+    Records writes of local variables of code objects of the debugged file using `sys.monitoring`
+    (Python 3.12+), without stopping the program.
+    Only code of the debugged file emits line events, other code is disabled after its first call.
+    When a new line starts, the variables written by the bytecode of the previous line are compared
+    with their previous values (by identity), so writes are attributed to the previous line.
+    The tracer keeps the recorded values and the last value of each tracked variable alive
+    until the trace is stopped, so that a new value cannot be mistaken for a freed one with the same id.
+    """
+
+    # Tool ids that are not reserved for debuggers (debugpy can use DEBUGGER_ID itself)
+    TOOL_IDS = (3, 4, 2, 1)
+    _MISSING = object()
+
+    def __init__(self, debugged_file_path: str, max_events: int) -> None:
+        self.debugged_file_path = debugged_file_path
+        # (function, line, name, value), the oldest events are dropped first
+        self.events: "collections.deque[Tuple[str, int, str, Any]]" = collections.deque(maxlen=max_events)
+        self.event_count = 0
+        self.running = False
+        # id(frame) -> (line that is being executed, names written by the line, name -> last value)
+        self.frames: Dict[int, Tuple[int, Tuple[str, ...], Dict[str, Any]]] = {}
+        # code -> line -> names of written variables
+        self.stored_names: Dict[Any, Dict[int, Tuple[str, ...]]] = {}
+        self.tool_id = None
+
+    def start(self) -> None:
+        monitoring = sys.monitoring
+        events = monitoring.events
+        self.tool_id = next((tool for tool in self.TOOL_IDS if monitoring.get_tool(tool) is None), None)
+        if self.tool_id is None:
+            raise ValueError("No free sys.monitoring tool id is available.")
+        monitoring.use_tool_id(self.tool_id, "memviz")
+        monitoring.register_callback(self.tool_id, events.PY_START, self.on_start)
+        monitoring.register_callback(self.tool_id, events.LINE, self.on_line)
+        monitoring.register_callback(self.tool_id, events.PY_RETURN, self.on_return)
+        monitoring.register_callback(self.tool_id, events.PY_UNWIND, self.on_unwind)
+        # PY_UNWIND can only be enabled globally
+        monitoring.set_events(self.tool_id, events.PY_START | events.PY_UNWIND)
+
+        # Frames that are already running do not emit PY_START
+        for _, stack in get_thread_stacks():
+            for frame in iter_frames(stack):
+                if frame.f_code.co_filename == self.debugged_file_path:
+                    stored_names = self.trace_code(frame.f_code)
+                    self.frames[id(frame)] = (
+                        frame.f_lineno,
+                        stored_names.get(frame.f_lineno, ()),
+                        dict(frame.f_locals),
+                    )
+        self.running = True
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        monitoring = sys.monitoring
+        events = monitoring.events
+        monitoring.set_events(self.tool_id, events.NO_EVENTS)
+        for code in self.stored_names:
+            monitoring.set_local_events(self.tool_id, code, events.NO_EVENTS)
+        for event in (events.PY_START, events.LINE, events.PY_RETURN, events.PY_UNWIND):
+            monitoring.register_callback(self.tool_id, event, None)
+        monitoring.free_tool_id(self.tool_id)
+        self.stored_names.clear()
+        self.frames.clear()
+        self.running = False
+
+    def trace_code(self, code: Any) -> Dict[int, Tuple[str, ...]]:
+        stored_names = self.stored_names.get(code)
+        if stored_names is None:
+            stored_names = self.stored_names[code] = get_stored_names(code)
+            events = sys.monitoring.events
+            sys.monitoring.set_local_events(self.tool_id, code, events.LINE | events.PY_RETURN)
+        return stored_names
+
+    def on_start(self, code: Any, _offset: int) -> Any:
+        if code.co_filename != self.debugged_file_path:
+            return sys.monitoring.DISABLE
+        self.trace_code(code)
+        # Arguments are recorded as writes of the line with the function definition
+        self.frames[id(sys._getframe(1))] = (code.co_firstlineno, get_code_argument_names(code), {})
+
+    def on_line(self, code: Any, line: int) -> None:
+        self.record_writes(sys._getframe(1), code, line)
+
+    def on_return(self, code: Any, _offset: int, _value: Any) -> None:
+        frame = sys._getframe(1)
+        self.record_writes(frame, code, frame.f_lineno)
+        self.frames.pop(id(frame), None)
+
+    def on_unwind(self, code: Any, _offset: int, _exception: BaseException) -> None:
+        # Called for every function that exits with an exception, also outside of the debugged file
+        if code in self.stored_names:
+            self.frames.pop(id(sys._getframe(1)), None)
+
+    def record_writes(self, frame: FrameType, code: Any, next_line: int) -> None:
+        state = self.frames.get(id(frame))
+        if state is None:
+            previous = {}
+        else:
+            (line, names, previous) = state
+            if names:
+                frame_locals = frame.f_locals
+                for name in names:
+                    value = frame_locals.get(name, self._MISSING)
+                    if value is self._MISSING:
+                        # Deleted variable
+                        previous.pop(name, None)
+                    elif previous.get(name, self._MISSING) is not value:
+                        previous[name] = value
+                        self.events.append((code.co_qualname, line, name, value))
+                        self.event_count += 1
+        self.frames[id(frame)] = (next_line, self.stored_names[code].get(next_line, ()), previous)
+
+
+# Set by start_trace
+TRACER: Optional[LocalsTracer] = None
+
+
+def start_trace(debugged_file_path: str, max_events: int = 100000) -> None:
+    """
+    Starts recording writes of local variables in the debugged file while the program runs.
+    Requires Python 3.12+. The recorded events can be paged through using get_trace_log.
+    """
+    global TRACER
+    if not hasattr(sys, "monitoring"):
+        raise ValueError("Tracing requires sys.monitoring, which is available since Python 3.12.")
+    if max_events <= 0:
+        raise ValueError(f"Maximum number of events {max_events} must be positive.")
+    if TRACER is not None:
+        TRACER.stop()
+    TRACER = LocalsTracer(debugged_file_path, max_events)
+    TRACER.start()
+
+
+def stop_trace() -> None:
+    """
+    Stops recording writes of local variables. The recorded events are kept.
+    """
+    if TRACER is not None:
+        TRACER.stop()
+
+
+def get_trace_log(start_index: int, event_count: int) -> TraceLog:
+    """
+    Returns up to `event_count` recorded events starting at `start_index`.
+    Events that were already dropped from the log are skipped.
+    """
+    if TRACER is None:
+        raise ValueError("No trace has been recorded.")
+    first_index = TRACER.event_count - len(TRACER.events)
+    start_index = max(start_index, first_index)
+
+    events = []
+    offset = start_index - first_index
+    for index, (function, line, name, value) in enumerate(
+        itertools.islice(TRACER.events, offset, offset + event_count), start=start_index
+    ):
+        value_repr = make_value(value)
+        IdMap.register(value_repr.id, value)
+        events.append(TraceEvent(index=index, function=function, line=line, name=name, value=value_repr))
+    return TraceLog(
+        first_index=first_index,
+        event_count=TRACER.event_count,
+        running=TRACER.running,
+        events=events,
+    )
+
+
+def configure_history(max_entries: int = 100, max_bytes: int = 1024 * 1024) -> None:
+    """
+    Starts recording variables returned by get_variables, so that previous steps
+    can be shown without re-executing the program. Passing 0 entries stops the recording.
+    """
+    global HISTORY
+    if max_entries < 0 or max_bytes < 0:
+        raise ValueError("History limits must not be negative.")
+    HISTORY = SnapshotHistory(max_entries, max_bytes) if max_entries > 0 else None
+
+
+def get_history(
+    frame_name: str,
+    from_step: int,
+    to_step: int,
+    place_occurrence: int = 0,
+) -> History:
+    """
+    Returns recorded variables of the given frame for steps in the range [from_step, to_step].
+    Steps that were not recorded (or were already dropped) are left out.
+    """
+    if HISTORY is None:
+        raise ValueError("History is not being recorded.")
+    return History(
+        current_step=HISTORY.step,
+        steps=HISTORY.get_steps(frame_name, place_occurrence, from_step, to_step),
+    )
+
+
+def get_threads_variables(
+    debugged_file_path: str,
+    frame_filter: Optional[List[Tuple[str, int]]] = None,
+    max_frames: int = 10,
+) -> ThreadsVariables:
+    """
+    Captures variables of frames of the debugged file on all threads in a single pass.
+    If `frame_filter` is passed, only frames with matching (function name, line) are captured.
+    """
+    import threading
+
+    frame_filter = set(tuple(item) for item in frame_filter) if frame_filter is not None else None
+    thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+    threads = []
+    values = ValueCollector()
+    for thread_id, stack in get_thread_stacks():
+        frames = []
+        for frame in iter_frames(stack):
+            if len(frames) >= max_frames:
+                break
+            code = frame.f_code
+            if code.co_filename != debugged_file_path:
+                continue
+            if frame_filter is not None and (code.co_name, frame.f_lineno) not in frame_filter:
+                continue
+            frames.append(
+                FrameVariables(
+                    name=code.co_name,
+                    line=frame.f_lineno,
+                    places=get_frame_places(frame, values),
+                )
+            )
+        if frames:
+            threads.append(
+                ThreadVariables(
+                    thread_id=thread_id,
+                    thread_name=thread_names.get(thread_id),
+                    frames=frames,
+                )
+            )
+    return ThreadsVariables(
+        threads=threads,
+        values=values.get_values(),
+        truncated=values.truncated,
+    )
+
+
+def get_frame_places(frame: FrameType, values: ValueCollector) -> List[Place]:
+    """
+    Creates places for local variables of the frame.
+    Representations of their values are stored into `values`.
+    Places whose values do not fit into the value limit are left out.
+    """
+    arg_names = get_argument_names(frame)
     places = []
-    values: Dict[PythonId, BaseVal] = {}
 
     for name, value in frame.f_locals.items():
         if name.startswith("__") and name.endswith("__"):
@@ -401,25 +1141,29 @@ def get_variables(
                 continue
 
         value_id = str(id(value))
-        if value_id in values:
-            value_repr = values[value_id]
+        if value_id in values.values:
+            value_repr = values.values[value_id]
+        elif values.is_full():
+            values.truncated = True
+            continue
         else:
             value_repr = make_value(value)
             IdMap.register(value_repr.id, value)
 
-        # load one level of nested values
+        # load one level of nested values, contents of functions, generators,
+        # frames and cells are only loaded on request
         if isinstance(value_repr, FlatCollectionVal) and value_repr.element_count > 0:
             elements = get_flat_collection_elements(
                 collection_id=value_repr.id,
                 start_index=0,
-                element_count=min(value_repr.element_count, SEQUENCE_LOAD_ITEM_COUNT),
+                element_count=apply_limit(value_repr.element_count, LIMITS.eager_element_count),
             )
             value_repr.elements = elements
         elif isinstance(value_repr, DeferredDictVal) and value_repr.pair_count > 0:
             pairs = get_dict_entries(
                 dict_id=value_repr.id,
                 start_index=0,
-                pair_count=min(value_repr.pair_count, SEQUENCE_LOAD_ITEM_COUNT),
+                pair_count=apply_limit(value_repr.pair_count, LIMITS.eager_element_count),
             )
             value_repr.pairs = pairs
         elif isinstance(value_repr, ObjectVal):
@@ -430,7 +1174,7 @@ def get_variables(
                     object_id=value_repr.id,
                 )
 
-        values[value_repr.id] = value_repr
+        values.values[value_repr.id] = value_repr
 
         kind = "v"
         if name == RETURN_VALUES_DICT_NAME:
@@ -443,8 +1187,76 @@ def get_variables(
 
     # parameters first, then return value, then other variables
     places.sort(key=lambda p: (p.kind != "p", p.kind != "r"))
-
-    return Variables(places=places, values=list(values.values()))
+    return places
+
+
+def get_async_tasks(
+    loop_id: Optional[PythonId] = None,
+    start_index: int = 0,
+    task_count: int = 20,
+    max_await_depth: int = 10,
+) -> AsyncTasks:
+    """
+    Returns a page of asyncio tasks of the given event loop (or of the running loop),
+    along with the chains of coroutines that they are awaiting.
+    """
+    # asyncio is only imported when it is needed, because it is slow to import
+    import asyncio
+
+    if loop_id is not None:
+        loop = IdMap.get(loop_id)
+        check_type(loop, (asyncio.AbstractEventLoop,))
+    else:
+        loop = asyncio._get_running_loop()
+        if loop is None:
+            raise ValueError("No event loop is running in the current thread.")
+
+    # Sorted to keep the pages stable between requests
+    tasks = sorted(asyncio.all_tasks(loop), key=id)
+    # The default page can be larger than the number of tasks
+    validate_slicing_params(tasks, start_index, min(task_count, len(tasks) - start_index))
+
+    values = ValueCollector()
+    result = []
+    for task in tasks[start_index : start_index + task_count]:
+        task_id = str(id(task))
+        IdMap.register(task_id, task)
+
+        if task.cancelled():
+            state = "cancelled"
+        elif task.done():
+            state = "done"
+        else:
+            state = "pending"
+
+        async_task = AsyncTask(id=task_id, name=task.get_name(), state=state, frames=[])
+        awaitable = task.get_coro()
+        while awaitable is not None and len(async_task.frames) < max_await_depth:
+            if not (inspect.iscoroutine(awaitable) or inspect.isgenerator(awaitable)):
+                async_task.awaiting = make_value(awaitable)
+                IdMap.register(async_task.awaiting.id, awaitable)
+                break
+
+            if inspect.iscoroutine(awaitable):
+                (frame, awaited) = (awaitable.cr_frame, awaitable.cr_await)
+            else:
+                (frame, awaited) = (awaitable.gi_frame, awaitable.gi_yieldfrom)
+            async_task.frames.append(
+                CoroutineFrame(
+                    name=awaitable.__qualname__,
+                    line=frame.f_lineno if frame is not None else None,
+                    places=get_frame_places(frame, values) if frame is not None else [],
+                )
+            )
+            awaitable = awaited
+        result.append(async_task)
+
+    return AsyncTasks(
+        task_count=len(tasks),
+        tasks=result,
+        values=values.get_values(),
+        truncated=values.truncated,
+    )
 
 
 def get_flat_collection_elements(
@@ -489,6 +1301,80 @@ def get_dict_entries(
     return entries
 
 
+def get_type_name(ty: type) -> str:
+    return ty.__name__ if ty.__module__ == "builtins" else f"{ty.__module__}.{ty.__qualname__}"
+
+
+def make_type_histogram(values: Iterable[Any]) -> List[TypeCount]:
+    # Counting types of the values and not the values themselves keeps the loop in C
+    counts = collections.Counter(map(type, values))
+    return [
+        TypeCount(type_name=get_type_name(ty), count=count)
+        for (ty, count) in counts.most_common()
+    ]
+
+
+def sample_iterable(values: Iterable[Any], length: int, sample_size: int, seed: Optional[int]) -> List[Any]:
+    """
+    Returns a uniform random sample of `sample_size` items of `values` in iteration order.
+    Items between the sampled positions are skipped without being touched by Python code.
+    """
+    import random
+
+    positions = sorted(random.Random(seed).sample(range(length), min(sample_size, length)))
+    iterator = iter(values)
+    sample = []
+    previous = -1
+    for position in positions:
+        sample.append(next(itertools.islice(iterator, position - previous - 1, None)))
+        previous = position
+    return sample
+
+
+def get_collection_summary(
+    collection_id: PythonId,
+    sample_size: int = SEQUENCE_LOAD_ITEM_COUNT,
+    seed: Optional[int] = None,
+) -> CollectionSummary:
+    """
+    Summarizes a (possibly large) set or dict without paging through it.
+    Returns its length, histograms of the types of its keys (and values) and a uniform
+    random sample of its elements (or pairs).
+    """
+    value = IdMap.get(collection_id)
+    check_type(value, (set, frozenset, dict))
+    if sample_size < 0:
+        raise ValueError(f"Sample size {sample_size} must not be negative.")
+
+    if isinstance(value, dict):
+        summary = CollectionSummary(
+            id=collection_id,
+            length=len(value),
+            key_types=make_type_histogram(value.keys()),
+            value_types=make_type_histogram(value.values()),
+            pairs=[],
+        )
+        for key, val in sample_iterable(value.items(), len(value), sample_size, seed):
+            key_repr = make_value(key)
+            value_repr = make_value(val)
+            summary.pairs.append(KeyValuePair(key_repr, value_repr))
+            IdMap.register(key_repr.id, key)
+            IdMap.register(value_repr.id, val)
+    else:
+        summary = CollectionSummary(
+            id=collection_id,
+            length=len(value),
+            key_types=make_type_histogram(value),
+            value_types=None,
+            elements=[],
+        )
+        for element in sample_iterable(value, len(value), sample_size, seed):
+            element_repr = make_value(element)
+            summary.elements.append(element_repr)
+            IdMap.register(element_repr.id, element)
+    return summary
+
+
 def get_string_contents(
     str_id: PythonId,
     start_index: int,
@@ -503,12 +1389,86 @@ def get_string_contents(
     return value[start_index : start_index + length]
 
 
+def is_namedtuple(val: tuple) -> bool:
+    return hasattr(type(val), "_fields")
+
+
+def get_slot_name(cls: type, slot: str) -> str:
+    # Private slots are stored under their mangled name
+    if slot.startswith("__") and not slot.endswith("__"):
+        return f"_{cls.__name__.lstrip('_')}{slot}"
+    return slot
+
+
+def get_slot_fields(obj: Any) -> List[Tuple[str, Any]]:
+    """
+    Returns (name, value) of slots of the object, read through their member descriptors.
+    """
+    ty = type(obj)
+    fields = []
+    for cls in reversed(ty.__mro__):
+        slots = cls.__dict__.get("__slots__", ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        for slot in slots:
+            name = get_slot_name(cls, slot)
+            descriptor = cls.__dict__.get(name)
+            if not inspect.ismemberdescriptor(descriptor):
+                # __weakref__ or __dict__
+                continue
+            try:
+                fields.append((name, descriptor.__get__(obj, ty)))
+            except AttributeError:
+                fields.append((name, UNSET_FIELD))
+    return fields
+
+
+def get_declared_fields(obj: Any) -> Optional[List[Tuple[str, Any]]]:
+    """
+    Returns (name, value) of fields of named tuples, dataclasses and instances of classes
+    with `__slots__` (and without `__dict__`), which can be read without scanning `dir()`.
+    Dataclass instances also return their attributes that are not fields.
+    Fields that are not set have the value `UNSET_FIELD`.
+    Returns None for other objects.
+    """
+    ty = type(obj)
+    if isinstance(obj, tuple) and is_namedtuple(obj):
+        return list(zip(ty._fields, obj))
+    if dataclasses.is_dataclass(ty):
+        # Values are read without running properties or other descriptors
+        attributes = getattr(obj, "__dict__", None)
+        if not isinstance(attributes, dict):
+            attributes = {}
+        slots = dict(get_slot_fields(obj))
+        names = [field.name for field in dataclasses.fields(ty)]
+        fields = [
+            (name, attributes[name] if name in attributes else slots.get(name, UNSET_FIELD))
+            for name in names
+        ]
+        declared = set(names)
+        fields.extend((name, value) for (name, value) in slots.items() if name not in declared)
+        fields.extend((name, value) for (name, value) in attributes.items() if name not in declared)
+        return fields
+    if ty.__dictoffset__ == 0 and hasattr(ty, "__slots__"):
+        return get_slot_fields(obj)
+    return None
+
+
 def get_object(object_id: PythonId) -> ObjectVal:
     obj = IdMap.get(object_id)
 
     attributes = []
 
-    if not is_from_builtins(obj):
+    fields = get_declared_fields(obj) if not is_from_builtins(obj) else None
+    if fields is not None:
+        for name, value in fields:
+            attr = Attribute(name=name)
+            if value is not UNSET_FIELD:
+                attr.value = make_value(value)
+                IdMap.register(attr.value.id, value)
+            attributes.append(attr)
+        attributes.sort(key=lambda a: a.name.startswith("_"))
+    elif not is_from_builtins(obj):
         for attr_name in dir(obj):
             if attr_name.startswith("__") and attr_name.endswith("__"):
                 # skip special attributes
@@ -534,6 +1494,15 @@ def get_object(object_id: PythonId) -> ObjectVal:
                     dict_value = obj.__dict__[attr_name]
                     attr.value = make_value(dict_value)
                     IdMap.register(attr.value.id, dict_value)
+                elif inspect.ismemberdescriptor(static_attr_value):
+                    # slots can be read without running any user code
+                    try:
+                        slot_value = static_attr_value.__get__(obj, type(obj))
+                    except AttributeError:
+                        pass
+                    else:
+                        attr.value = make_value(slot_value)
+                        IdMap.register(attr.value.id, slot_value)
 
             else:
                 # need to get the attribute value dynamically to check if it's a method
@@ -550,15 +1519,510 @@ def get_object(object_id: PythonId) -> ObjectVal:
 
         attributes.sort(key=lambda a: a.name.startswith("_"))
 
+    attribute_count = apply_limit(len(attributes), LIMITS.attribute_count)
     return ObjectVal(
         id=object_id,
         size=sys.getsizeof(obj),
         type_name=type(obj).__name__,
-        attributes=attributes,
+        attributes=attributes[:attribute_count],
+        attributes_truncated=attribute_count < len(attributes),
     )
 
 
+def make_attributes(items: Iterable[Tuple[str, Any]]) -> List[Attribute]:
+    """
+    Creates attributes from (name, value) pairs, skipping special names.
+    """
+    attributes = []
+    for name, value in items:
+        if name.startswith("__") and name.endswith("__"):
+            continue
+        value_repr = make_value(value)
+        IdMap.register(value_repr.id, value)
+        attributes.append(Attribute(name=name, value=value_repr))
+    return attributes
+
+
+def get_function(function_id: PythonId) -> FunctionVal:
+    """
+    Returns the function along with the free variables of its closure
+    and (for bound methods) the object that it is bound to.
+    """
+    fn = IdMap.get(function_id)
+    check_type(fn, (FunctionType, MethodType))
+    return load_function(fn, make_value(fn))
+
+
+def load_function(fn: Any, function_repr: FunctionVal) -> FunctionVal:
+    function = fn.__func__ if inspect.ismethod(fn) else fn
+    # The cells are matched with the names of the free variables of the code object,
+    # which avoids resolving anything through the function's globals
+    function_repr.free_variables = []
+    for name, cell in zip(function.__code__.co_freevars, function.__closure__ or ()):
+        if is_cell_empty(cell):
+            function_repr.free_variables.append(Attribute(name=name))
+        else:
+            function_repr.free_variables.extend(make_attributes([(name, cell.cell_contents)]))
+    if inspect.ismethod(fn):
+        function_repr.receiver = make_value(fn.__self__)
+        IdMap.register(function_repr.receiver.id, fn.__self__)
+    return function_repr
+
+
+def get_generator(generator_id: PythonId) -> GeneratorVal:
+    """
+    Returns the generator (or coroutine) along with the locals of its suspended frame.
+    """
+    generator = IdMap.get(generator_id)
+    check_type(generator, tuple(GENERATOR_ATTRIBUTE_PREFIXES))
+    return load_generator(generator, make_value(generator))
+
+
+def load_generator(generator: Any, generator_repr: GeneratorVal) -> GeneratorVal:
+    (_, frame) = get_generator_state(generator)
+    generator_repr.locals = make_attributes(frame.f_locals.items()) if frame is not None else []
+    return generator_repr
+
+
+def get_frame(frame_id: PythonId) -> FrameVal:
+    frame = IdMap.get(frame_id)
+    check_type(frame, (FrameType,))
+    return load_frame(frame, make_value(frame))
+
+
+def load_frame(frame: FrameType, frame_repr: FrameVal) -> FrameVal:
+    frame_repr.locals = make_attributes(frame.f_locals.items())
+    return frame_repr
+
+
+def get_cell(cell_id: PythonId) -> CellVal:
+    cell = IdMap.get(cell_id)
+    check_type(cell, (CellType,))
+    return load_cell(cell, make_value(cell))
+
+
+def load_cell(cell: CellType, cell_repr: CellVal) -> CellVal:
+    if not cell_repr.empty:
+        cell_repr.value = make_value(cell.cell_contents)
+        IdMap.register(cell_repr.value.id, cell.cell_contents)
+    return cell_repr
+
+
+def expand_value(value_id: PythonId) -> BaseVal:
+    """
+    Returns the representation of a value together with all its elements, pairs,
+    attributes or string content.
+    """
+    value = IdMap.get(value_id)
+    value_repr = make_value(value)
+    if isinstance(value_repr, DeferredStrVal):
+        value_repr.content = value
+    elif isinstance(value_repr, FlatCollectionVal):
+        value_repr.elements = get_flat_collection_elements(value_id, 0, value_repr.element_count)
+    elif isinstance(value_repr, DeferredDictVal):
+        value_repr.pairs = get_dict_entries(value_id, 0, value_repr.pair_count)
+    elif isinstance(value_repr, FunctionVal):
+        value_repr = load_function(value, value_repr)
+    elif isinstance(value_repr, GeneratorVal):
+        value_repr = load_generator(value, value_repr)
+    elif isinstance(value_repr, FrameVal):
+        value_repr = load_frame(value, value_repr)
+    elif isinstance(value_repr, CellVal):
+        value_repr = load_cell(value, value_repr)
+    elif isinstance(value_repr, ObjectVal):
+        value_repr = get_object(value_id)
+    return value_repr
+
+
+def iter_nested_ids(record: Any) -> Iterator[PythonId]:
+    """
+    Yields ids of values nested in a value representation converted to a dictionary.
+    """
+    items = record.values() if isinstance(record, dict) else record
+    for item in items:
+        if isinstance(item, dict) and "kind" in item and "id" in item:
+            yield item["id"]
+        if isinstance(item, (dict, list)):
+            yield from iter_nested_ids(item)
+
+
+def write_snapshot_file(
+    path: str,
+    entries: Iterable[Tuple[int, bytes]],
+    make_manifest: Callable[[], Dict[str, Any]],
+) -> int:
+    """
+    Writes a snapshot file: a header, the entries, an index of the entries sorted by their key
+    and a JSON manifest. The manifest is created after all entries are written.
+    The file is written under a temporary name and renamed once it is complete, so a failure
+    while producing the entries does not leave a truncated snapshot behind.
+    Returns the size of the file.
+    """
+    import json
+    import struct
+
+    header = struct.Struct(SNAPSHOT_HEADER_FORMAT)
+    index_entry = struct.Struct(SNAPSHOT_INDEX_ENTRY_FORMAT)
+    index = []
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(bytes(header.size))
+            for key, data in entries:
+                index.append((key, f.tell(), len(data)))
+                f.write(data)
+            index.sort()
+            index_offset = f.tell()
+            f.write(b"".join(index_entry.pack(*item) for item in index))
+            manifest = json.dumps(make_manifest()).encode()
+            manifest_offset = f.tell()
+            f.write(manifest)
+            size = f.tell()
+            f.seek(0)
+            f.write(
+                header.pack(
+                    SNAPSHOT_MAGIC,
+                    SNAPSHOT_VERSION,
+                    0,
+                    index_offset,
+                    len(index),
+                    manifest_offset,
+                    len(manifest),
+                )
+            )
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return size
+
+
+def export_snapshot(
+    path: str,
+    debugged_file_path: str,
+    max_frames: int = 100,
+    max_objects: int = 100000,
+) -> SnapshotExport:
+    """
+    Writes places of frames of the debugged file on all threads and all values reachable
+    from them into a snapshot file, which can be read by `snapshot_reader.py` without a debugger.
+    """
+    import json
+
+    threads = get_threads_variables(debugged_file_path, max_frames=max_frames)
+    queue = collections.deque(
+        place.id for thread in threads.threads for frame in thread.frames for place in frame.places
+    )
+    visited = set(queue)
+    truncated = False
+
+    def iter_records() -> Iterator[Tuple[int, bytes]]:
+        nonlocal truncated
+        while queue:
+            value_id = queue.popleft()
+            record = dataclasses.asdict(expand_value(value_id))
+            for child_id in iter_nested_ids(record):
+                if child_id in visited:
+                    continue
+                if len(visited) >= max_objects:
+                    truncated = True
+                    continue
+                visited.add(child_id)
+                queue.append(child_id)
+            yield (int(value_id), json.dumps(record).encode())
+
+    def make_manifest() -> Dict[str, Any]:
+        return {
+            "backend": "debugpy",
+            "threads": [dataclasses.asdict(thread) for thread in threads.threads],
+            "truncated": truncated,
+        }
+
+    size = write_snapshot_file(path, iter_records(), make_manifest)
+    return SnapshotExport(
+        path=path,
+        object_count=len(visited),
+        byte_count=size,
+        truncated=truncated,
+    )
+
+
+class HeapMark:
+    """
+    Ids of objects tracked by the garbage collector, grouped by type.
+    The ids of each type are kept in an array, which takes 8 bytes per object
+    and does not keep the objects alive.
+    """
+
+    def __init__(self, objects: List[Any]) -> None:
+        from array import array
+
+        groups: Dict[type, Tuple[List[int], List[int]]] = {}
+        for obj in objects:
+            group = groups.get(type(obj))
+            if group is None:
+                group = groups[type(obj)] = ([], [])
+            group[0].append(id(obj))
+            group[1].append(sys.getsizeof(obj))
+
+        # type name -> (ids, byte count)
+        self.types: Dict[str, Tuple["array[int]", int]] = {}
+        for ty, (ids, sizes) in groups.items():
+            name = get_type_name(ty)
+            (previous_ids, previous_bytes) = self.types.get(name, (array("Q"), 0))
+            previous_ids.extend(ids)
+            self.types[name] = (previous_ids, previous_bytes + sum(sizes))
+
+    def object_count(self) -> int:
+        return sum(len(ids) for (ids, _) in self.types.values())
+
+    def byte_count(self) -> int:
+        return sum(byte_count for (_, byte_count) in self.types.values())
+
+
+HEAP_MARKS: Dict[int, HeapMark] = {}
+HEAP_MARK_COUNTER = itertools.count(1)
+
+
+def mark_heap() -> HeapMarkInfo:
+    """
+    Remembers which objects are alive, so that diff_heap can later return the objects that
+    have appeared or disappeared since then.
+    Only objects tracked by the garbage collector are considered, so e.g. strings and
+    numbers are left out.
+    """
+    heap_mark = HeapMark(gc.get_objects())
+    mark = next(HEAP_MARK_COUNTER)
+    HEAP_MARKS[mark] = heap_mark
+    return HeapMarkInfo(mark=mark, object_count=heap_mark.object_count(), byte_count=heap_mark.byte_count())
+
+
+def release_heap_mark(mark: int) -> None:
+    if HEAP_MARKS.pop(mark, None) is None:
+        raise ValueError(f"Heap mark {mark} not found.")
+
+
+def diff_heap(
+    mark: int,
+    type_name: Optional[str] = None,
+    start_index: int = 0,
+    object_count: int = SEQUENCE_LOAD_ITEM_COUNT,
+) -> HeapDiff:
+    """
+    Compares the live objects with the objects alive at the given mark.
+    Returns count and byte deltas of every changed type and a page of the new objects
+    (optionally only of the given type), which can be inspected by their ids.
+    An object that was freed and whose id was reused by a new object of the same type
+    is not reported.
+    """
+    heap_mark = HEAP_MARKS.get(mark)
+    if heap_mark is None:
+        raise ValueError(f"Heap mark {mark} not found.")
+
+    objects = gc.get_objects()
+    current = HeapMark(objects)
+    empty = ((), 0)
+
+    deltas = []
+    new_ids = set()
+    for name in current.types.keys() | heap_mark.types.keys():
+        (ids, byte_count) = current.types.get(name, empty)
+        (marked_ids, marked_byte_count) = heap_mark.types.get(name, empty)
+        new = set(ids).difference(marked_ids)
+        freed_count = len(marked_ids) - (len(ids) - len(new))
+        if new or freed_count or byte_count != marked_byte_count:
+            deltas.append(TypeDelta(
+                type_name=name,
+                count_delta=len(ids) - len(marked_ids),
+                byte_delta=byte_count - marked_byte_count,
+                new_count=len(new),
+                freed_count=freed_count,
+            ))
+        if type_name is None or name == type_name:
+            new_ids |= new
+    deltas.sort(key=lambda delta: (-abs(delta.byte_delta), delta.type_name))
+
+    # New objects are returned in the order of the garbage collector lists
+    new_objects = [obj for obj in objects if id(obj) in new_ids]
+    validate_slicing_params(new_objects, start_index, min(object_count, len(new_objects) - start_index))
+
+    page = []
+    for obj in new_objects[start_index:start_index + object_count]:
+        value_repr = make_value(obj)
+        page.append(value_repr)
+        IdMap.register(value_repr.id, obj)
+    return HeapDiff(mark=mark, types=deltas, new_object_count=len(new_objects), new_objects=page)
+
+
+def get_program_frames() -> List[FrameType]:
+    """
+    Returns frames of all threads that do not belong to this script.
+    """
+    return [
+        frame
+        for (_, stack) in get_thread_stacks()
+        for frame in iter_frames(stack)
+        if frame.f_globals is not globals()
+    ]
+
+
+class ReferrerIndex:
+    """
+    Reverse references of objects tracked by the garbage collector, built with a single sweep
+    of the heap. The swept objects are kept alive by the index, so that their ids stay valid.
+    Like IdMap, the index is dropped by clear_id_map, so it only lives for one stop.
+    """
+
+    def __init__(self) -> None:
+        objects = gc.get_objects()
+        # The backend's own references are not interesting, and keeping the index itself
+        # would make a reference cycle that outlives the stop
+        ignored = {id(IdMap._strongrefMap), id(self), id(self.__dict__)}
+        self.objects: Dict[int, Any] = {id(obj): obj for obj in objects if id(obj) not in ignored}
+        # referent id -> ids of referrers
+        self.referrers: Dict[int, List[int]] = collections.defaultdict(list)
+        # dict id -> (object whose __dict__ or frame whose locals it is, relation)
+        self.dict_owners: Dict[int, Tuple[Any, str]] = {}
+        for (obj_id, obj) in self.objects.items():
+            referents = gc.get_referents(obj)
+            for referent in referents:
+                self.referrers[id(referent)].append(obj_id)
+            if any(type(referent) is dict for referent in referents):
+                owned = get_owned_dict(obj)
+                if owned is not None:
+                    self.dict_owners.setdefault(id(owned[0]), (obj, owned[1]))
+        # Frames that are being executed are not tracked by the garbage collector
+        self.frames = get_program_frames()
+
+    def get_referrers(self, value: Any) -> List[Any]:
+        referrers = [
+            frame for frame in self.frames if any(local is value for local in frame.f_locals.values())
+        ]
+        return referrers + [self.objects[referrer_id] for referrer_id in self.referrers.get(id(value), ())]
+
+    def find_dict_owner(self, dictionary: dict) -> Optional[Tuple[Any, str]]:
+        """
+        Returns the object whose `__dict__` (with relation "attribute") or the frame whose
+        locals (with relation "local") are the given dict.
+        """
+        owner = self.dict_owners.get(id(dictionary))
+        if owner is not None:
+            return owner
+        for frame in self.frames:
+            if frame.f_locals is dictionary:
+                return (frame, "local")
+        return None
+
+
+def get_owned_dict(obj: Any) -> Optional[Tuple[dict, str]]:
+    """
+    Returns the locals of a frame or the `__dict__` of an object, with the relation of their items.
+    """
+    if isinstance(obj, FrameType):
+        owned = (obj.f_locals, "local")
+    elif type(obj).__dictoffset__ and not isinstance(obj, type):
+        # Only objects with an instance dict are asked for it, which cannot run `__getattr__`
+        try:
+            owned = (obj.__dict__, "attribute")
+        except Exception:
+            return None
+    else:
+        return None
+    return owned if type(owned[0]) is dict else None
+
+
+# Built by the first get_referrers call after the debugged program stops
+REFERRER_INDEX: Optional[ReferrerIndex] = None
+
+
+def get_key_name(key: Any) -> str:
+    return get_str_default_load_content(key if isinstance(key, str) else repr(key))
+
+
+def get_references(referrer: Any, value: Any) -> List[Tuple[str, Optional[str]]]:
+    """
+    Returns (relation, name) of all references from `referrer` to `value`.
+    """
+    if isinstance(referrer, FrameType):
+        return [("local", name) for (name, local) in referrer.f_locals.items() if local is value]
+    if isinstance(referrer, dict):
+        references = [("item", get_key_name(key)) for (key, item) in referrer.items() if item is value]
+        return references + [("key", get_key_name(key)) for key in referrer if key is value]
+    if isinstance(referrer, (list, tuple)) and not is_namedtuple(referrer):
+        return [("element", str(index)) for (index, element) in enumerate(referrer) if element is value]
+    if isinstance(referrer, (set, frozenset)):
+        return [("element", None)]
+
+    fields = get_declared_fields(referrer)
+    if fields is None:
+        attributes = getattr(referrer, "__dict__", None)
+        fields = list(attributes.items()) if isinstance(attributes, dict) else []
+    references = [("attribute", name) for (name, field) in fields if field is value]
+    return references or [("referent", None)]
+
+
+def get_referrers(value_id: PythonId, limit: int = SEQUENCE_LOAD_ITEM_COUNT) -> Referrers:
+    """
+    Returns up to `limit` objects that refer to the given value, together with the names
+    of the locals, attributes or keys through which they refer to it.
+    Dicts that hold attributes of objects or locals of frames are replaced by their owners.
+    The reverse reference index is built once per stop and reused by all queries.
+    """
+    global REFERRER_INDEX
+
+    value = IdMap.get(value_id)
+    if limit < 0:
+        raise ValueError(f"Limit {limit} must not be negative.")
+    if REFERRER_INDEX is None:
+        REFERRER_INDEX = ReferrerIndex()
+
+    direct_referrers = REFERRER_INDEX.get_referrers(value)
+    result = Referrers(id=value_id, referrer_count=len(direct_referrers), referrers=[])
+    seen = set()
+    for referrer in direct_referrers:
+        references = [(referrer, relation, name) for (relation, name) in get_references(referrer, value)]
+        if isinstance(referrer, dict):
+            owner = REFERRER_INDEX.find_dict_owner(referrer)
+            if owner is not None:
+                references = [(owner[0], owner[1], name) for (_, _, name) in references]
+
+        for (obj, relation, name) in references:
+            if (id(obj), relation, name) in seen:
+                continue
+            seen.add((id(obj), relation, name))
+            if len(result.referrers) >= limit:
+                return result
+            value_repr = make_value(obj)
+            IdMap.register(value_repr.id, obj)
+            result.referrers.append(Referrer(value=value_repr, relation=relation, name=name))
+    return result
+
+
 def clear_id_map() -> None:
+    # Called whenever the debugged program stops
+    global REFERRER_INDEX
+
+    IdMap.clear()
+    REFERRER_INDEX = None
+    if HISTORY is not None:
+        HISTORY.next_step()
+
+
+def reset_session() -> None:
+    """
+    Restores the state of a freshly loaded module.
+    Called by init.py when a new debugging session reuses the already loaded module.
+    """
+    global LIMITS, HISTORY, TRACER, REFERRER_INDEX
+
+    if TRACER is not None:
+        TRACER.stop()
+    LIMITS = Limits()
+    HISTORY = None
+    TRACER = None
+    HEAP_MARKS.clear()
+    REFERRER_INDEX = None
     IdMap.clear()
 
 
@@ -583,7 +2047,18 @@ class Response:
     content: dataclasses.InitVar[Any]
 
     def __init__(self, content: Any) -> None:
+        import json
+
         self.message = json.dumps(dataclasses.asdict(content))
+        # Size of the response before it was replaced by an error because of the size limit
+        self.oversized_bytes: Optional[int] = None
+        max_bytes = LIMITS.max_response_bytes
+        if max_bytes is not None and len(self.message) > max_bytes:
+            # The response cannot be cut without breaking the JSON. try_run requests fewer values
+            # where it can, otherwise the frontend is told to request less data (e.g. a smaller page)
+            self.oversized_bytes = len(self.message)
+            error = f"Response size {len(self.message)} B exceeds the limit of {max_bytes} B."
+            self.message = json.dumps(dataclasses.asdict(Result.make_error(error)))
 
     def __repr__(self) -> str:
         # Debugpy's evaluate returns Python repr() of the string result,
@@ -595,6 +2070,31 @@ class Response:
 def try_run(fn: Callable) -> Response:
     try:
         result = fn()
-        return Response(Result.make_ok(result))
+        response = Response(Result.make_ok(result))
+        if response.oversized_bytes is not None and hasattr(result, "values") and hasattr(result, "truncated"):
+            response = run_with_fewer_values(fn, len(result.values), response.oversized_bytes)
+        return response
     except BaseException as e:
         return Response(Result.make_error(str(e)))
+
+
+def run_with_fewer_values(fn: Callable, value_count: int, response_bytes: int) -> Response:
+    """
+    Runs `fn` again with a lower value limit until its response fits into the response size limit.
+    Places whose values do not fit are left out and the result is marked as truncated,
+    like with the `max_values` limit.
+    """
+    global LIMITS
+
+    limits = LIMITS
+    # The first attempt assumes that all values have a similar size
+    value_count = value_count * limits.max_response_bytes // response_bytes
+    try:
+        while True:
+            LIMITS = dataclasses.replace(limits, max_values=value_count)
+            response = Response(Result.make_ok(fn()))
+            if response.oversized_bytes is None or value_count == 0:
+                return response
+            value_count //= 2
+    finally:
+        LIMITS = limits
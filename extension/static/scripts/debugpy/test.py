@@ -1,11 +1,24 @@
+import ast
+import asyncio
+import collections
 import dataclasses
 import inspect
 import json
+import os
+import runpy
+import struct
+import sys
+import threading
+import typing
+import weakref
 
 import pytest
 
 import memviz_get_variables_info
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import snapshot_reader  # noqa: E402
+
 
 @pytest.fixture(autouse=True)
 def clean_id_map():
@@ -15,6 +28,13 @@ def clean_id_map():
     memviz_get_variables_info.IdMap.clear()
 
 
+@pytest.fixture(autouse=True)
+def reset_session_state():
+    """Fixture to restore the default limits, history, trace, heap marks and referrers after each test."""
+    yield
+    memviz_get_variables_info.reset_session()
+
+
 def unwrap_response(response: memviz_get_variables_info.Response):
     """Parse JSON response from try_run back to dictionary."""
     data = json.loads(response.message)
@@ -356,6 +376,80 @@ def test_object_lazy_attribute_loading():
     assert attrs["numbers"]["value"]["kind"] == "list"
 
 
+def test_declared_object_fields():
+    """Test slots, dataclass and namedtuple instances."""
+
+    class Slotted:
+        __slots__ = ("x", "__hidden", "unset")
+
+        def __init__(self):
+            self.x = 1
+            self.__hidden = "h"
+
+    class SlottedChild(Slotted):
+        __slots__ = "y"
+
+        def __init__(self):
+            super().__init__()
+            self.y = [1, 2]
+
+    @dataclasses.dataclass
+    class Config:
+        name: str
+        retries: int = 3
+
+        @property
+        def label(self):
+            raise AssertionError("Properties must not be evaluated")
+
+        def __post_init__(self):
+            self.cache = {}
+
+    class MixedSlots:
+        __slots__ = ("slot",)
+
+    class WithDict(MixedSlots):
+        def __init__(self):
+            self.slot = 5
+            self.other = 6
+
+    Pair = collections.namedtuple("Pair", ["left", "right"])
+
+    val_slotted = SlottedChild()
+    val_config = Config("svc")
+    val_pair = Pair(1, "two")
+    val_mixed = WithDict()
+
+    vars_map = get_variable_map(get_variables_at_current_line())
+
+    def attributes(name):
+        return {a["name"]: a["value"] for a in vars_map[name]["attributes"]}
+
+    slotted = attributes("val_slotted")
+    assert slotted["x"]["value"] == "1"
+    assert slotted["_Slotted__hidden"]["content"] == "h"
+    assert slotted["y"]["kind"] == "list"
+    assert slotted["unset"] is None
+
+    config = attributes("val_config")
+    # Attributes set outside of the generated __init__ are kept
+    assert list(config) == ["name", "retries", "cache"]
+    assert config["name"]["content"] == "svc"
+    assert config["retries"]["value"] == "3"
+    assert config["cache"]["kind"] == "dict"
+
+    assert vars_map["val_pair"]["kind"] == "object"
+    assert vars_map["val_pair"]["type_name"] == "Pair"
+    pair = attributes("val_pair")
+    assert pair["left"]["value"] == "1"
+    assert pair["right"]["content"] == "two"
+
+    mixed = {a["name"]: a for a in vars_map["val_mixed"]["attributes"]}
+    assert mixed["slot"]["is_descriptor"] is True
+    assert mixed["slot"]["value"]["value"] == "5"
+    assert mixed["other"]["value"]["value"] == "6"
+
+
 def test_identity_and_circular_refs():
     """Test circular references and shared object identity."""
     # Circular
@@ -439,6 +533,673 @@ def test_nested_frames():
     middle(outer_line_before_call)
 
 
+def run_in_parked_thread(fn):
+    """Run fn in a new thread and park it until the returned release callback is called."""
+    started = threading.Event()
+    release = threading.Event()
+    frame_line = {}
+
+    def parked_thread():
+        thread_local = "worker"
+        frame_line["line"] = inspect.currentframe().f_lineno + 2
+        started.set()
+        release.wait()
+
+    thread = threading.Thread(target=parked_thread, name="parked")
+    thread.start()
+    started.wait()
+    try:
+        fn(frame_line["line"])
+    finally:
+        release.set()
+        thread.join()
+
+
+def test_variables_of_other_thread():
+    """Test that frames of other threads are found by place."""
+
+    def check(frame_line):
+        data = get_variables_at_place(__file__, "parked_thread", frame_line, 0)
+        assert get_variable_map(data)["thread_local"]["content"] == "worker"
+
+    run_in_parked_thread(check)
+
+
+def test_threads_variables():
+    """Test capturing frames of all threads in a single snapshot."""
+    main_local = 42
+
+    def check(frame_line):
+        snapshot = dataclasses.asdict(
+            memviz_get_variables_info.get_threads_variables(__file__)
+        )
+        values = {v["id"]: v for v in snapshot["values"]}
+        threads = {t["thread_name"]: t for t in snapshot["threads"]}
+        assert threads["MainThread"]["thread_id"] == threading.get_ident()
+
+        parked_frames = threads["parked"]["frames"]
+        assert parked_frames[0]["name"] == "parked_thread"
+        assert parked_frames[0]["line"] == frame_line
+        parked_places = {p["name"]: p for p in parked_frames[0]["places"]}
+        assert values[parked_places["thread_local"]["id"]]["content"] == "worker"
+
+        main_frames = {f["name"]: f for f in threads["MainThread"]["frames"]}
+        main_places = {
+            p["name"]: p for p in main_frames["test_threads_variables"]["places"]
+        }
+        assert values[main_places["main_local"]["id"]]["value"] == "42"
+
+        filtered = memviz_get_variables_info.get_threads_variables(
+            __file__, frame_filter=[("parked_thread", frame_line)]
+        )
+        assert [t.thread_name for t in filtered.threads] == ["parked"]
+
+    run_in_parked_thread(check)
+
+
+def test_async_tasks():
+    """Test enumeration of suspended asyncio tasks and their coroutine chains."""
+
+    async def inner(value):
+        inner_local = value * 2
+        await asyncio.sleep(3600)
+
+    async def outer(value):
+        outer_local = value
+        await inner(value)
+
+    loop = asyncio.new_event_loop()
+    try:
+        tasks = [loop.create_task(outer(i), name=f"task-{i}") for i in range(5)]
+        # Let the tasks run until they are suspended
+        loop.run_until_complete(asyncio.sleep(0))
+
+        loop_id = str(id(loop))
+        memviz_get_variables_info.IdMap.register(loop_id, loop)
+        data = unwrap_response(
+            memviz_get_variables_info.try_run(
+                lambda: memviz_get_variables_info.get_async_tasks(loop_id, 0, 3)
+            )
+        )
+        assert data["task_count"] == 5
+        assert len(data["tasks"]) == 3
+
+        values = {v["id"]: v for v in data["values"]}
+        task = data["tasks"][0]
+        assert task["state"] == "pending"
+        assert task["name"].startswith("task-")
+        assert [f["name"].split(".")[-1] for f in task["frames"]] == [
+            "outer",
+            "inner",
+            "sleep",
+        ]
+        inner_places = {p["name"]: p for p in task["frames"][1]["places"]}
+        index = int(task["name"].split("-")[1])
+        assert values[inner_places["inner_local"]["id"]]["value"] == str(index * 2)
+        assert task["awaiting"] is not None
+
+        # Paging
+        rest = memviz_get_variables_info.get_async_tasks(loop_id, 3, 2)
+        names = {t["name"] for t in data["tasks"]} | {t.name for t in rest.tasks}
+        assert names == {f"task-{i}" for i in range(5)}
+
+        # The default page is larger than the number of tasks
+        default_page = memviz_get_variables_info.get_async_tasks(loop_id)
+        assert len(default_page.tasks) == 5
+    finally:
+        for task in tasks:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        loop.close()
+
+
+def test_generators_closures_and_frames():
+    """Test generator, closure, bound method, frame and cell values."""
+
+    def make_counter(step):
+        total = 0
+
+        def counter():
+            nonlocal total
+            total += step
+            return total
+
+        return counter
+
+    def numbers(limit):
+        for i in range(limit):
+            yield i * 10
+
+    class Greeter:
+        def greet(self):
+            return "hi"
+
+    val_closure = make_counter(3)
+    val_closure()
+    val_gen = numbers(5)
+    next(val_gen)
+    next(val_gen)
+    val_created = numbers(1)
+    val_method = Greeter().greet
+    val_frame = inspect.currentframe()
+    val_cell = val_closure.__closure__[0]
+
+    vars_map = get_variable_map(get_variables_at_current_line())
+
+    def load(function, value_id):
+        return unwrap_response(memviz_get_variables_info.try_run(lambda: function(value_id)))
+
+    # Contents are only loaded on request
+    for name in ("val_closure", "val_method"):
+        assert vars_map[name]["free_variables"] is None
+        assert vars_map[name]["receiver"] is None
+    for name in ("val_gen", "val_created", "val_frame"):
+        assert vars_map[name]["locals"] is None
+    assert vars_map["val_cell"]["value"] is None
+
+    closure = load(memviz_get_variables_info.get_function, vars_map["val_closure"]["id"])
+    assert closure["kind"] == "function"
+    assert closure["signature"] == vars_map["val_closure"]["signature"]
+    free_vars = {a["name"]: a["value"] for a in closure["free_variables"]}
+    assert free_vars["step"]["value"] == "3"
+    assert free_vars["total"]["value"] == "3"
+
+    gen = load(memviz_get_variables_info.get_generator, vars_map["val_gen"]["id"])
+    assert gen["kind"] == "generator"
+    assert gen["type_name"] == "generator"
+    assert gen["state"] == "suspended"
+    gen_locals = {a["name"]: a["value"] for a in gen["locals"]}
+    assert gen_locals["i"]["value"] == "1"
+    assert gen_locals["limit"]["value"] == "5"
+    assert vars_map["val_created"]["state"] == "created"
+
+    method = load(memviz_get_variables_info.get_function, vars_map["val_method"]["id"])
+    assert method["kind"] == "function"
+    assert method["receiver"]["type_name"] == "Greeter"
+
+    frame = load(memviz_get_variables_info.get_frame, vars_map["val_frame"]["id"])
+    assert frame["kind"] == "frame"
+    assert frame["name"] == "test_generators_closures_and_frames"
+    assert "val_gen" in {a["name"] for a in frame["locals"]}
+
+    cell = load(memviz_get_variables_info.get_cell, vars_map["val_cell"]["id"])
+    assert cell["kind"] == "cell"
+    assert cell["empty"] is False
+    assert cell["value"]["kind"] == "int"
+
+    # Exhausted generators have no frame
+    list(val_gen)
+    gen_id = gen["id"]
+    exhausted = unwrap_response(
+        memviz_get_variables_info.try_run(
+            lambda: memviz_get_variables_info.get_generator(gen_id)
+        )
+    )
+    assert exhausted["state"] == "closed"
+    assert exhausted["locals"] == []
+
+
+def test_collection_summary():
+    """Test type histograms and random samples of sets and dicts."""
+    big_dict = {i: str(i) for i in range(1000)}
+    big_dict.update({f"key{i}": None for i in range(10)})
+    big_set = set(range(500)) | {"a", "b"}
+
+    vars_map = get_variable_map(get_variables_at_current_line())
+    dict_id = vars_map["big_dict"]["id"]
+    set_id = vars_map["big_set"]["id"]
+
+    summary = unwrap_response(
+        memviz_get_variables_info.try_run(
+            lambda: memviz_get_variables_info.get_collection_summary(
+                dict_id, sample_size=50, seed=1
+            )
+        )
+    )
+    assert summary["length"] == 1010
+    assert summary["key_types"] == [
+        {"type_name": "int", "count": 1000},
+        {"type_name": "str", "count": 10},
+    ]
+    assert summary["value_types"][0] == {"type_name": "str", "count": 1000}
+    assert len(summary["pairs"]) == 50
+    sampled_keys = [int(p["key"]["value"]) for p in summary["pairs"] if p["key"]["kind"] == "int"]
+    # The sample is in iteration order and is not just the beginning of the dict
+    assert sampled_keys == sorted(sampled_keys)
+    assert sampled_keys[-1] > 50
+    for pair in summary["pairs"]:
+        if pair["key"]["kind"] == "int":
+            assert pair["value"]["content"] == pair["key"]["value"]
+
+    # The same seed produces the same sample
+    again = memviz_get_variables_info.get_collection_summary(dict_id, 50, seed=1)
+    assert [p.key.id for p in again.pairs] == [p["key"]["id"] for p in summary["pairs"]]
+
+    set_summary = memviz_get_variables_info.get_collection_summary(set_id, sample_size=1000)
+    assert set_summary.value_types is None
+    assert len(set_summary.elements) == len(big_set)
+    assert {t.type_name: t.count for t in set_summary.key_types} == {"int": 500, "str": 2}
+
+    with pytest.raises(ValueError):
+        memviz_get_variables_info.get_collection_summary(vars_map["big_dict"]["pairs"][0]["key"]["id"])
+
+
+def test_configured_limits():
+    """Test that configured limits are enforced and truncation is reported."""
+    limits = unwrap_response(
+        memviz_get_variables_info.try_run(
+            lambda: memviz_get_variables_info.configure(
+                {"eager_element_count": 2, "str_char_count": 3, "attribute_count": 1}
+            )
+        )
+    )
+    assert limits["eager_element_count"] == 2
+    assert limits["max_values"] is None
+
+    class Point:
+        def __init__(self):
+            self.x = 1
+            self.y = 2
+
+    val_list = [1, 2, 3, 4]
+    val_str = "abcdef"
+    val_obj = Point()
+
+    data = get_variables_at_current_line()
+    assert data["truncated"] is False
+    vars_map = get_variable_map(data)
+    assert len(vars_map["val_list"]["elements"]) == 2
+    assert vars_map["val_str"]["content"] == "abc"
+    assert len(vars_map["val_obj"]["attributes"]) == 1
+    assert vars_map["val_obj"]["attributes_truncated"] is True
+
+    memviz_get_variables_info.configure({"max_values": 2})
+    data = get_variables_at_current_line()
+    assert data["truncated"] is True
+    assert len(data["values"]) == 2
+
+    # Values that do not fit into the response size limit are left out
+    frame = inspect.currentframe()
+
+    def get_variables():
+        # The frame is at the line that calls try_run
+        return memviz_get_variables_info.get_variables(__file__, frame.f_code.co_name, frame.f_lineno, 0)
+
+    memviz_get_variables_info.configure({"max_values": None})
+    full = memviz_get_variables_info.try_run(get_variables)
+    max_bytes = len(full.message) // 2
+    memviz_get_variables_info.configure({"max_response_bytes": max_bytes})
+    response = memviz_get_variables_info.try_run(get_variables)
+    assert len(response.message) <= max_bytes
+    data = unwrap_response(response)
+    assert data["truncated"] is True
+    assert 0 < len(data["values"]) < len(unwrap_response(full)["values"])
+    assert memviz_get_variables_info.LIMITS.max_values is None
+
+    # Responses that cannot be trimmed enough are reported as errors
+    memviz_get_variables_info.configure({"max_response_bytes": 10})
+    error = unwrap_error(
+        memviz_get_variables_info.try_run(lambda: get_variables_at_current_line())
+    )
+    assert "exceeds the limit" in error
+
+    with pytest.raises(ValueError):
+        memviz_get_variables_info.configure({"unknown": 1})
+    with pytest.raises(ValueError):
+        memviz_get_variables_info.configure({"max_values": -1})
+
+
+def test_snapshot_history():
+    """Test that variables of previous steps are served from the history."""
+    memviz_get_variables_info.configure_history(max_entries=3)
+
+    counter = 0
+    for _ in range(4):
+        counter += 1
+        get_variables_at_current_line()
+        memviz_get_variables_info.clear_id_map()
+
+    frame_name = inspect.currentframe().f_code.co_name
+    history = unwrap_response(
+        memviz_get_variables_info.try_run(
+            lambda: memviz_get_variables_info.get_history(frame_name, 0, 10)
+        )
+    )
+    assert history["current_step"] == 4
+    # The oldest step was dropped
+    assert [step["step"] for step in history["steps"]] == [1, 2, 3]
+    for step in history["steps"]:
+        values = {v["id"]: v for v in step["variables"]["values"]}
+        places = {p["name"]: values[p["id"]] for p in step["variables"]["places"]}
+        assert places["counter"]["value"] == str(step["step"] + 1)
+
+    assert len(memviz_get_variables_info.get_history(frame_name, 2, 2).steps) == 1
+    assert memviz_get_variables_info.get_history("other", 0, 10).steps == []
+
+    # Snapshots that do not fit into the byte limit are dropped
+    memviz_get_variables_info.configure_history(max_entries=10, max_bytes=1)
+    get_variables_at_current_line()
+    assert memviz_get_variables_info.get_history(frame_name, 0, 10).steps == []
+
+    memviz_get_variables_info.configure_history(max_entries=0)
+    assert "not being recorded" in unwrap_error(
+        memviz_get_variables_info.try_run(
+            lambda: memviz_get_variables_info.get_history(frame_name, 0, 10)
+        )
+    )
+
+
+@pytest.mark.skipif(not hasattr(sys, "monitoring"), reason="requires Python 3.12+")
+def test_trace_local_writes():
+    """Test that writes of local variables are recorded without stopping."""
+
+    def work(count):
+        total = 0
+        for i in range(count):
+            total += i
+        return total
+
+    def fail():
+        value = 1
+        raise KeyError(value)
+
+    def replace():
+        item = [1]
+        # The new list can reuse the id of the freed one
+        item = None; item = [2]  # noqa: E702
+        return item
+
+    memviz_get_variables_info.start_trace(__file__, max_events=1000)
+    try:
+        work(3)
+        replace()
+        frame_count = len(memviz_get_variables_info.TRACER.frames)
+        with pytest.raises(KeyError):
+            fail()
+        # Frames that exit with an exception are forgotten
+        assert len(memviz_get_variables_info.TRACER.frames) == frame_count
+    finally:
+        memviz_get_variables_info.stop_trace()
+
+    log = memviz_get_variables_info.get_trace_log(0, 1000)
+    assert log.running is False
+    writes = [
+        (event.name, event.value.value)
+        for event in log.events
+        if event.function.endswith(".work")
+    ]
+    assert writes == [
+        ("count", "3"),
+        ("total", "0"),
+        ("i", "0"),
+        ("i", "1"),
+        ("total", "1"),
+        ("i", "2"),
+        ("total", "3"),
+    ]
+    replaced = [event for event in log.events if event.function.endswith(".replace")]
+    assert [event.value.kind for event in replaced] == ["list", "list"]
+
+    # Paging
+    page = memviz_get_variables_info.get_trace_log(log.event_count - 2, 10)
+    assert [event.index for event in page.events] == [
+        log.event_count - 2,
+        log.event_count - 1,
+    ]
+
+
+def test_trace_requires_monitoring():
+    """Test that tracing reports missing sys.monitoring support."""
+    if hasattr(sys, "monitoring"):
+        pytest.skip("sys.monitoring is available")
+    assert "3.12" in unwrap_error(
+        memviz_get_variables_info.try_run(
+            lambda: memviz_get_variables_info.start_trace(__file__)
+        )
+    )
+
+
+def test_export_snapshot(tmp_path):
+    """Test that an exported snapshot serves the same values without the live objects."""
+
+    class Node:
+        def __init__(self, value, next=None):
+            self.value = value
+            self.next = next
+
+    val_list = [Node(1, Node(2)), "text" * 100, {"key": (1, 2)}]
+    val_alias = val_list
+
+    path = str(tmp_path / "snapshot.bin")
+    export = memviz_get_variables_info.export_snapshot(path, __file__, max_frames=1)
+    assert export.truncated is False
+    assert export.object_count > 5
+
+    with snapshot_reader.open_snapshot(path) as snapshot:
+        assert isinstance(snapshot, snapshot_reader.DebugpySnapshot)
+        frame = snapshot.get_threads()[0]["frames"][0]
+        assert frame["name"] == "test_export_snapshot"
+
+        variables = snapshot.get_variables(0, 0)
+        places = {p["name"]: p for p in variables["places"]}
+        assert places["val_list"]["id"] == places["val_alias"]["id"]
+
+        list_id = places["val_list"]["id"]
+        elements = snapshot.get_flat_collection_elements(list_id, 0, 3)
+        assert [e["kind"] for e in elements] == ["object", "str", "dict"]
+
+        # The whole object graph is exported
+        head = snapshot.get_object(elements[0]["id"])
+        attrs = {a["name"]: a["value"] for a in head["attributes"]}
+        second = snapshot.get_object(attrs["next"]["id"])
+        assert {a["name"]: a["value"] for a in second["attributes"]}["value"]["value"] == "2"
+
+        assert snapshot.get_string_contents(elements[1]["id"], 396, 10) == "text"
+        pairs = snapshot.get_dict_entries(elements[2]["id"], 0, 1)
+        assert pairs[0]["key"]["content"] == "key"
+        assert len(snapshot.get_value(pairs[0]["value"]["id"])["elements"]) == 2
+
+        with pytest.raises(ValueError):
+            snapshot.get_value("1")
+
+    truncated = memviz_get_variables_info.export_snapshot(path, __file__, max_frames=1, max_objects=2)
+    assert truncated.truncated is True
+
+
+def load_gdb_snapshot_writer():
+    """Loads the snapshot constants and writer of the gdb backend, which cannot be imported without gdb."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "gdb", "gdb_script.py")
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    nodes = [
+        node for node in tree.body
+        if (isinstance(node, ast.Assign) and node.targets[0].id.startswith("SNAPSHOT_"))
+        or (isinstance(node, ast.FunctionDef) and node.name == "write_snapshot_file")
+    ]
+    namespace = {"json": json, "os": os, "struct": struct, **vars(typing)}
+    exec(compile(ast.Module(body=nodes, type_ignores=[]), path, "exec"), namespace)
+    return namespace
+
+
+@pytest.mark.parametrize("backend", ["debugpy", "gdb"])
+def test_snapshot_file_round_trip(tmp_path, backend):
+    """Test that a file written by each backend is read back by snapshot_reader."""
+    if backend == "gdb":
+        writer = load_gdb_snapshot_writer()
+        assert writer["SNAPSHOT_MAGIC"] == snapshot_reader.SNAPSHOT_MAGIC
+        assert writer["SNAPSHOT_VERSION"] == snapshot_reader.SNAPSHOT_VERSION
+        assert writer["SNAPSHOT_HEADER"].format == snapshot_reader.SNAPSHOT_HEADER.format
+        assert writer["SNAPSHOT_INDEX_ENTRY"].format == snapshot_reader.SNAPSHOT_INDEX_ENTRY.format
+        write_snapshot_file = writer["write_snapshot_file"]
+    else:
+        module = memviz_get_variables_info
+        assert module.SNAPSHOT_MAGIC == snapshot_reader.SNAPSHOT_MAGIC
+        assert module.SNAPSHOT_VERSION == snapshot_reader.SNAPSHOT_VERSION
+        assert module.SNAPSHOT_HEADER_FORMAT == snapshot_reader.SNAPSHOT_HEADER.format
+        assert module.SNAPSHOT_INDEX_ENTRY_FORMAT == snapshot_reader.SNAPSHOT_INDEX_ENTRY.format
+        write_snapshot_file = module.write_snapshot_file
+
+    path = str(tmp_path / "snapshot.bin")
+    entries = [(300, b"third"), (100, b"first entry"), (200, b"")]
+    size = write_snapshot_file(path, iter(entries), lambda: {"backend": backend, "count": 3})
+    assert size == os.path.getsize(path)
+
+    with snapshot_reader.Snapshot(path) as snapshot:
+        assert snapshot.entry_count() == 3
+        assert snapshot.manifest == {"backend": backend, "count": 3}
+        assert bytes(snapshot.get_entry(snapshot.find_entry(100))) == b"first entry"
+        assert bytes(snapshot.get_entry(snapshot.find_entry(300))) == b"third"
+        assert bytes(snapshot.get_entry(snapshot.find_entry(200))) == b""
+        assert snapshot.find_entry(150) is None
+        assert snapshot.find_containing_entry(110) == snapshot.find_entry(100)
+        assert snapshot.find_containing_entry(303) == snapshot.find_entry(300)
+        assert snapshot.find_containing_entry(320) is None
+
+    def failing_entries():
+        yield (1, b"partial")
+        raise RuntimeError("target detached")
+
+    with pytest.raises(RuntimeError):
+        write_snapshot_file(path, failing_entries(), lambda: {})
+    # The previous snapshot is kept and no temporary file is left behind
+    assert os.listdir(tmp_path) == ["snapshot.bin"]
+    with snapshot_reader.Snapshot(path) as snapshot:
+        assert snapshot.entry_count() == 3
+
+
+def test_heap_diff():
+    """Test that objects created and freed between two marks are reported."""
+
+    class Leaked:
+        def __repr__(self):
+            raise AssertionError("Error messages must not format new objects")
+
+    class Freed:
+        pass
+
+    freed = [Freed() for _ in range(3)]
+    mark = memviz_get_variables_info.mark_heap()
+    assert mark.object_count > 0
+
+    leaked = [Leaked() for _ in range(5)]
+    del freed
+
+    type_name = f"{__name__}.test_heap_diff.<locals>.Leaked"
+    diff = unwrap_response(
+        memviz_get_variables_info.try_run(
+            lambda: memviz_get_variables_info.diff_heap(mark.mark, type_name, 0, 2)
+        )
+    )
+    types = {t["type_name"]: t for t in diff["types"]}
+    assert types[type_name]["count_delta"] == 5
+    assert types[type_name]["new_count"] == 5
+    assert types[type_name]["byte_delta"] > 0
+    freed_type = types[f"{__name__}.test_heap_diff.<locals>.Freed"]
+    assert (freed_type["count_delta"], freed_type["new_count"], freed_type["freed_count"]) == (-3, 0, 3)
+
+    assert diff["new_object_count"] == 5
+    assert len(diff["new_objects"]) == 2
+    # New objects can be inspected by their ids
+    ids = {str(id(obj)) for obj in leaked}
+    for value in diff["new_objects"]:
+        assert value["id"] in ids
+        assert memviz_get_variables_info.get_object(value["id"]).type_name == "Leaked"
+
+    last_page = memviz_get_variables_info.diff_heap(mark.mark, type_name, 4, 2)
+    assert len(last_page.new_objects) == 1
+    error = unwrap_error(
+        memviz_get_variables_info.try_run(
+            lambda: memviz_get_variables_info.diff_heap(mark.mark, type_name, 6, 2)
+        )
+    )
+    assert error == "Start_index 6 out of range [0, 5]."
+
+    memviz_get_variables_info.release_heap_mark(mark.mark)
+    assert "not found" in unwrap_error(
+        memviz_get_variables_info.try_run(lambda: memviz_get_variables_info.diff_heap(mark.mark))
+    )
+
+
+def test_referrers():
+    """Test that referrers are found with the names through which they refer to a value."""
+
+    class Holder:
+        pass
+
+    target = [1, 2]
+    holder = Holder()
+    holder.items = target
+    container = {"key": target}
+    pair = (0, target)
+
+    vars_map = get_variable_map(get_variables_at_current_line())
+    target_id = vars_map["target"]["id"]
+
+    result = unwrap_response(
+        memviz_get_variables_info.try_run(
+            lambda: memviz_get_variables_info.get_referrers(target_id, 50)
+        )
+    )
+    references = {(r["relation"], r["name"]): r["value"] for r in result["referrers"]}
+    assert references[("attribute", "items")]["id"] == vars_map["holder"]["id"]
+    assert references[("item", "key")]["id"] == vars_map["container"]["id"]
+    assert references[("element", "1")]["id"] == vars_map["pair"]["id"]
+    assert references[("local", "target")]["kind"] == "frame"
+    assert result["referrer_count"] >= 4
+
+    # The index is reused until the program stops again
+    index = memviz_get_variables_info.REFERRER_INDEX
+    limited = memviz_get_variables_info.get_referrers(target_id, 1)
+    assert memviz_get_variables_info.REFERRER_INDEX is index
+    assert len(limited.referrers) == 1
+    assert limited.referrer_count == result["referrer_count"]
+
+    # The index keeps referrers alive only until the program resumes
+    temporary = [Holder(), {"key": target, "sentinel": Holder()}]
+    temporary[0].items = target
+    memviz_get_variables_info.REFERRER_INDEX = None
+    referrers = memviz_get_variables_info.get_referrers(target_id, 50).referrers
+    assert {str(id(obj)) for obj in temporary} <= {r.value.id for r in referrers}
+    holder_ref = weakref.ref(temporary[0])
+    # Dicts do not support weak references, so a value of the dict is observed instead
+    sentinel_ref = weakref.ref(temporary[1]["sentinel"])
+    del referrers
+    temporary.clear()
+    assert holder_ref() is not None
+
+    memviz_get_variables_info.clear_id_map()
+    assert memviz_get_variables_info.REFERRER_INDEX is None
+    assert holder_ref() is None
+    assert sentinel_ref() is None
+
+
+def test_bootstrap_reuses_module():
+    """Test that init.py reuses a loaded module and resets its session state."""
+    init_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "init.py")
+    original = sys.modules["memviz_get_variables_info"]
+    try:
+        runpy.run_path(init_path)
+        module = sys.modules["memviz_get_variables_info"]
+        assert module is not original
+        assert module.get_bootstrap_info().reused is False
+
+        module.configure({"max_values": 1})
+        module.configure_history()
+        module.mark_heap()
+        module.IdMap.register("id", [1])
+
+        runpy.run_path(init_path)
+        assert sys.modules["memviz_get_variables_info"] is module
+        assert module.get_bootstrap_info().reused is True
+        assert module.LIMITS == module.Limits()
+        assert module.HISTORY is None
+        assert module.HEAP_MARKS == {}
+        with pytest.raises(ValueError):
+            module.IdMap.get("id")
+    finally:
+        sys.modules["memviz_get_variables_info"] = original
+
+
 def test_error_handling():
     """Test invalid IDs and out-of-bounds access."""
     # Invalid ID
@@ -0,0 +1,244 @@
+// Preload library that records heap allocation events into an in-process ring buffer.
+// GDB drains the pending records when the debugged program stops (or when the buffer becomes full),
+// which avoids stopping the program on every allocation.
+//
+// Build: cc -shared -fPIC -O2 alloc_shim.c -o memviz_alloc_shim.so -ldl
+// Usage: LD_PRELOAD=memviz_alloc_shim.so <program>
+#define _GNU_SOURCE
+#include <dlfcn.h>
+#include <execinfo.h>
+#include <sched.h>
+#include <stddef.h>
+#include <stdint.h>
+#include <string.h>
+
+// Keep in sync with gdb_script.py
+#define MEMVIZ_RING_MAGIC 0x7a69766d656dULL
+#define MEMVIZ_RING_CAPACITY 4096
+#define MEMVIZ_MAX_BACKTRACE 8
+
+enum {
+    MEMVIZ_MALLOC = 0,
+    MEMVIZ_CALLOC = 1,
+    MEMVIZ_REALLOC = 2,
+    MEMVIZ_FREE = 3,
+};
+
+typedef struct {
+    uint64_t kind;
+    uint64_t args[2];
+    uint64_t return_value;
+    uint64_t backtrace_length;
+    // Return addresses of the callers, the innermost caller is first
+    uint64_t backtrace[MEMVIZ_MAX_BACKTRACE];
+} memviz_alloc_record;
+
+typedef struct {
+    uint64_t magic;
+    uint64_t capacity;
+    // Set by GDB once it starts consuming the records
+    uint64_t enabled;
+    // Number of callers recorded for each allocation, set by GDB
+    uint64_t backtrace_depth;
+    // Total number of records written by the program
+    uint64_t head;
+    // Total number of records consumed by GDB
+    uint64_t tail;
+    // Number of records that were lost, either because they did not fit into the buffer
+    // or because they were made by a signal handler that interrupted recording
+    uint64_t dropped;
+    memviz_alloc_record records[MEMVIZ_RING_CAPACITY];
+} memviz_alloc_ring_t;
+
+__attribute__((visibility("default")))
+memviz_alloc_ring_t memviz_alloc_ring = {
+    .magic = MEMVIZ_RING_MAGIC,
+    .capacity = MEMVIZ_RING_CAPACITY,
+};
+
+// GDB places a breakpoint on this function to drain the ring buffer when it becomes full.
+__attribute__((visibility("default"), noinline))
+void memviz_alloc_ring_full(void) {
+    __asm__ volatile("" ::: "memory");
+}
+
+static int ring_lock = 0;
+
+// Set while the thread is recording, a signal handler that allocates then would wait for itself
+static __thread int recording = 0;
+
+typedef struct {
+    uint64_t length;
+    uint64_t frames[MEMVIZ_MAX_BACKTRACE];
+} memviz_backtrace;
+
+// backtrace() can allocate memory when it is called for the first time
+static __thread int capturing_backtrace = 0;
+
+// Has to be inlined into the allocation functions, so that their caller is the first captured frame
+#define CAPTURE_BACKTRACE(bt) capture_backtrace(&(bt), __builtin_return_address(0))
+
+static inline __attribute__((always_inline)) void capture_backtrace(memviz_backtrace* bt, void* caller) {
+    bt->frames[0] = (uint64_t) (uintptr_t) caller;
+    bt->length = 1;
+
+    uint64_t depth = __atomic_load_n(&memviz_alloc_ring.backtrace_depth, __ATOMIC_RELAXED);
+    if (depth > MEMVIZ_MAX_BACKTRACE) {
+        depth = MEMVIZ_MAX_BACKTRACE;
+    }
+    if (depth <= 1 || capturing_backtrace || !__atomic_load_n(&memviz_alloc_ring.enabled, __ATOMIC_RELAXED)) {
+        return;
+    }
+    capturing_backtrace = 1;
+    // The first frame belongs to the allocation function itself
+    void* frames[MEMVIZ_MAX_BACKTRACE + 1];
+    int count = backtrace(frames, (int) depth + 1);
+    for (int i = 1; i < count; i++) {
+        bt->frames[i - 1] = (uint64_t) (uintptr_t) frames[i];
+    }
+    if (count > 1) {
+        bt->length = (uint64_t) (count - 1);
+    }
+    capturing_backtrace = 0;
+}
+
+static void* (*real_malloc)(size_t) = NULL;
+static void* (*real_calloc)(size_t, size_t) = NULL;
+static void* (*real_realloc)(void*, size_t) = NULL;
+static void (*real_free)(void*) = NULL;
+
+// dlsym may allocate memory before the real allocator is resolved
+static char bootstrap_buffer[4096];
+static size_t bootstrap_used = 0;
+
+static int is_bootstrap_ptr(void* ptr) {
+    return (char*) ptr >= bootstrap_buffer && (char*) ptr < bootstrap_buffer + sizeof(bootstrap_buffer);
+}
+
+static void* bootstrap_alloc(size_t size) {
+    size = (size + 15) & ~((size_t) 15);
+    if (bootstrap_used + size > sizeof(bootstrap_buffer)) {
+        return NULL;
+    }
+    void* ptr = bootstrap_buffer + bootstrap_used;
+    bootstrap_used += size;
+    return ptr;
+}
+
+static void resolve_allocator(void) {
+    static int resolving = 0;
+    if (real_malloc != NULL || resolving) {
+        return;
+    }
+    resolving = 1;
+    real_calloc = dlsym(RTLD_NEXT, "calloc");
+    real_realloc = dlsym(RTLD_NEXT, "realloc");
+    real_free = dlsym(RTLD_NEXT, "free");
+    real_malloc = dlsym(RTLD_NEXT, "malloc");
+    resolving = 0;
+}
+
+static void record(uint64_t kind, uint64_t arg0, uint64_t arg1, void* return_value, const memviz_backtrace* bt) {
+    if (!__atomic_load_n(&memviz_alloc_ring.enabled, __ATOMIC_ACQUIRE)) {
+        return;
+    }
+    if (recording) {
+        // Only a signal handler can get here, the interrupted record still holds the lock
+        __atomic_fetch_add(&memviz_alloc_ring.dropped, 1, __ATOMIC_RELAXED);
+        return;
+    }
+    recording = 1;
+    // Other threads release the lock after writing a single record, so waiting for it cannot deadlock
+    while (__atomic_exchange_n(&ring_lock, 1, __ATOMIC_ACQUIRE)) {
+        sched_yield();
+    }
+
+    if (memviz_alloc_ring.head - memviz_alloc_ring.tail >= MEMVIZ_RING_CAPACITY) {
+        // GDB drains the buffer when this function is called
+        memviz_alloc_ring_full();
+    }
+    if (memviz_alloc_ring.head - memviz_alloc_ring.tail >= MEMVIZ_RING_CAPACITY) {
+        // Nobody has drained the buffer (e.g. GDB has detached)
+        __atomic_fetch_add(&memviz_alloc_ring.dropped, 1, __ATOMIC_RELAXED);
+    } else {
+        memviz_alloc_record* slot = &memviz_alloc_ring.records[memviz_alloc_ring.head % MEMVIZ_RING_CAPACITY];
+        slot->kind = kind;
+        slot->args[0] = arg0;
+        slot->args[1] = arg1;
+        slot->return_value = (uint64_t) (uintptr_t) return_value;
+        slot->backtrace_length = bt->length;
+        for (uint64_t i = 0; i < bt->length; i++) {
+            slot->backtrace[i] = bt->frames[i];
+        }
+        // GDB only reads records below head, so it has to be published after the record is written
+        __atomic_store_n(&memviz_alloc_ring.head, memviz_alloc_ring.head + 1, __ATOMIC_RELEASE);
+    }
+
+    __atomic_store_n(&ring_lock, 0, __ATOMIC_RELEASE);
+    recording = 0;
+}
+
+void* malloc(size_t size) {
+    resolve_allocator();
+    if (real_malloc == NULL) {
+        return bootstrap_alloc(size);
+    }
+    memviz_backtrace bt;
+    CAPTURE_BACKTRACE(bt);
+    void* ptr = real_malloc(size);
+    record(MEMVIZ_MALLOC, size, 0, ptr, &bt);
+    return ptr;
+}
+
+void* calloc(size_t count, size_t size) {
+    resolve_allocator();
+    if (real_calloc == NULL) {
+        // The bootstrap buffer is zero-initialized
+        return bootstrap_alloc(count * size);
+    }
+    memviz_backtrace bt;
+    CAPTURE_BACKTRACE(bt);
+    void* ptr = real_calloc(count, size);
+    record(MEMVIZ_CALLOC, count, size, ptr, &bt);
+    return ptr;
+}
+
+void* realloc(void* ptr, size_t size) {
+    resolve_allocator();
+    if (is_bootstrap_ptr(ptr) || (real_realloc == NULL && ptr == NULL)) {
+        // Bootstrap blocks cannot be resized, their data is moved to a new block.
+        // Their size is not known, so everything up to the end of the bootstrap buffer is copied.
+        void* new_ptr = real_malloc != NULL ? malloc(size) : bootstrap_alloc(size);
+        if (new_ptr != NULL && ptr != NULL) {
+            size_t available = (size_t) (bootstrap_buffer + sizeof(bootstrap_buffer) - (char*) ptr);
+            // A new bootstrap block can overlap the copied range
+            memmove(new_ptr, ptr, size < available ? size : available);
+        }
+        return new_ptr;
+    }
+    if (real_realloc == NULL) {
+        return NULL;
+    }
+    memviz_backtrace bt;
+    CAPTURE_BACKTRACE(bt);
+    void* new_ptr = real_realloc(ptr, size);
+    record(MEMVIZ_REALLOC, (uint64_t) (uintptr_t) ptr, size, new_ptr, &bt);
+    return new_ptr;
+}
+
+void free(void* ptr) {
+    if (ptr == NULL || is_bootstrap_ptr(ptr)) {
+        return;
+    }
+    resolve_allocator();
+    // Frees do not need a backtrace
+    memviz_backtrace bt = { .length = 1, .frames = { (uint64_t) (uintptr_t) __builtin_return_address(0) } };
+    if (real_free == NULL) {
+        // The block was not allocated by the real allocator, so it is leaked
+        // (like bootstrap blocks, which are never freed)
+        return;
+    }
+    // Record before freeing, so that a concurrent allocation of the same address is recorded after this event
+    record(MEMVIZ_FREE, (uint64_t) (uintptr_t) ptr, 0, NULL, &bt);
+    real_free(ptr);
+}
@@ -1,6 +1,18 @@
+import base64
+import bisect
+import collections
 import contextlib
+import hashlib
+import itertools
 import json
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import os
+import re
+import struct
+import subprocess
+import tempfile
+import zlib
+from array import array
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import gdb
 import dataclasses
 
@@ -218,93 +230,734 @@ class Place:
 class PlaceList:
     places: List[Place]
     types: List[Ty]
+    # True if some places were left out because of the value limit
+    truncated: bool = False
+
+
+class CorePlaceCache:
+    """
+    Caches places of frames of core dumps, which never change.
+    """
+    def __init__(self):
+        # (global thread number, frame index) -> (places, types)
+        self.entries: Dict[Tuple[int, int], Tuple[List[Place], List[Ty]]] = {}
+
+    def invalidate(self, *_args):
+        self.entries.clear()
+
+
+CORE_PLACE_CACHE = CorePlaceCache()
+gdb.events.new_objfile.connect(CORE_PLACE_CACHE.invalidate)
+gdb.events.clear_objfiles.connect(CORE_PLACE_CACHE.invalidate)
+gdb.events.exited.connect(CORE_PLACE_CACHE.invalidate)
 
 
 def get_frame_places(frame_index: int = 0, place_filter: Optional[Callable[[gdb.Symbol], bool]] = None) -> PlaceList:
-    interner = TypeInterner()
+    cache_key = None
+    if place_filter is None and is_core_inferior(gdb.selected_inferior()):
+        cache_key = (gdb.selected_thread().global_num, frame_index)
+
+    entry = CORE_PLACE_CACHE.entries.get(cache_key) if cache_key is not None else None
+    if entry is None:
+        interner = TypeInterner()
+        with activate_frame(frame_index) as frame:
+            places = collect_frame_places(frame, interner, place_filter)
+        entry = (places, interner.get_types())
+        if cache_key is not None:
+            CORE_PLACE_CACHE.entries[cache_key] = entry
+
+    (places, types) = entry
+    count = apply_limit(len(places), LIMITS.max_values)
+    return PlaceList(places=places[:count], types=types, truncated=count < len(places))
+
+
+def collect_frame_places(frame: gdb.Frame, interner: TypeInterner,
+                         place_filter: Optional[Callable[[gdb.Symbol], bool]] = None) -> List[Place]:
     places = []
     seen_names = set()
 
-    with activate_frame(frame_index) as frame:
-        sal = frame.find_sal()
-        current_line = sal.line
-        block = frame.block()
-        while block is not None:
-            if not block.is_valid():
-                break
-            is_local_block = not (block.is_global or block.is_static)
-            if not is_local_block:
-                break
+    sal = frame.find_sal()
+    current_line = sal.line
+    block = frame.block()
+    while block is not None:
+        if not block.is_valid():
+            break
+        is_local_block = not (block.is_global or block.is_static)
+        if not is_local_block:
+            break
+
+        for symbol in block:
+            if place_filter is not None and not place_filter(symbol):
+                continue
+            if not (symbol.is_variable or symbol.is_argument or symbol.is_constant):
+                continue
+
+            # We use >= instead of > because multiple statements can be on the same line
+            # E.g. for (int i = 0; i < ...; i++)
+            init = current_line >= symbol.line
+            name = symbol.name
+            is_shadowed = False
+
+            if is_local_block and symbol.is_variable:
+                is_shadowed = name in seen_names
+                seen_names.add(name)
+
+            kind = None
+            if symbol.is_argument:
+                kind = "p"
+            elif is_shadowed:
+                # Shadowed variable
+                kind = "s"
+            elif is_local_block:
+                kind = "v"
+            else:
+                kind = "g"
+
+            ty = make_type(symbol.type, interner)
+            value = symbol.value(frame)
+            address = value.address
+            if address is not None:
+                # Much faster than gdb.Value.format_string
+                address = format_address(int(address))
+
+            place = Place.create(
+                name=name,
+                address=address,
+                type=ty,
+                kind=kind,
+                init=init,
+                line=symbol.line,
+            )
+            places.append((place, (symbol.line, address or name or "")))
+        block = block.superblock
+    places = sorted(places, key=lambda v: v[1])
+    return [place for (place, _) in places]
+
+
+@dataclasses.dataclass
+class GlobalPlaceList:
+    places: List[Place]
+    types: List[Ty]
+    # Total number of global places that match the objfile filter
+    total: int
+    # True if the page was shortened because of the value limit
+    truncated: bool = False
+
+
+@dataclasses.dataclass(frozen=True)
+class GlobalSymbol:
+    name: str
+    type: gdb.Type
+    address: str
+    line: int
 
-            for symbol in block:
-                if place_filter is not None and not place_filter(symbol):
+
+class GlobalSymbolCache:
+    """
+    Caches global and static variables of each loaded objfile.
+    Only objfiles that were loaded since the last scan have their symbols looked up.
+    Names that are only declared in source files of already scanned objfiles are skipped.
+    """
+    # Declarations printed by `info variables`, e.g. "12:	static int values[10];"
+    DECLARATION_RE = re.compile(r"^(?:(\d+):)?\s*(.*);$")
+    # Name of a declared variable, either `name`, `name[N]` or a function pointer `(*name)(...)`
+    NAME_RE = re.compile(r"\(\s*\*+\s*(\w+)\s*\)\s*\(|(\w+)\s*(?:\[[^\]]*\]\s*)*$")
+
+    def __init__(self):
+        # Objfile filename -> its variables, None until the first scan
+        self.objfiles: Optional[Dict[str, List[GlobalSymbol]]] = None
+        # Filenames of objfiles loaded since the last scan
+        self.pending = set()
+        # Full path of a source file -> filename of the scanned objfile that it belongs to
+        self.source_files: Dict[str, str] = {}
+
+    def invalidate(self, *_args):
+        self.objfiles = None
+        self.pending.clear()
+        self.source_files.clear()
+
+    def add_objfile(self, event):
+        filename = self.get_owner(event.new_objfile).filename
+        if self.objfiles is not None:
+            self.forget_objfile(filename)
+            self.pending.add(filename)
+
+    def remove_objfile(self, event):
+        filename = self.get_owner(event.objfile).filename
+        if self.objfiles is not None:
+            self.forget_objfile(filename)
+            self.pending.discard(filename)
+
+    def forget_objfile(self, filename: str):
+        self.objfiles.pop(filename, None)
+        self.source_files = {
+            source: objfile for (source, objfile) in self.source_files.items() if objfile != filename
+        }
+
+    def get_objfiles(self) -> Dict[str, List[GlobalSymbol]]:
+        if self.objfiles is None:
+            self.objfiles = {}
+            self.scan(self.get_loaded_objfiles())
+        elif self.pending:
+            self.scan([objfile for objfile in self.get_loaded_objfiles() if objfile.filename in self.pending])
+        self.pending.clear()
+        return self.objfiles
+
+    @staticmethod
+    def get_owner(objfile: gdb.Objfile) -> gdb.Objfile:
+        # Separate debug info is stored in its own objfile, owned by the objfile of the binary
+        return objfile.owner or objfile
+
+    @staticmethod
+    def get_loaded_objfiles() -> List[gdb.Objfile]:
+        return [objfile for objfile in gdb.objfiles() if objfile.is_valid() and objfile.owner is None]
+
+    def scan(self, objfiles: List[gdb.Objfile]):
+        if not objfiles:
+            return
+        scanned: Dict[str, List[GlobalSymbol]] = {objfile.filename: [] for objfile in objfiles}
+        seen = set()
+        for (name, files) in self.get_declared_names().items():
+            # Declarations in source files of other objfiles are already cached
+            files = [file for file in files if file not in self.source_files]
+            if not files:
+                continue
+            for (objfile, symbol) in self.lookup_symbols(name, len(files), objfiles):
+                if symbol.symtab is not None:
+                    self.source_files[symbol.symtab.fullname()] = objfile.filename
+                if symbol.needs_frame or not symbol.is_variable:
+                    continue
+                try:
+                    address = symbol.value().address
+                except gdb.error:
+                    # E.g. thread-local variables without a running thread
                     continue
-                if not (symbol.is_variable or symbol.is_argument or symbol.is_constant):
+                if address is None:
                     continue
+                address = format_address(int(address))
+                if address in seen:
+                    continue
+                seen.add(address)
+                scanned[objfile.filename].append(GlobalSymbol(
+                    name=symbol.name,
+                    type=symbol.type,
+                    address=address,
+                    line=symbol.line
+                ))
+        for (filename, symbols) in scanned.items():
+            if symbols:
+                symbols.sort(key=lambda symbol: (symbol.name, symbol.address))
+                self.objfiles[filename] = symbols
+
+    def get_declared_names(self) -> Dict[str, List[str]]:
+        """
+        Returns the names of all global and static variables with the full paths of the files that declare them.
+        """
+        # GDB does not expose the symtabs of an objfile to Python, so the
+        # variable names are found using `info variables` and then looked up as symbols.
+        # Full paths are printed, so that they can be compared with `Symtab.fullname()`
+        output = gdb.execute("with filename-display absolute -- info variables -q -n", to_string=True) or ""
+        names: Dict[str, List[str]] = collections.defaultdict(list)
+        filename = None
+        for line in output.splitlines():
+            if line.startswith("File ") and line.endswith(":"):
+                filename = line[len("File "):-1]
+                continue
+            match = self.DECLARATION_RE.match(line.strip())
+            if filename is None or match is None:
+                continue
+            name_match = self.NAME_RE.search(match.group(2))
+            if name_match is not None:
+                names[name_match.group(1) or name_match.group(2)].append(filename)
+        return names
+
+    def lookup_symbols(self, name: str, file_count: int,
+                       objfiles: List[gdb.Objfile]) -> List[Tuple[gdb.Objfile, gdb.Symbol]]:
+        """
+        Finds the variables called `name` in the given objfiles, without searching other objfiles.
+        `file_count` is the number of source files that declare the name and do not belong
+        to already scanned objfiles.
+        """
+        global_symbols = []
+        static_symbols = []
+        for objfile in objfiles:
+            symbol = objfile.lookup_global_symbol(name)
+            if symbol is not None:
+                global_symbols.append((objfile, symbol))
+            symbol = objfile.lookup_static_symbol(name)
+            if symbol is not None:
+                static_symbols.append((objfile, symbol))
+        if not static_symbols or len(global_symbols) + len(static_symbols) >= file_count:
+            return global_symbols + static_symbols
+
+        # An objfile only returns the first of several static variables with the same name,
+        # so all of them are looked up, which searches every objfile
+        owners = {objfile.filename: objfile for objfile in objfiles}
+        static_symbols = []
+        for symbol in gdb.lookup_static_symbols(name):
+            if symbol.symtab is None:
+                continue
+            objfile = owners.get(self.get_owner(symbol.symtab.objfile).filename)
+            if objfile is not None:
+                static_symbols.append((objfile, symbol))
+        return global_symbols + static_symbols
 
-                # We use >= instead of > because multiple statements can be on the same line
-                # E.g. for (int i = 0; i < ...; i++)
-                init = current_line >= symbol.line
-                name = symbol.name
-                is_shadowed = False
-
-                if is_local_block and symbol.is_variable:
-                    is_shadowed = name in seen_names
-                    seen_names.add(name)
-
-                kind = None
-                if symbol.is_argument:
-                    kind = "p"
-                elif is_shadowed:
-                    # Shadowed variable
-                    kind = "s"
-                elif is_local_block:
-                    kind = "v"
-                else:
-                    kind = "g"
 
-                ty = make_type(symbol.type, interner)
-                value = symbol.value(frame)
-                address = value.address
-                if address is not None:
-                    address = get_pointer_from_value(address)
+GLOBAL_SYMBOL_CACHE = GlobalSymbolCache()
+gdb.events.new_objfile.connect(GLOBAL_SYMBOL_CACHE.add_objfile)
+gdb.events.clear_objfiles.connect(GLOBAL_SYMBOL_CACHE.invalidate)
+if hasattr(gdb.events, "free_objfile"):
+    # Only available since GDB 14
+    gdb.events.free_objfile.connect(GLOBAL_SYMBOL_CACHE.remove_objfile)
+gdb.events.exited.connect(GLOBAL_SYMBOL_CACHE.invalidate)
 
-                place = Place.create(
-                    name=name,
-                    address=address,
-                    type=ty,
-                    kind=kind,
-                    init=init,
-                    line=symbol.line,
-                )
-                places.append((place, (symbol.line, address or name or "")))
-            block = block.superblock
-    places = sorted(places, key=lambda v: v[1])
-    places = [place for (place, _) in places]
-    return PlaceList(places=places, types=interner.get_types())
 
+def get_global_places(objfile_filter: Optional[str] = None, start: int = 0, count: int = 100) -> GlobalPlaceList:
+    """
+    Returns a page of global and static variables of objfiles whose path contains `objfile_filter`.
+    """
+    symbols = []
+    for (objfile, objfile_symbols) in sorted(GLOBAL_SYMBOL_CACHE.get_objfiles().items()):
+        if objfile_filter is None or objfile_filter in objfile:
+            symbols.extend(objfile_symbols)
 
-def get_stack_address_range() -> Optional[Tuple[str, str]]:
-    pid = gdb.selected_inferior().pid
-    with open(f"/proc/{pid}/maps") as f:
-        for line in f:
-            f = line.strip()
-            parts = f.split()
-            if len(parts) < 6:
+    limited_count = apply_limit(count, LIMITS.max_values)
+    interner = TypeInterner()
+    places = []
+    for symbol in symbols[start:start + limited_count]:
+        places.append(Place.create(
+            name=symbol.name,
+            address=symbol.address,
+            type=make_type(symbol.type, interner),
+            kind="g",
+            init=True,
+            line=symbol.line,
+        ))
+    return GlobalPlaceList(
+        places=places,
+        types=interner.get_types(),
+        total=len(symbols),
+        truncated=limited_count < count and start + limited_count < len(symbols)
+    )
+
+
+@dataclasses.dataclass
+class FrameSnapshot:
+    name: Optional[str]
+    pc: str
+    file: Optional[str]
+    line: Optional[int]
+    places: List[Place]
+
+
+@dataclasses.dataclass
+class ThreadSnapshot:
+    # Number of the inferior
+    inferior: int
+    # Per-inferior thread number
+    num: int
+    global_num: int
+    # Thread id of the operating system
+    tid: int
+    name: Optional[str]
+    stack_range: Optional[Tuple[str, str]]
+    # The newest frame is first
+    frames: List[FrameSnapshot]
+    error: Optional[str] = None
+    stack_pointer: Optional[str] = None
+
+
+@dataclasses.dataclass
+class ThreadsSnapshot:
+    threads: List[ThreadSnapshot]
+    # Types shared by places of all frames
+    types: List[Ty]
+    # True if some places were left out because of the value limit
+    truncated: bool = False
+
+
+def get_threads_snapshot(max_frames: int = 5) -> ThreadsSnapshot:
+    """
+    Captures places of the `max_frames` newest frames of every thread of every inferior.
+    The originally selected thread and frame are selected again afterwards.
+    """
+    interner = TypeInterner()
+    threads = []
+
+    selected_thread = gdb.selected_thread()
+    selected_frame = gdb.selected_frame() if selected_thread is not None else None
+    try:
+        for inferior in gdb.inferiors():
+            if inferior.pid == 0:
                 continue
-            location = parts[5].strip()
-            if location == "[stack]":
-                range = parts[0].split("-")
-                if len(range) == 2:
-                    return (f"0x{range[0]}", f"0x{range[1]}")
+            for thread in sorted(inferior.threads(), key=lambda thread: thread.num):
+                threads.append(snapshot_thread(inferior, thread, max_frames, interner))
+    finally:
+        if selected_thread is not None and selected_thread.is_valid():
+            selected_thread.switch()
+            if selected_frame is not None and selected_frame.is_valid():
+                selected_frame.select()
+
+    truncated = False
+    remaining = LIMITS.max_values
+    if remaining is not None:
+        # Newer frames are more relevant, so the limit is applied to each thread's frames in order
+        for frame in (frame for thread in threads for frame in thread.frames):
+            if len(frame.places) > remaining:
+                frame.places = frame.places[:remaining]
+                truncated = True
+            remaining -= len(frame.places)
+    return ThreadsSnapshot(threads=threads, types=interner.get_types(), truncated=truncated)
+
+
+def snapshot_thread(inferior: gdb.Inferior, thread: gdb.InferiorThread, max_frames: int,
+                    interner: TypeInterner) -> ThreadSnapshot:
+    snapshot = ThreadSnapshot(
+        inferior=inferior.num,
+        num=thread.num,
+        global_num=thread.global_num,
+        tid=thread.ptid[1],
+        name=thread.name,
+        stack_range=None,
+        frames=[]
+    )
+    if thread.is_running() or thread.is_exited():
+        snapshot.error = "Thread is not stopped"
+        return snapshot
+
+    try:
+        thread.switch()
+        frame = gdb.newest_frame()
+
+        # The stack of a thread is the memory region that contains its stack pointer
+        stack_pointer = int(frame.read_register("sp"))
+        snapshot.stack_pointer = format_address(stack_pointer)
+        regions = MEMORY_REGION_CACHE.get_index(inferior.pid)
+        region = regions.find_region(stack_pointer)
+        if region is not None:
+            region = regions.regions[region]
+            snapshot.stack_range = (region.start, region.end)
+
+        while frame is not None and len(snapshot.frames) < max_frames:
+            sal = frame.find_sal()
+            try:
+                places = collect_frame_places(frame, interner)
+            except RuntimeError:
+                # Frame without debug info
+                places = []
+            snapshot.frames.append(FrameSnapshot(
+                name=frame.name(),
+                pc=format_address(frame.pc()),
+                file=sal.symtab.filename if sal.symtab is not None else None,
+                line=sal.line if sal.symtab is not None else None,
+                places=places
+            ))
+            frame = frame.older()
+    except gdb.error as e:
+        snapshot.error = str(e)
+    return snapshot
+
+
+### MEMORY REGIONS ###
+
+@dataclasses.dataclass(frozen=True)
+class MemoryRegion:
+    start: str
+    end: str
+    # E.g. "rw-p"
+    permissions: str
+    # "heap", "stack", "file", "anonymous" or "special" (e.g. [vdso])
+    kind: str
+    # Path of the mapped file or name of the special region (e.g. "[vdso]")
+    path: Optional[str]
+
+
+@dataclasses.dataclass
+class AddressClassification:
+    regions: List[MemoryRegion]
+    # Index into `regions` for each classified address (None if it is not mapped)
+    indices: List[Optional[int]]
+
+
+class MemoryRegionIndex:
+    """
+    Sorted memory mappings of a process, supports O(log n) lookup of the region of an address.
+    """
+    def __init__(self, regions: List[Tuple[int, int, MemoryRegion]]):
+        regions.sort(key=lambda region: region[0])
+        self.starts = [start for (start, _, _) in regions]
+        self.ends = [end for (_, end, _) in regions]
+        self.regions = [region for (_, _, region) in regions]
+
+    def find_region(self, address: int) -> Optional[int]:
+        index = bisect.bisect_right(self.starts, address) - 1
+        if index >= 0 and address < self.ends[index]:
+            return index
+        return None
+
+    @staticmethod
+    def parse_maps(content: str) -> "MemoryRegionIndex":
+        regions = []
+        for line in content.splitlines():
+            parts = line.split(maxsplit=5)
+            if len(parts) < 5:
+                continue
+            bounds = parts[0].split("-")
+            if len(bounds) != 2:
+                continue
+            path = parts[5].strip() if len(parts) == 6 else None
+            if path is None:
+                kind = "anonymous"
+            elif path == "[heap]":
+                kind = "heap"
+            elif path == "[stack]" or path.startswith("[stack:"):
+                kind = "stack"
+            elif path.startswith("["):
+                kind = "special"
+            else:
+                kind = "file"
+            (start, end) = (int(bounds[0], 16), int(bounds[1], 16))
+            regions.append((start, end, MemoryRegion(
+                start=format_address(start),
+                end=format_address(end),
+                permissions=parts[1],
+                kind=kind,
+                path=path
+            )))
+        return MemoryRegionIndex(regions)
+
+
+class MemoryRegionCache:
+    """
+    Caches the parsed memory mappings of the debugged processes.
+    The maps file is only read again after the process has been resumed, and it is
+    only parsed again if its content has changed.
+    Mappings of core dumps are only read once.
+    """
+    def __init__(self):
+        # pid -> (maps content, index)
+        self.entries: Dict[int, Tuple[str, MemoryRegionIndex]] = {}
+        # Processes that might have changed their mappings since they were read
+        self.dirty_pids = set()
+
+    def mark_dirty(self, *_args):
+        self.dirty_pids.update(self.entries.keys())
+
+    def invalidate(self, *_args):
+        self.entries.clear()
+        self.dirty_pids.clear()
+
+    def get_index(self, pid: Optional[int] = None) -> MemoryRegionIndex:
+        if pid is None:
+            pid = gdb.selected_inferior().pid
+        entry = self.entries.get(pid)
+        if entry is None or pid in self.dirty_pids:
+            content = read_process_maps(pid)
+            if entry is None or content != entry[0]:
+                entry = (content, MemoryRegionIndex.parse_maps(content))
+                self.entries[pid] = entry
+            self.dirty_pids.discard(pid)
+        return entry[1]
+
+
+MEMORY_REGION_CACHE = MemoryRegionCache()
+gdb.events.cont.connect(MEMORY_REGION_CACHE.mark_dirty)
+gdb.events.new_objfile.connect(MEMORY_REGION_CACHE.invalidate)
+gdb.events.clear_objfiles.connect(MEMORY_REGION_CACHE.invalidate)
+gdb.events.exited.connect(MEMORY_REGION_CACHE.invalidate)
+
+
+def read_process_maps(pid: int) -> str:
+    """
+    Returns the memory mappings of the inferior with the given pid in the format of `/proc/<pid>/maps`.
+    Core dumps and processes whose maps file cannot be read (e.g. remote ones) are described by GDB.
+    """
+    inferior = next((inferior for inferior in gdb.inferiors() if inferior.pid == pid), None)
+    if inferior is not None and is_core_inferior(inferior):
+        return make_core_maps(inferior)
+    try:
+        with open(f"/proc/{pid}/maps") as f:
+            return f.read()
+    except OSError:
+        return format_maps(read_gdb_mappings())
+
+
+def get_memory_regions() -> List[MemoryRegion]:
+    return MEMORY_REGION_CACHE.get_index().regions
+
+
+def classify_addresses(addresses: List[Union[str, int]]) -> AddressClassification:
+    """
+    Finds the memory region of each address.
+    """
+    index = MEMORY_REGION_CACHE.get_index()
+    return AddressClassification(
+        regions=index.regions,
+        indices=[index.find_region(parse_address(address)) for address in addresses]
+    )
+
+
+def get_stack_address_range() -> Optional[Tuple[str, str]]:
+    for region in MEMORY_REGION_CACHE.get_index().regions:
+        # Stack of the main thread
+        if region.path == "[stack]":
+            return (region.start, region.end)
     return None
 
 
+### CORE DUMPS ###
+
+# Row of `info proc mappings`: start, end, size, offset, permissions (GDB 12+), path
+GDB_MAPPING_PATTERN = re.compile(
+    r"^\s*(0x[0-9a-fA-F]+)\s+(0x[0-9a-fA-F]+)\s+0x[0-9a-fA-F]+\s+(0x[0-9a-fA-F]+)"
+    r"(?:\s+([r-][w-][x-][ps-]))?(?:\s+(.*?))?\s*$"
+)
+# Row of `maint info sections` that describes a segment of a core dump (e.g. "load1" or "load2a")
+CORE_SEGMENT_PATTERN = re.compile(
+    r"(0x[0-9a-fA-F]+)->(0x[0-9a-fA-F]+) at 0x[0-9a-fA-F]+: (load\d+[a-z]?)\b(.*)$"
+)
+
+
+@dataclasses.dataclass
+class Mapping:
+    start: int
+    end: int
+    offset: int
+    permissions: str
+    path: Optional[str]
+
+
+def is_core_inferior(inferior: gdb.Inferior) -> bool:
+    connection = getattr(inferior, "connection", None)
+    if connection is not None:
+        return connection.type == "core"
+    if not hasattr(gdb.Inferior, "connection"):
+        # GDB older than 11
+        return inferior.pid != 0 and "core dump file" in gdb.execute("info target", to_string=True)
+    return False
+
+
+def read_gdb_mappings() -> List[Mapping]:
+    """
+    Reads mappings of the selected inferior from `info proc mappings`.
+    For core dumps, only file-backed mappings are known and their permissions might be missing.
+    """
+    try:
+        output = gdb.execute("info proc mappings", to_string=True)
+    except gdb.error:
+        return []
+    mappings = []
+    for line in output.splitlines():
+        match = GDB_MAPPING_PATTERN.match(line)
+        if match is None:
+            continue
+        mappings.append(Mapping(
+            start=int(match.group(1), 16),
+            end=int(match.group(2), 16),
+            offset=int(match.group(3), 16),
+            permissions=match.group(4) or "r--p",
+            path=match.group(5) or None
+        ))
+    return mappings
+
+
+def read_core_segments() -> List[Mapping]:
+    """
+    Reads the memory segments stored in the loaded core dump.
+    """
+    segments = []
+    for line in gdb.execute("maint info sections", to_string=True).splitlines():
+        match = CORE_SEGMENT_PATTERN.search(line)
+        if match is None:
+            continue
+        flags = match.group(4).split()
+        permissions = "r" + ("-" if "READONLY" in flags else "w") + ("x" if "CODE" in flags else "-") + "p"
+        segments.append(Mapping(
+            start=int(match.group(1), 16),
+            end=int(match.group(2), 16),
+            offset=0,
+            permissions=permissions,
+            path=None
+        ))
+    return segments
+
+
+def find_main_stack_pointer(inferior: gdb.Inferior) -> Optional[int]:
+    threads = sorted(inferior.threads(), key=lambda thread: thread.num)
+    if not threads:
+        return None
+    selected_thread = gdb.selected_thread()
+    selected_frame = gdb.selected_frame() if selected_thread is not None else None
+    try:
+        threads[0].switch()
+        return int(gdb.newest_frame().read_register("sp"))
+    except gdb.error:
+        return None
+    finally:
+        if selected_thread is not None and selected_thread.is_valid():
+            selected_thread.switch()
+            if selected_frame is not None and selected_frame.is_valid():
+                selected_frame.select()
+
+
+def make_core_maps(inferior: gdb.Inferior) -> str:
+    """
+    Describes the mappings of a core dump in the format of `/proc/<pid>/maps`.
+    File-backed mappings come from `info proc mappings`, the remaining (anonymous) ones
+    from the segments of the core dump.
+    Core dumps do not name the heap and the stack, so the first anonymous mapping after
+    the executable is assumed to be the heap and the mapping that contains the stack pointer
+    of the main thread is the stack.
+    """
+    mappings = read_gdb_mappings()
+    segments = read_core_segments()
+    segment_permissions = {segment.start: segment.permissions for segment in segments}
+    for mapping in mappings:
+        # Core dumps only store permissions of their segments
+        if mapping.start in segment_permissions:
+            mapping.permissions = segment_permissions[mapping.start]
+
+    file_index = MemoryRegionIndex([(mapping.start, mapping.end, None) for mapping in mappings])
+    anonymous = [segment for segment in segments if file_index.find_region(segment.start) is None]
+
+    executable = inferior.progspace.filename
+    if executable is not None:
+        executable = os.path.realpath(executable)
+        executable_end = max(
+            (mapping.end for mapping in mappings
+             if mapping.path is not None and os.path.realpath(mapping.path) == executable),
+            default=None
+        )
+        if executable_end is not None:
+            heap = next((segment for segment in anonymous
+                         if segment.start >= executable_end and "w" in segment.permissions), None)
+            if heap is not None:
+                heap.path = "[heap]"
+
+    stack_pointer = find_main_stack_pointer(inferior)
+    if stack_pointer is not None:
+        for segment in anonymous:
+            if segment.start <= stack_pointer < segment.end:
+                segment.path = "[stack]"
+    return format_maps(mappings + anonymous)
+
+
+def format_maps(mappings: List[Mapping]) -> str:
+    lines = []
+    for mapping in sorted(mappings, key=lambda mapping: mapping.start):
+        line = f"{mapping.start:x}-{mapping.end:x} {mapping.permissions} {mapping.offset:08x} 00:00 0"
+        if mapping.path is not None:
+            line += f" {mapping.path}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
 ### DYNAMIC ALLOCATION TRACKING ###
 
 @dataclasses.dataclass
 class TrackedFunction:
     name: str
+    arg_count: int
     track_ret_value: bool = True
 
 
@@ -313,33 +966,181 @@ class FunctionCallRecord:
     name: str
     args: List[Any]
     return_value: Optional[Any] = None
+    # Return addresses of the callers, the innermost caller is first
+    backtrace: Optional[List[str]] = None
+
+
+@dataclasses.dataclass
+class AllocRecordList:
+    records: List[FunctionCallRecord]
+    # Total number of allocation events that were lost, the heap is incomplete if it is not zero
+    dropped: int = 0
+
+
+# Return addresses of the callers of an allocation function, the innermost caller is first
+Backtrace = Tuple[int, ...]
+
+
+@dataclasses.dataclass(frozen=True)
+class HeapBlock:
+    address: str
+    size: int
+    # Address of the instruction that has called the allocation function
+    call_site: Optional[str]
+
+
+@dataclasses.dataclass
+class HeapBlockList:
+    blocks: List[HeapBlock]
+    # Number of frees of addresses that were not allocated (or were already freed)
+    invalid_frees: int
+    # True if some blocks were left out because of the value limit
+    truncated: bool = False
+
+
+class HeapIndex:
+    """
+    Index of live heap blocks ordered by their address.
+    Lookups of blocks by an address (or an address range) take O(log n).
+    """
+    def __init__(self):
+        self.addresses: List[int] = []
+        # address -> (size, backtrace)
+        self.blocks: Dict[int, Tuple[int, Backtrace]] = {}
+        # address -> sequence number of the allocation, which tells apart blocks
+        # that were allocated at the same address
+        self.sequence_numbers: Dict[int, int] = {}
+        self.allocation_count = 0
+        self.invalid_frees = 0
+        # backtrace -> [allocation count, allocated bytes], including freed blocks
+        self.allocation_stats: Dict[Backtrace, List[int]] = {}
+
+    def allocate(self, address: int, size: int, backtrace: Backtrace):
+        if address == 0:
+            # Failed allocation
+            return
+        if address not in self.blocks:
+            bisect.insort(self.addresses, address)
+        self.blocks[address] = (size, backtrace)
+        self.allocation_count += 1
+        self.sequence_numbers[address] = self.allocation_count
+
+        stats = self.allocation_stats.get(backtrace)
+        if stats is None:
+            stats = [0, 0]
+            self.allocation_stats[backtrace] = stats
+        stats[0] += 1
+        stats[1] += size
+
+    def free(self, address: int):
+        if address == 0:
+            return
+        if self.blocks.pop(address, None) is None:
+            self.invalid_frees += 1
+            return
+        del self.sequence_numbers[address]
+        index = bisect.bisect_left(self.addresses, address)
+        del self.addresses[index]
+
+    def apply_call(self, name: str, args: List[int], return_value: Optional[int], backtrace: Backtrace):
+        """
+        Updates the index with a finished call of an allocation function.
+        """
+        if name == "malloc":
+            self.allocate(return_value, args[0], backtrace)
+        elif name == "calloc":
+            self.allocate(return_value, args[0] * args[1], backtrace)
+        elif name == "realloc":
+            (address, size) = args
+            # realloc(ptr, 0) frees the block and returns NULL
+            if return_value != 0 or size == 0:
+                self.free(address)
+            # The block might have been moved to a different address
+            self.allocate(return_value, size, backtrace)
+        elif name == "free":
+            self.free(args[0])
+        else:
+            raise Exception(f"Unknown allocation function {name}")
+
+    def find_block(self, address: int) -> Optional[int]:
+        """
+        Returns the start address of the block that contains the given address.
+        """
+        index = bisect.bisect_right(self.addresses, address) - 1
+        if index < 0:
+            return None
+        start = self.addresses[index]
+        (size, _) = self.blocks[start]
+        if address < start + max(size, 1):
+            return start
+        return None
+
+    def get_blocks(self, start: int, end: int) -> List[int]:
+        """
+        Returns start addresses of blocks that overlap the range [start, end).
+        """
+        index = bisect.bisect_left(self.addresses, start)
+        containing = self.find_block(start)
+        if containing is not None and containing < start:
+            index -= 1
+        result = []
+        while index < len(self.addresses) and self.addresses[index] < end:
+            result.append(self.addresses[index])
+            index += 1
+        return result
+
+    def make_block(self, address: int) -> HeapBlock:
+        (size, backtrace) = self.blocks[address]
+        return HeapBlock(
+            address=format_address(address),
+            size=size,
+            call_site=format_address(backtrace[0]) if backtrace else None
+        )
 
 
 class AllocationTracker:
-    def __init__(self, fns: List[TrackedFunction]):
+    def __init__(self, fns: List[TrackedFunction], backtrace_depth: int):
         self.tracked_fns: List[Tuple[TrackedFunction, gdb.Breakpoint]] = []
         for fn in fns:
             bp = TrackedFnBreakpoint(self, fn, fn.name)
             self.tracked_fns.append((fn, bp))
 
+        self.backtrace_depth = backtrace_depth
         self.records: List[FunctionCallRecord] = []
+        # The program stops on every call, so no events are lost
+        self.dropped = 0
+        self.heap = HeapIndex()
 
     def handle_tracked_stop(self, fn: TrackedFunction) -> bool:
-        args = (gdb.execute("info args", to_string=True) or "").strip()
-        args = [arg.split(" = ")[1] for arg in args.splitlines(keepends=False)]
+        frame = gdb.selected_frame()
+        args = read_fn_args(frame, fn.arg_count)
+        # Frees are not attributed to call sites
+        backtrace = capture_backtrace(frame, self.backtrace_depth if fn.track_ret_value else 0)
 
         record = FunctionCallRecord(
             name=fn.name,
-            args=args,
-            return_value=None
+            args=[format_address(arg) for arg in args],
+            return_value=None,
+            backtrace=format_backtrace(backtrace)
         )
 
         self.records.append(record)
         if fn.track_ret_value:
-            RetValueBreakpoint(record, gdb.newest_frame())
+            RetValueBreakpoint(self, record, args, backtrace, gdb.newest_frame())
+        else:
+            self.heap.apply_call(fn.name, args, None, backtrace)
         # Do not stop at this breakpoint, continue execution
         return False
 
+    def handle_return(self, record: FunctionCallRecord, args: List[int],
+                      return_value: int, backtrace: Backtrace):
+        record.return_value = format_address(return_value)
+        self.heap.apply_call(record.name, args, return_value, backtrace)
+
+    def sync(self):
+        # The index is updated eagerly when the tracked functions are called
+        pass
+
     def take_records(self) -> List[FunctionCallRecord]:
         records = list(self.records)
         self.records = []
@@ -350,6 +1151,80 @@ class AllocationTracker:
             bp.delete()
 
 
+# Registers used to pass the first integer/pointer arguments of a function call
+ARGUMENT_REGISTERS = {
+    "i386:x86-64": ("rdi", "rsi", "rdx", "rcx", "r8", "r9"),
+    "aarch64": ("x0", "x1", "x2", "x3", "x4", "x5", "x6", "x7"),
+}
+# Registers used to return an integer/pointer value from a function call
+RETURN_REGISTERS = {
+    "i386:x86-64": "rax",
+    "aarch64": "x0",
+}
+
+
+def read_fn_args(frame: gdb.Frame, count: int) -> List[int]:
+    """
+    Reads the first `count` integer/pointer arguments of the function executing in `frame`.
+
+    If the function has debug info, the arguments are read from its symbols.
+    Otherwise (e.g. libc without debug symbols), they are read from the registers
+    prescribed by the calling convention. This only works at the function entry,
+    which is where breakpoints are placed for functions without debug info.
+    """
+    try:
+        block = frame.block()
+    except RuntimeError:
+        block = None
+    while block is not None and block.function is None:
+        block = block.superblock
+    if block is not None:
+        symbols = [symbol for symbol in block if symbol.is_argument]
+        if len(symbols) >= count:
+            return [int(symbol.value(frame)) for symbol in symbols[:count]]
+
+    arch = frame.architecture().name()
+    registers = ARGUMENT_REGISTERS.get(arch)
+    if registers is None:
+        raise Exception(f"Cannot read function arguments on architecture {arch}")
+    return [read_register_unsigned(frame, register) for register in registers[:count]]
+
+
+def capture_backtrace(frame: gdb.Frame, depth: int) -> Backtrace:
+    """
+    Returns the return addresses of (at most) `depth` callers of the function executing in `frame`.
+    """
+    pcs = []
+    frame = frame.older() if depth > 0 else None
+    while frame is not None and len(pcs) < depth:
+        pcs.append(frame.pc())
+        frame = frame.older()
+    return tuple(pcs)
+
+
+def format_backtrace(backtrace: Backtrace) -> Optional[List[str]]:
+    if not backtrace:
+        return None
+    return [format_address(pc) for pc in backtrace]
+
+
+def read_fn_return_value(frame: gdb.Frame) -> int:
+    """
+    Reads the integer/pointer return value of a function that has just returned to `frame`.
+    """
+    arch = frame.architecture().name()
+    register = RETURN_REGISTERS.get(arch)
+    if register is None:
+        raise Exception(f"Cannot read function return value on architecture {arch}")
+    return read_register_unsigned(frame, register)
+
+
+def read_register_unsigned(frame: gdb.Frame, register: str) -> int:
+    # Registers are read as signed integers, so they need to be masked
+    mask = (1 << (8 * gdb.lookup_type("void").pointer().sizeof)) - 1
+    return int(frame.read_register(register)) & mask
+
+
 class TrackedFnBreakpoint(gdb.Breakpoint):
     """
     Breakpoint that tracks a specific function.
@@ -368,36 +1243,1085 @@ class RetValueBreakpoint(gdb.FinishBreakpoint):
     Breakpoint that assigns the return value of a function
     to the corresponding function call record.
     """
-    def __init__(self, record: FunctionCallRecord,
-                 frame):
+    def __init__(self, tracker: AllocationTracker, record: FunctionCallRecord,
+                 args: List[int], backtrace: Backtrace, frame):
         super().__init__(frame=frame, internal=True)
+        self.tracker = tracker
         self.record = record
+        self.args = args
+        self.backtrace = backtrace
 
     def stop(self) -> bool:
         if self.return_value is not None:
-            self.record.return_value = get_pointer_from_value(self.return_value)
+            return_value = int(self.return_value)
+        else:
+            # The function does not have debug info
+            return_value = read_fn_return_value(gdb.selected_frame())
+        self.tracker.handle_return(self.record, self.args, return_value, self.backtrace)
         # Do not stop at this breakpoint, continue execution
         return False
 
 
-ALLOCATION_TRACKER: Optional[AllocationTracker] = None
+# The order has to match the record kinds of the preload allocation shim
+TRACKED_ALLOC_FUNCTIONS = (
+    TrackedFunction("malloc", arg_count=1),
+    TrackedFunction("calloc", arg_count=2),
+    TrackedFunction("realloc", arg_count=2),
+    TrackedFunction("free", arg_count=1, track_ret_value=False),
+)
+
+# Layout of the ring buffer of the preload allocation shim (see alloc_shim.c)
+ALLOC_RING_SYMBOL = "memviz_alloc_ring"
+ALLOC_RING_FULL_SYMBOL = "memviz_alloc_ring_full"
+ALLOC_RING_MAGIC = 0x7a69766d656d
+# magic, capacity, enabled, backtrace depth, head, tail, dropped
+ALLOC_RING_HEADER = struct.Struct("<7Q")
+ALLOC_RING_ENABLED_OFFSET = 16
+ALLOC_RING_BACKTRACE_DEPTH_OFFSET = 24
+ALLOC_RING_TAIL_OFFSET = 40
+ALLOC_RING_MAX_BACKTRACE = 8
+# kind, arg0, arg1, return value, backtrace length, backtrace
+ALLOC_RING_RECORD = struct.Struct(f"<{5 + ALLOC_RING_MAX_BACKTRACE}Q")
+
+
+class RingBufferAllocationTracker:
+    """
+    Tracks allocations recorded by the preload allocation shim into a ring buffer
+    inside the debugged process.
+    The program does not have to stop on every allocation, the ring buffer is
+    drained when the records are requested, or when it becomes full.
+    """
+    def __init__(self, address: int, backtrace_depth: int):
+        self.address = address
+        self.inferior = gdb.selected_inferior()
+
+        header = ALLOC_RING_HEADER.unpack(bytes(self.inferior.read_memory(address, ALLOC_RING_HEADER.size)))
+        (magic, capacity, _, _, _, _, _) = header
+        if magic != ALLOC_RING_MAGIC:
+            raise Exception(f"Invalid allocation ring buffer at {format_address(address)}")
+        self.capacity = capacity
+        self.dropped = 0
+        self.records: List[FunctionCallRecord] = []
+        self.heap = HeapIndex()
+
+        self.full_bp = RingFullBreakpoint(self)
+        self.write_u64(ALLOC_RING_BACKTRACE_DEPTH_OFFSET, min(backtrace_depth, ALLOC_RING_MAX_BACKTRACE))
+        self.write_u64(ALLOC_RING_ENABLED_OFFSET, 1)
+
+    def drain(self):
+        header = bytes(self.inferior.read_memory(self.address, ALLOC_RING_HEADER.size))
+        (_, _, _, _, head, tail, dropped) = ALLOC_RING_HEADER.unpack(header)
+        self.dropped = dropped
+        if head == tail:
+            return
+
+        # Read the pending records (at most two contiguous parts of the ring)
+        records_address = self.address + ALLOC_RING_HEADER.size
+        start = tail % self.capacity
+        count = head - tail
+        first_count = min(count, self.capacity - start)
+        memory = bytes(self.inferior.read_memory(
+            records_address + start * ALLOC_RING_RECORD.size,
+            first_count * ALLOC_RING_RECORD.size
+        ))
+        if first_count < count:
+            memory += bytes(self.inferior.read_memory(records_address, (count - first_count) * ALLOC_RING_RECORD.size))
+
+        for (kind, arg0, arg1, return_value, backtrace_length, *backtrace) in ALLOC_RING_RECORD.iter_unpack(memory):
+            fn = TRACKED_ALLOC_FUNCTIONS[kind]
+            args = [arg0, arg1][:fn.arg_count]
+            backtrace = tuple(backtrace[:backtrace_length]) if fn.track_ret_value else ()
+            self.records.append(FunctionCallRecord(
+                name=fn.name,
+                args=[format_address(arg) for arg in args],
+                return_value=format_address(return_value) if fn.track_ret_value else None,
+                backtrace=format_backtrace(backtrace)
+            ))
+            self.heap.apply_call(fn.name, args, return_value, backtrace)
+        self.write_u64(ALLOC_RING_TAIL_OFFSET, head)
+
+    def sync(self):
+        self.drain()
+
+    def take_records(self) -> List[FunctionCallRecord]:
+        self.drain()
+        records = self.records
+        self.records = []
+        return records
+
+    def write_u64(self, offset: int, value: int):
+        self.inferior.write_memory(self.address + offset, struct.pack("<Q", value))
+
+    def dispose(self):
+        self.full_bp.delete()
+        if self.inferior.is_valid() and self.inferior.pid != 0:
+            self.write_u64(ALLOC_RING_ENABLED_OFFSET, 0)
+
+
+class RingFullBreakpoint(gdb.Breakpoint):
+    """
+    Breakpoint that drains the allocation ring buffer once it becomes full.
+    """
+    def __init__(self, tracker: RingBufferAllocationTracker):
+        super().__init__(ALLOC_RING_FULL_SYMBOL, internal=True)
+        self.tracker = tracker
+
+    def stop(self) -> bool:
+        self.tracker.drain()
+        # Do not stop at this breakpoint, continue execution
+        return False
+
+
+def find_alloc_ring() -> Optional[int]:
+    """
+    Returns the address of the ring buffer of the preload allocation shim,
+    if the shim is loaded in the debugged process.
+    """
+    try:
+        return int(gdb.parse_and_eval(f"(unsigned long) &{ALLOC_RING_SYMBOL}"))
+    except gdb.error:
+        return None
+
+
+def prepare_alloc_shim() -> str:
+    """
+    Builds the preload allocation shim and configures GDB to preload it into the debugged program.
+    Has to be called before the program is started (e.g. from `setupCommands` of the launch configuration).
+    """
+    source_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alloc_shim.c")
+    with open(source_path, "rb") as f:
+        source_hash = hashlib.sha256(f.read()).hexdigest()[:16]
+
+    output_dir = os.path.join(tempfile.gettempdir(), "memviz")
+    os.makedirs(output_dir, exist_ok=True)
+    library_path = os.path.join(output_dir, f"memviz_alloc_shim-{source_hash}.so")
+    if not os.path.isfile(library_path):
+        tmp_path = f"{library_path}.{os.getpid()}"
+        subprocess.run(
+            ["cc", "-shared", "-fPIC", "-O2", source_path, "-o", tmp_path, "-ldl"],
+            check=True,
+            capture_output=True
+        )
+        os.replace(tmp_path, library_path)
+
+    # Libraries that the user already preloads are kept
+    preloaded = get_inferior_environment_variable("LD_PRELOAD")
+    libraries = [library for library in re.split(r"[: ]", preloaded or "") if library]
+    if library_path not in libraries:
+        libraries.append(library_path)
+    gdb.execute(f"set environment LD_PRELOAD {':'.join(libraries)}")
+    return library_path
 
 
-def configure_alloc_tracking():
+def get_inferior_environment_variable(name: str) -> Optional[str]:
+    """
+    Returns the value of an environment variable that will be passed to the debugged program.
+    """
+    output = gdb.execute(f"show environment {name}", to_string=True).strip()
+    prefix = f"{name} = "
+    if output.startswith(prefix):
+        return output[len(prefix):]
+    return None
+
+
+ALLOCATION_TRACKER: Optional[Union[AllocationTracker, RingBufferAllocationTracker]] = None
+
+
+def configure_alloc_tracking(engine: str = "auto", backtrace_depth: int = 1):
+    """
+    Starts tracking dynamic allocations.
+    For each allocation, return addresses of `backtrace_depth` callers are recorded
+    (0 disables call site capture).
+
+    Engines:
+    - "preload": reads allocation records from the preload allocation shim (see `prepare_alloc_shim`)
+    - "breakpoint": stops on every call of an allocation function
+    - "auto": uses "preload" if the shim is loaded in the debugged process, "breakpoint" otherwise
+    """
     global ALLOCATION_TRACKER
 
+    if is_core_inferior(gdb.selected_inferior()):
+        raise Exception("Dynamic allocations cannot be tracked in a core dump")
+
     if ALLOCATION_TRACKER is not None:
         ALLOCATION_TRACKER.dispose()
-    ALLOCATION_TRACKER = AllocationTracker([
-        TrackedFunction("malloc"),
-        TrackedFunction("calloc"),
-        TrackedFunction("realloc"),
-        TrackedFunction("free", track_ret_value=False),
-    ])
+        ALLOCATION_TRACKER = None
+    reset_heap_content_hashes()
+
+    if engine in ("auto", "preload"):
+        ring_address = find_alloc_ring()
+        if ring_address is not None:
+            ALLOCATION_TRACKER = RingBufferAllocationTracker(ring_address, backtrace_depth)
+            return
+        if engine == "preload":
+            raise Exception("Allocation shim is not loaded in the debugged process")
+    elif engine != "breakpoint":
+        raise Exception(f"Unknown allocation tracking engine {engine}")
+
+    ALLOCATION_TRACKER = AllocationTracker(list(TRACKED_ALLOC_FUNCTIONS), backtrace_depth)
+
+
+def take_alloc_records() -> AllocRecordList:
+    records = ALLOCATION_TRACKER.take_records()
+    return AllocRecordList(records=records, dropped=ALLOCATION_TRACKER.dropped)
+
+
+def get_heap_index() -> HeapIndex:
+    if ALLOCATION_TRACKER is None:
+        raise Exception("Dynamic allocation tracking is not enabled")
+    ALLOCATION_TRACKER.sync()
+    return ALLOCATION_TRACKER.heap
+
+
+def get_heap_blocks(start: Union[str, int] = 0, end: Optional[Union[str, int]] = None) -> HeapBlockList:
+    """
+    Returns live heap blocks that overlap the address range [start, end).
+    """
+    heap = get_heap_index()
+    start = parse_address(start)
+    end = parse_address(end) if end is not None else (1 << 64)
+    addresses = heap.get_blocks(start, end)
+    count = apply_limit(len(addresses), LIMITS.max_values)
+    return HeapBlockList(
+        blocks=[heap.make_block(address) for address in addresses[:count]],
+        invalid_frees=heap.invalid_frees,
+        truncated=count < len(addresses)
+    )
+
+
+def find_heap_block(address: Union[str, int]) -> Optional[HeapBlock]:
+    """
+    Returns the live heap block that contains the given address.
+    """
+    heap = get_heap_index()
+    block = heap.find_block(parse_address(address))
+    if block is None:
+        return None
+    return heap.make_block(block)
+
+
+@dataclasses.dataclass
+class HeapProfileEntry:
+    # Symbolized callers, the innermost caller is first
+    stack: List[str]
+    live_bytes: int
+    live_count: int
+    # Includes blocks that were already freed
+    allocated_bytes: int
+    allocated_count: int
+
+
+@dataclasses.dataclass
+class HeapProfile:
+    entries: List[HeapProfileEntry]
+    # Live bytes in the collapsed stack format used by flamegraph tools
+    # (one "outermost;...;innermost <bytes>" line per call site)
+    folded: str
+
+
+def get_heap_profile(limit: Optional[int] = None) -> HeapProfile:
+    """
+    Aggregates heap allocations per call site, sorted by the amount of live bytes.
+    Call sites are recorded based on the `backtrace_depth` passed to `configure_alloc_tracking`.
+    """
+    heap = get_heap_index()
+    live: Dict[Backtrace, List[int]] = {}
+    for (size, backtrace) in heap.blocks.values():
+        stats = live.get(backtrace)
+        if stats is None:
+            stats = [0, 0]
+            live[backtrace] = stats
+        stats[0] += 1
+        stats[1] += size
+
+    stats = []
+    for (backtrace, (allocated_count, allocated_bytes)) in heap.allocation_stats.items():
+        (live_count, live_bytes) = live.get(backtrace, (0, 0))
+        stats.append((backtrace, live_bytes, live_count, allocated_bytes, allocated_count))
+    stats.sort(key=lambda item: (item[1], item[3]), reverse=True)
+    if limit is not None:
+        stats = stats[:limit]
+
+    symbols: Dict[int, str] = {}
+    entries = []
+    for (backtrace, live_bytes, live_count, allocated_bytes, allocated_count) in stats:
+        stack = []
+        for pc in backtrace:
+            symbol = symbols.get(pc)
+            if symbol is None:
+                symbol = symbolize_pc(pc)
+                symbols[pc] = symbol
+            stack.append(symbol)
+        entries.append(HeapProfileEntry(
+            stack=stack or ["<unknown>"],
+            live_bytes=live_bytes,
+            live_count=live_count,
+            allocated_bytes=allocated_bytes,
+            allocated_count=allocated_count
+        ))
+
+    folded = "\n".join(
+        f"{';'.join(reversed(entry.stack))} {entry.live_bytes}"
+        for entry in entries if entry.live_bytes > 0
+    )
+    return HeapProfile(entries=entries, folded=folded)
+
+
+def symbolize_pc(pc: int) -> str:
+    """
+    Returns a human-readable description of a return address.
+    """
+    # Return addresses point after the call instruction
+    lookup_pc = pc - 1
+    try:
+        block = gdb.block_for_pc(lookup_pc)
+    except RuntimeError:
+        block = None
+    while block is not None and block.function is None:
+        block = block.superblock
+    if block is not None:
+        name = block.function.name
+    else:
+        # Code without debug info
+        library = gdb.current_progspace().solib_name(lookup_pc)
+        name = format_address(pc)
+        if library is not None:
+            name = f"{os.path.basename(library)}!{name}"
+
+    sal = gdb.find_pc_line(lookup_pc)
+    if sal.symtab is not None and sal.line > 0:
+        name = f"{name} ({os.path.basename(sal.symtab.filename)}:{sal.line})"
+    return name
+
+
+# Changed parts of heap blocks are reported in lines of this size (in bytes), which matches a cache line
+HEAP_LINE_SIZE = 64
+# Neighbouring heap blocks are read together if they are separated by at most this many bytes
+HEAP_READ_GAP = 256
+HEAP_READ_MAX_SIZE = 1024 * 1024
+
+
+@dataclasses.dataclass
+class ChangedRange:
+    # Offset from the start of the block
+    offset: int
+    # Raw bytes encoded in base64
+    data: str
+
+
+@dataclasses.dataclass
+class ChangedHeapBlock:
+    address: str
+    size: int
+    # True if the block was allocated after the previous comparison (even at the address
+    # of a block that was freed), in that case the whole block is returned
+    new: bool
+    ranges: List[ChangedRange]
+    error: Optional[str] = None
+
+
+@dataclasses.dataclass
+class HeapChanges:
+    blocks: List[ChangedHeapBlock]
+    # Blocks that were freed since the previous comparison
+    freed: List[str]
+    unchanged_count: int
+    # True if some changed blocks were left out because of the value limit,
+    # they will be returned by the next comparison
+    truncated: bool = False
+
+
+# Hashes of a heap block: (size, hash of the whole block, hash of each line)
+BlockHashes = Tuple[int, bytes, "array[int]"]
+
+
+class HeapContentHashes:
+    """
+    Hashes of contents of live heap blocks at the previous comparison.
+    The hash of the whole block is compared on every stop, hashes of its lines are only
+    compared when the block has changed.
+    Blocks are identified by the sequence numbers of their allocations, so a block that is
+    allocated at the address of a freed block is not compared with the freed one.
+    """
+    def __init__(self):
+        # sequence number of the allocation -> (address, hashes)
+        self.blocks: Dict[int, Tuple[int, BlockHashes]] = {}
+
+    def compare(self, sequence_number: int, address: int,
+                data: bytes) -> Optional[Tuple[ChangedHeapBlock, BlockHashes]]:
+        """
+        Returns the changes of the block and its new hashes, or None if it has not changed.
+        """
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        previous = self.blocks.get(sequence_number)
+        previous = previous[1] if previous is not None else None
+        if previous is not None and previous[0] == len(data) and previous[1] == digest:
+            return None
+
+        lines = array("I", [zlib.crc32(data[offset:offset + HEAP_LINE_SIZE])
+                            for offset in range(0, len(data), HEAP_LINE_SIZE)])
+        change = ChangedHeapBlock(address=format_address(address), size=len(data), new=previous is None
+                                  or previous[0] != len(data), ranges=[])
+        if not change.new:
+            # Consecutive changed lines are merged into a single range
+            ranges = []
+            for (index, (line, previous_line)) in enumerate(zip(lines, previous[2])):
+                if line == previous_line:
+                    continue
+                if ranges and ranges[-1][1] == index:
+                    ranges[-1][1] = index + 1
+                else:
+                    ranges.append([index, index + 1])
+            for (start, end) in ranges:
+                (start, end) = (start * HEAP_LINE_SIZE, end * HEAP_LINE_SIZE)
+                change.ranges.append(ChangedRange(offset=start, data=base64.b64encode(data[start:end]).decode("ascii")))
+        if not change.ranges:
+            # A new block, or a collision of the line hashes
+            change.ranges.append(ChangedRange(offset=0, data=base64.b64encode(data).decode("ascii")))
+        return (change, (len(data), digest, lines))
+
+
+HEAP_CONTENT_HASHES: Optional[HeapContentHashes] = None
+
+
+def reset_heap_content_hashes(*_args):
+    global HEAP_CONTENT_HASHES
+    HEAP_CONTENT_HASHES = None
+
+
+gdb.events.exited.connect(reset_heap_content_hashes)
+
+
+def read_heap_blocks(inferior: gdb.Inferior, heap: HeapIndex) -> Iterator[Tuple[int, Optional[bytes], Optional[str]]]:
+    """
+    Reads contents of all live heap blocks, returns (address, data, error) of each block.
+    Neighbouring blocks are read with a single read.
+    """
+    runs = []
+    for address in heap.addresses:
+        end = address + heap.blocks[address][0]
+        if runs and address - runs[-1][1] <= HEAP_READ_GAP and end - runs[-1][0] <= HEAP_READ_MAX_SIZE:
+            runs[-1][1] = max(runs[-1][1], end)
+            runs[-1][2].append(address)
+        else:
+            runs.append([address, end, [address]])
+
+    for (start, end, addresses) in runs:
+        try:
+            data = bytes(inferior.read_memory(start, end - start))
+        except gdb.MemoryError:
+            data = None
+        for address in addresses:
+            size = heap.blocks[address][0]
+            if data is not None:
+                yield (address, data[address - start:address - start + size], None)
+                continue
+            try:
+                yield (address, bytes(inferior.read_memory(address, size)), None)
+            except gdb.MemoryError as e:
+                yield (address, None, str(e))
+
+
+def get_changed_heap_blocks() -> HeapChanges:
+    """
+    Returns live heap blocks whose contents have changed since the previous call.
+    For blocks that existed before, only the changed lines are returned.
+    The first call returns all blocks.
+    Writes to the heap are not tracked, so all live blocks are read and hashed on every call.
+    """
+    global HEAP_CONTENT_HASHES
+
+    heap = get_heap_index()
+    if HEAP_CONTENT_HASHES is None:
+        HEAP_CONTENT_HASHES = HeapContentHashes()
+    hashes = HEAP_CONTENT_HASHES
+
+    freed = []
+    for (sequence_number, (address, _)) in list(hashes.blocks.items()):
+        if heap.sequence_numbers.get(address) != sequence_number:
+            freed.append(address)
+            del hashes.blocks[sequence_number]
+
+    changes = HeapChanges(blocks=[], freed=[format_address(address) for address in freed], unchanged_count=0)
+    max_blocks = LIMITS.max_values
+    for (address, data, error) in read_heap_blocks(gdb.selected_inferior(), heap):
+        sequence_number = heap.sequence_numbers[address]
+        if data is None:
+            result = (ChangedHeapBlock(address=format_address(address), size=heap.blocks[address][0], new=False,
+                                       ranges=[], error=error), None)
+        else:
+            result = hashes.compare(sequence_number, address, data)
+            if result is None:
+                changes.unchanged_count += 1
+                continue
+        if max_blocks is not None and len(changes.blocks) >= max_blocks:
+            # The hashes are not updated, so that the change is reported by the next call
+            changes.truncated = True
+            continue
+        (change, block_hashes) = result
+        changes.blocks.append(change)
+        if block_hashes is None:
+            hashes.blocks.pop(sequence_number, None)
+        else:
+            hashes.blocks[sequence_number] = (address, block_hashes)
+    return changes
+
+
+### POINTER GRAPH ###
+
+@dataclasses.dataclass
+class PointerEdge:
+    # Offset of the pointer within the source node (in bytes)
+    offset: int
+    target: str
+    # Memory region of the target ("null", "unmapped" or a `MemoryRegion` kind)
+    region: str
+
+
+@dataclasses.dataclass
+class PointerNode:
+    address: str
+    type: InternedType
+    # Raw bytes of the node, encoded in base64
+    data: Optional[str]
+    edges: List[PointerEdge]
+    error: Optional[str] = None
+
+
+@dataclasses.dataclass
+class PointerGraph:
+    nodes: List[PointerNode]
+    types: List[Ty]
+    # True if the walk was stopped because it has reached `max_nodes`
+    truncated: bool
+
+
+def get_pointer_fields(ty: InternedType, interner: TypeInterner, cache: Dict[InternedType, List[Tuple[int, TyPtr]]]) -> List[Tuple[int, TyPtr]]:
+    """
+    Returns (byte offset, pointer type) of all pointers contained in a value of the given type,
+    including pointers nested in struct fields and arrays.
+    """
+    fields = cache.get(ty)
+    if fields is not None:
+        return fields
+
+    fields = []
+    # Prevents infinite recursion, structs cannot contain themselves by value anyway
+    cache[ty] = fields
+    ty_data = interner.get_types()[ty]
+    if isinstance(ty_data, TyPtr):
+        fields.append((0, ty_data))
+    elif isinstance(ty_data, TyStruct):
+        for field in ty_data.fields:
+            for (offset, ptr) in get_pointer_fields(field.type, interner, cache):
+                fields.append((field.offset_bits // 8 + offset, ptr))
+    elif isinstance(ty_data, TyArray):
+        element_size = interner.get_types()[ty_data.type].size
+        element_fields = get_pointer_fields(ty_data.type, interner, cache)
+        if element_fields:
+            for index in range(ty_data.element_count):
+                for (offset, ptr) in element_fields:
+                    fields.append((index * element_size + offset, ptr))
+    return fields
+
+
+def is_walkable_type(ty: Ty) -> bool:
+    # Pointers to scalars (e.g. `char *`) usually point into buffers, which would be walked
+    # as many single-element nodes
+    return ty.size > 0 and isinstance(ty, (TyStruct, TyPtr))
+
+
+def get_byte_order() -> str:
+    """
+    Returns the byte order of the target ("little" or "big").
+    """
+    output = gdb.execute("show endian", to_string=True)
+    return "big" if "big endian" in output else "little"
+
+
+def walk_pointers(root_address: Union[str, int], type_ref: str, max_nodes: int = 1000) -> PointerGraph:
+    """
+    Follows pointers from a value of the type `type_ref` (e.g. "struct Node") located at `root_address`.
+    Returns all reachable values (up to `max_nodes`) with their raw bytes, so that linked data
+    structures can be loaded in a single request.
+    Only pointers to structs and to other pointers are followed.
+    """
+    max_nodes = apply_limit(max_nodes, LIMITS.max_values)
+    interner = TypeInterner()
+    root_type = make_type(lookup_type_by_name(type_ref), interner)
+    inferior = gdb.selected_inferior()
+    byte_order = get_byte_order()
+
+    heap = ALLOCATION_TRACKER.heap if ALLOCATION_TRACKER is not None else None
+    if ALLOCATION_TRACKER is not None:
+        ALLOCATION_TRACKER.sync()
+    regions = MEMORY_REGION_CACHE.get_index()
+
+    def classify(address: int) -> str:
+        if address == 0:
+            return "null"
+        # Blocks allocated by mmap are not located in the [heap] region
+        if heap is not None and heap.find_block(address) is not None:
+            return "heap"
+        region = regions.find_region(address)
+        if region is None:
+            return "unmapped"
+        return regions.regions[region].kind
+
+    pointer_fields: Dict[InternedType, List[Tuple[int, TyPtr]]] = {}
+    nodes = []
+    visited = set()
+    queue = collections.deque([(parse_address(root_address), root_type)])
+    truncated = False
+    while queue:
+        (address, ty) = queue.popleft()
+        if (address, ty) in visited:
+            continue
+        if len(nodes) >= max_nodes:
+            truncated = True
+            break
+        visited.add((address, ty))
+
+        size = interner.get_types()[ty].size
+        try:
+            data = bytes(inferior.read_memory(address, size))
+        except gdb.MemoryError as e:
+            nodes.append(PointerNode(address=format_address(address), type=ty, data=None, edges=[], error=str(e)))
+            continue
+
+        edges = []
+        for (offset, ptr) in get_pointer_fields(ty, interner, pointer_fields):
+            target = int.from_bytes(data[offset:offset + ptr.size], byte_order)
+            region = classify(target)
+            edges.append(PointerEdge(offset=offset, target=format_address(target), region=region))
+            if region not in ("null", "unmapped") and is_walkable_type(interner.get_types()[ptr.target]):
+                queue.append((target, ptr.target))
+        nodes.append(PointerNode(
+            address=format_address(address),
+            type=ty,
+            data=base64.b64encode(data).decode("ascii"),
+            edges=edges
+        ))
+    return PointerGraph(nodes=nodes, types=interner.get_types(), truncated=truncated)
+
+
+### MEMORY READS ###
+
+@dataclasses.dataclass
+class MemoryChunk:
+    address: str
+    # Raw bytes encoded in base64
+    data: Optional[str]
+    error: Optional[str] = None
+
+
+def read_memory_ranges(ranges: List[Tuple[Union[str, int], int]]) -> List[MemoryChunk]:
+    """
+    Reads several (address, size) ranges in a single request.
+    Works both for running processes and for core dumps, where memory that is not stored
+    in the core (e.g. read-only code) is read from the mapped files.
+    """
+    inferior = gdb.selected_inferior()
+    chunks = []
+    for (address, size) in ranges:
+        address = parse_address(address)
+        try:
+            data = base64.b64encode(bytes(inferior.read_memory(address, size))).decode("ascii")
+        except gdb.MemoryError as e:
+            chunks.append(MemoryChunk(address=format_address(address), data=None, error=str(e)))
+            continue
+        chunks.append(MemoryChunk(address=format_address(address), data=data))
+    return chunks
+
+
+# C strings are searched for their terminator in chunks that start at this size (in bytes)
+# and double with every read, without crossing a page boundary
+C_STRING_CHUNK_SIZE = 64
+PAGE_SIZE = 4096
+
+
+@dataclasses.dataclass
+class CString:
+    address: str
+    # Bytes before the terminator encoded in base64 (None if the string could not be read)
+    data: Optional[str]
+    length: int
+    # True if the terminator was not found within the maximum length
+    truncated: bool
+    error: Optional[str] = None
+
+
+def read_c_string(inferior: gdb.Inferior, address: int, max_length: int) -> CString:
+    data = b""
+    chunk_size = C_STRING_CHUNK_SIZE
+    position = address
+    while len(data) < max_length:
+        # A read that crosses into an unmapped page would fail even if the string ends before it
+        page_end = (position // PAGE_SIZE + 1) * PAGE_SIZE
+        size = min(chunk_size, page_end - position, max_length - len(data))
+        try:
+            chunk = bytes(inferior.read_memory(position, size))
+        except gdb.MemoryError as e:
+            if not data:
+                return CString(address=format_address(address), data=None, length=0, truncated=False, error=str(e))
+            # The string runs into unreadable memory before its terminator
+            return CString(address=format_address(address), data=base64.b64encode(data).decode("ascii"),
+                           length=len(data), truncated=True, error=str(e))
+        terminator = chunk.find(b"\0")
+        if terminator != -1:
+            data += chunk[:terminator]
+            return CString(address=format_address(address), data=base64.b64encode(data).decode("ascii"),
+                           length=len(data), truncated=False)
+        data += chunk
+        position += size
+        chunk_size *= 2
+    return CString(address=format_address(address), data=base64.b64encode(data).decode("ascii"),
+                   length=len(data), truncated=True)
+
+
+def read_c_strings(addresses: List[Union[str, int]], max_length: int = 1000) -> List[CString]:
+    """
+    Reads NUL-terminated strings from the given addresses in a single request.
+    At most `max_length` bytes of each string are read.
+    """
+    inferior = gdb.selected_inferior()
+    max_length = apply_limit(max_length, LIMITS.str_char_count)
+    # The same string is often referenced by several pointers
+    strings: Dict[int, CString] = {}
+    result = []
+    for address in addresses:
+        address = parse_address(address)
+        string = strings.get(address)
+        if string is None:
+            if address == 0:
+                string = CString(address=format_address(address), data=None, length=0, truncated=False,
+                                 error="Null pointer")
+            else:
+                string = read_c_string(inferior, address, max_length)
+            strings[address] = string
+        result.append(string)
+    return result
+
+
+### ARRAY SUMMARIES ###
+
+# Arrays are read from the debugged process in chunks of this size (in bytes)
+ARRAY_SUMMARY_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclasses.dataclass
+class ArrayElement:
+    index: int
+    # Scalars are formatted as strings, other values are raw bytes encoded in base64
+    value: str
+
+
+@dataclasses.dataclass
+class ArrayRun:
+    # Index of the first element of the run
+    start: int
+    length: int
+    value: str
+
+
+@dataclasses.dataclass
+class ArraySummary:
+    type: InternedType
+    types: List[Ty]
+    # Every `stride`-th element of the summarized range
+    samples: List[ArrayElement]
+    # Only available for scalar elements
+    min: Optional[str]
+    max: Optional[str]
+    # Stretches of at least `min_run_length` identical elements
+    runs: List[ArrayRun]
+    # True if there were more than `max_runs` runs
+    runs_truncated: bool
+    # True if some samples were left out because of the eager element limit
+    samples_truncated: bool = False
+
+
+def get_scalar_format(ty: Ty) -> Optional[str]:
+    """
+    Returns the `struct` format character of a scalar type, or None if it is not a scalar.
+    """
+    formats = {1: "b", 2: "h", 4: "i", 8: "q"}
+    if isinstance(ty, TyFloat):
+        return {4: "f", 8: "d"}.get(ty.size)
+    if isinstance(ty, (TyInt, TyEnum)):
+        fmt = formats.get(ty.size)
+        if fmt is not None and isinstance(ty, TyInt) and not ty.signed:
+            fmt = fmt.upper()
+        return fmt
+    if isinstance(ty, (TyBool, TyPtr)):
+        fmt = formats.get(ty.size)
+        return fmt.upper() if fmt is not None else None
+    return None
+
+
+def summarize_array(address: Union[str, int], type_ref: str, start: int, count: int, stride: int = 1,
+                    min_run_length: int = 16, max_runs: int = 1000) -> ArraySummary:
+    """
+    Summarizes `count` elements (starting at index `start`) of an array of `type_ref` elements located at `address`.
+    The elements are processed in GDB, so that huge arrays do not have to be transferred.
+    """
+    if stride < 1:
+        raise Exception(f"Invalid stride {stride}")
+
+    interner = TypeInterner()
+    element_type = make_type(lookup_type_by_name(type_ref), interner)
+    ty = interner.get_types()[element_type]
+    size = ty.size
+    if size <= 0:
+        raise Exception(f"Cannot summarize array of elements with size {size}")
+    fmt = get_scalar_format(ty)
+    is_pointer = isinstance(ty, TyPtr)
+
+    def format_value(value) -> str:
+        if fmt is None:
+            return base64.b64encode(value).decode("ascii")
+        if is_pointer:
+            return format_address(value)
+        return str(value)
+
+    inferior = gdb.selected_inferior()
+    address = parse_address(address) + start * size
+    chunk_count = max(ARRAY_SUMMARY_CHUNK_SIZE // size, 1)
+
+    samples = []
+    max_samples = apply_limit(count, LIMITS.eager_element_count)
+    samples_truncated = False
+    runs = []
+    runs_truncated = False
+    (minimum, maximum) = (None, None)
+    # Run of identical values that continues into the next chunk
+    (run_value, run_start, run_length) = (None, 0, 0)
+
+    def finish_run():
+        nonlocal runs_truncated
+        if run_length >= min_run_length:
+            if len(runs) < max_runs:
+                runs.append(ArrayRun(start=run_start, length=run_length, value=format_value(run_value)))
+            else:
+                runs_truncated = True
+
+    for chunk_start in range(0, count, chunk_count):
+        chunk_length = min(chunk_count, count - chunk_start)
+        data = bytes(inferior.read_memory(address + chunk_start * size, chunk_length * size))
+        if fmt is not None:
+            values = memoryview(data).cast(fmt)
+            (chunk_min, chunk_max) = (min(values), max(values))
+            minimum = chunk_min if minimum is None else min(minimum, chunk_min)
+            maximum = chunk_max if maximum is None else max(maximum, chunk_max)
+        else:
+            values = [data[offset:offset + size] for offset in range(0, len(data), size)]
+
+        first_sample = (-chunk_start) % stride
+        for index in range(first_sample, chunk_length, stride):
+            if len(samples) >= max_samples:
+                samples_truncated = True
+                break
+            samples.append(ArrayElement(index=start + chunk_start + index, value=format_value(values[index])))
+
+        index = start + chunk_start
+        for (value, group) in itertools.groupby(values):
+            length = sum(1 for _ in group)
+            if run_length > 0 and value == run_value:
+                run_length += length
+            else:
+                finish_run()
+                (run_value, run_start, run_length) = (value, index, length)
+            index += length
+    finish_run()
+
+    return ArraySummary(
+        type=element_type,
+        types=interner.get_types(),
+        samples=samples,
+        min=format_value(minimum) if minimum is not None else None,
+        max=format_value(maximum) if maximum is not None else None,
+        runs=runs,
+        runs_truncated=runs_truncated,
+        samples_truncated=samples_truncated
+    )
+
 
+### SNAPSHOT EXPORT ###
+
+# Keep in sync with snapshot_reader.py and memviz_get_variables_info.py
+SNAPSHOT_MAGIC = b"MVZSNAP\0"
+SNAPSHOT_VERSION = 1
+# Magic, version, reserved, index offset, index entry count, manifest offset, manifest length
+SNAPSHOT_HEADER = struct.Struct("<8sIIQQQQ")
+# Key, offset, length
+SNAPSHOT_INDEX_ENTRY = struct.Struct("<QQQ")
+# Memory below the stack pointer that can still be used by the innermost function
+STACK_RED_ZONE = 128
+
+
+@dataclasses.dataclass
+class SnapshotExport:
+    path: str
+    # Number of captured memory chunks
+    chunk_count: int
+    # Number of captured bytes of memory
+    captured_bytes: int
+    # Size of the snapshot file
+    byte_count: int
+    # True if some memory was left out because of `max_heap_bytes` or because it could not be read
+    truncated: bool
+
+
+def write_snapshot_file(path: str, entries: Iterable[Tuple[int, bytes]],
+                        make_manifest: Callable[[], Dict[str, Any]]) -> int:
+    """
+    Writes a snapshot file: a header, the entries, an index of the entries sorted by their key
+    and a JSON manifest. The manifest is created after all entries are written.
+    The file is written under a temporary name and renamed once it is complete, so a failure
+    while producing the entries does not leave a truncated snapshot behind.
+    Returns the size of the file.
+    """
+    index = []
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(bytes(SNAPSHOT_HEADER.size))
+            for (key, data) in entries:
+                index.append((key, f.tell(), len(data)))
+                f.write(data)
+            index.sort()
+            index_offset = f.tell()
+            f.write(b"".join(SNAPSHOT_INDEX_ENTRY.pack(*item) for item in index))
+            manifest = json.dumps(make_manifest()).encode()
+            manifest_offset = f.tell()
+            f.write(manifest)
+            size = f.tell()
+            f.seek(0)
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, index_offset, len(index),
+                                         manifest_offset, len(manifest)))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return size
+
+
+def merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged = []
+    for (start, end) in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def export_snapshot(path: str, max_frames: int = 20, max_heap_bytes: int = 64 * 1024 * 1024) -> SnapshotExport:
+    """
+    Writes places and types of all threads, memory regions, heap blocks and the bytes of
+    the used parts of the stacks and of the heap into a snapshot file, which can be read
+    by `snapshot_reader.py` without a debugger.
+    Memory is only captured for the selected inferior.
+    """
+    inferior = gdb.selected_inferior()
+    threads = get_threads_snapshot(max_frames)
+    regions = get_memory_regions()
+
+    stacks = []
+    for thread in threads.threads:
+        if thread.inferior != inferior.num or thread.stack_pointer is None or thread.stack_range is None:
+            continue
+        (stack_start, stack_end) = (parse_address(thread.stack_range[0]), parse_address(thread.stack_range[1]))
+        stacks.append((max(parse_address(thread.stack_pointer) - STACK_RED_ZONE, stack_start), stack_end))
+
+    heap_blocks = None
+    if ALLOCATION_TRACKER is not None:
+        heap = get_heap_index()
+        heap_blocks = [heap.make_block(address) for address in heap.addresses]
+        heap_ranges = [(address, address + heap.blocks[address][0]) for address in heap.addresses]
+    else:
+        # Without allocation tracking, the whole heap region is captured
+        heap_ranges = [(parse_address(region.start), parse_address(region.end))
+                       for region in regions if region.kind == "heap"]
+
+    truncated = False
+    heap_bytes = 0
+    limited_heap_ranges = []
+    for (start, end) in merge_ranges(heap_ranges):
+        if heap_bytes + (end - start) > max_heap_bytes:
+            truncated = True
+            break
+        heap_bytes += end - start
+        limited_heap_ranges.append((start, end))
+    chunks = merge_ranges(stacks + limited_heap_ranges)
+
+    chunk_count = 0
+    captured_bytes = 0
+
+    def iter_chunks():
+        nonlocal truncated, chunk_count, captured_bytes
+        for (start, end) in chunks:
+            try:
+                data = bytes(inferior.read_memory(start, end - start))
+            except gdb.MemoryError:
+                truncated = True
+                continue
+            chunk_count += 1
+            captured_bytes += len(data)
+            yield (start, data)
+
+    def make_manifest() -> Dict[str, Any]:
+        return {
+            "backend": "gdb",
+            "threads": [dataclasses.asdict(thread) for thread in threads.threads],
+            "types": [dataclasses.asdict(ty) for ty in threads.types],
+            "regions": [dataclasses.asdict(region) for region in regions],
+            "heap_blocks": [dataclasses.asdict(block) for block in heap_blocks] if heap_blocks is not None else None,
+            "truncated": truncated,
+        }
+
+    size = write_snapshot_file(path, iter_chunks(), make_manifest)
+    return SnapshotExport(path=path, chunk_count=chunk_count, captured_bytes=captured_bytes, byte_count=size,
+                          truncated=truncated)
+
+
+### LIMITS ###
+
+@dataclasses.dataclass
+class Limits:
+    # Number of elements sampled by array summaries
+    eager_element_count: Optional[int] = None
+    # Number of bytes read from a single C string
+    str_char_count: Optional[int] = None
+    # Number of places, heap blocks or pointer graph nodes returned in a single response
+    max_values: Optional[int] = None
+    # Size of a single (JSON encoded) response
+    max_response_bytes: Optional[int] = None
 
-def take_alloc_records() -> List[FunctionCallRecord]:
-    return ALLOCATION_TRACKER.take_records()
+
+# Limits of the current debugging session, set by configure
+LIMITS = Limits()
+
+
+def configure(limits: Dict[str, Optional[int]]) -> Limits:
+    """
+    Sets the limits of the current session. Limits that are not passed keep their value,
+    None means unlimited. Returns the limits that will be used.
+    """
+    global LIMITS
+    names = set(field.name for field in dataclasses.fields(Limits))
+    for (name, limit) in limits.items():
+        if name not in names:
+            raise Exception(f"Unknown limit {name}, expected one of {sorted(names)}")
+        if limit is not None and (not isinstance(limit, int) or isinstance(limit, bool) or limit < 0):
+            raise Exception(f"Limit {name} must be a non-negative integer or None, got {limit}")
+    LIMITS = dataclasses.replace(LIMITS, **limits)
+    return LIMITS
+
+
+def apply_limit(count: int, limit: Optional[int]) -> int:
+    return count if limit is None else min(count, limit)
 
 
 ### UTILITIES ###
@@ -420,10 +2344,55 @@ class Result:
 def try_run(fn: Callable) -> Result:
     try:
         result = fn()
-        return dataclass_to_json(Result.make_ok(result))
+        response = dataclass_to_json(Result.make_ok(result))
+        if is_oversized(response) and hasattr(result, "truncated"):
+            response = run_with_fewer_values(fn, dataclasses.asdict(result), len(response))
     except BaseException as e:
         return dataclass_to_json(Result.make_error(str(e)))
 
+    if is_oversized(response):
+        # The response cannot be cut without breaking the JSON, so the frontend
+        # is told to request less data (e.g. a smaller page) instead
+        return dataclass_to_json(Result.make_error(
+            f"Response size {len(response)} B exceeds the limit of {LIMITS.max_response_bytes} B"
+        ))
+    return response
+
+
+def is_oversized(response: str) -> bool:
+    return LIMITS.max_response_bytes is not None and len(response) > LIMITS.max_response_bytes
+
+
+def run_with_fewer_values(fn: Callable, result: Any, response_bytes: int) -> str:
+    """
+    Runs `fn` again with a lower value limit until its response fits into the response size limit.
+    Places, heap blocks or nodes that do not fit are left out and the result is marked as truncated,
+    like with the `max_values` limit.
+    """
+    global LIMITS
+
+    limits = LIMITS
+    # Every limited value is a record, so the record count bounds the value count.
+    # The first attempt assumes that all records have a similar size
+    value_count = count_records(result) * limits.max_response_bytes // response_bytes
+    try:
+        while True:
+            LIMITS = dataclasses.replace(limits, max_values=value_count)
+            response = dataclass_to_json(Result.make_ok(fn()))
+            if not is_oversized(response) or value_count == 0:
+                return response
+            value_count //= 2
+    finally:
+        LIMITS = limits
+
+
+def count_records(value: Any) -> int:
+    if isinstance(value, dict):
+        return 1 + sum(count_records(item) for item in value.values())
+    if isinstance(value, list):
+        return sum(count_records(item) for item in value)
+    return 0
+
 
 def dataclass_to_json(value) -> str:
     return json.dumps(dataclasses.asdict(value))
@@ -451,14 +2420,16 @@ def activate_frame(index: int):
         frame.select()
 
 
-def get_pointer_from_value(value: gdb.Value) -> str:
-    return value.format_string(
-        raw=True,
-        address=True,
-        symbols=False,
-        pretty_arrays=False,
-        pretty_structs=False,
-        array_indexes=False,
-        actual_objects=False,
-        format="x"
-    )
+def lookup_type_by_name(type_ref: str) -> gdb.Type:
+    # Parsing a cast expression supports all C type names (e.g. "struct Node", "Node", "int *")
+    return gdb.parse_and_eval(f"({type_ref} *) 0").type.target()
+
+
+def format_address(address: int) -> str:
+    return hex(address)
+
+
+def parse_address(address: Union[str, int]) -> int:
+    if isinstance(address, str):
+        return int(address, 0)
+    return address
@@ -0,0 +1,191 @@
+"""
+Reads snapshots written by `export_snapshot` of the debugpy and GDB backends, without a debugger.
+
+Layout of a snapshot file (little endian):
+- header: magic, version, reserved, index offset, index entry count, manifest offset, manifest length
+- entries: JSON records of Python values (debugpy) or raw memory chunks (GDB)
+- index: (key, offset, length) of every entry, sorted by key.
+  Keys are value ids (debugpy) or start addresses of memory chunks (GDB).
+- manifest: JSON with the name of the backend and places of the captured frames
+
+The file is memory-mapped and the index is searched in place, so entries are only
+read (and decoded) when they are requested.
+
+Usage: python3 snapshot_reader.py <snapshot>
+"""
+import bisect
+import json
+import mmap
+import struct
+import sys
+from typing import Any, Dict, List, Optional
+
+# Keep in sync with the backends
+SNAPSHOT_MAGIC = b"MVZSNAP\0"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct("<8sIIQQQQ")
+SNAPSHOT_INDEX_ENTRY = struct.Struct("<QQQ")
+
+
+class Snapshot:
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, _, index_offset, index_count, manifest_offset, manifest_length) = (
+            SNAPSHOT_HEADER.unpack_from(self.data)
+        )
+        if magic != SNAPSHOT_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a memviz snapshot")
+        if version != SNAPSHOT_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported snapshot version {version}")
+
+        self.view = memoryview(self.data)
+        # The index is used directly from the mapped file, the keys are every third number
+        self.index = self.view[index_offset:index_offset + index_count * SNAPSHOT_INDEX_ENTRY.size].cast("Q")
+        self.keys = self.index[0::3]
+        self.manifest: Dict[str, Any] = json.loads(bytes(self.view[manifest_offset:manifest_offset + manifest_length]))
+
+    @property
+    def backend(self) -> str:
+        return self.manifest["backend"]
+
+    def entry_count(self) -> int:
+        return len(self.keys)
+
+    def find_entry(self, key: int) -> Optional[int]:
+        index = bisect.bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            return index
+        return None
+
+    def find_containing_entry(self, key: int) -> Optional[int]:
+        """
+        Returns the entry whose range [key, key + length) contains the given key.
+        """
+        index = bisect.bisect_right(self.keys, key) - 1
+        if index >= 0 and key < self.keys[index] + self.index[index * 3 + 2]:
+            return index
+        return None
+
+    def get_entry(self, index: int) -> memoryview:
+        offset = self.index[index * 3 + 1]
+        return self.view[offset:offset + self.index[index * 3 + 2]]
+
+    def close(self):
+        # Views into the mapping have to be released before it can be closed
+        for name in ("keys", "index", "view"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_args):
+        self.close()
+
+
+class DebugpySnapshot(Snapshot):
+    """
+    Serves the same queries as the debugpy backend.
+    """
+
+    def get_threads(self) -> List[Dict[str, Any]]:
+        return self.manifest["threads"]
+
+    def get_value(self, value_id: str) -> Dict[str, Any]:
+        index = self.find_entry(int(value_id))
+        if index is None:
+            raise ValueError(f"Value with id {value_id} is not in the snapshot")
+        return json.loads(bytes(self.get_entry(index)))
+
+    def get_variables(self, thread_index: int, frame_index: int) -> Dict[str, Any]:
+        frame = self.get_threads()[thread_index]["frames"][frame_index]
+        values = {}
+        for place in frame["places"]:
+            if place["id"] not in values:
+                values[place["id"]] = self.get_value(place["id"])
+        return {"places": frame["places"], "values": list(values.values())}
+
+    def get_flat_collection_elements(self, collection_id: str, start_index: int, count: int) -> List[Dict[str, Any]]:
+        return self.get_value(collection_id)["elements"][start_index:start_index + count]
+
+    def get_dict_entries(self, dict_id: str, start_index: int, count: int) -> List[Dict[str, Any]]:
+        return self.get_value(dict_id)["pairs"][start_index:start_index + count]
+
+    def get_string_contents(self, str_id: str, start_index: int, length: int) -> str:
+        return self.get_value(str_id)["content"][start_index:start_index + length]
+
+    def get_object(self, object_id: str) -> Dict[str, Any]:
+        return self.get_value(object_id)
+
+
+class GdbSnapshot(Snapshot):
+    """
+    Serves the same queries as the GDB backend.
+    """
+
+    def get_threads(self) -> List[Dict[str, Any]]:
+        return self.manifest["threads"]
+
+    def get_types(self) -> List[Dict[str, Any]]:
+        return self.manifest["types"]
+
+    def get_frame_places(self, thread_index: int, frame_index: int) -> List[Dict[str, Any]]:
+        return self.get_threads()[thread_index]["frames"][frame_index]["places"]
+
+    def get_memory_regions(self) -> List[Dict[str, Any]]:
+        return self.manifest["regions"]
+
+    def get_heap_blocks(self) -> Optional[List[Dict[str, Any]]]:
+        return self.manifest["heap_blocks"]
+
+    def read_memory(self, address: int, size: int) -> memoryview:
+        """
+        Returns the captured memory of the range [address, address + size).
+        Stacks and heap memory are captured, ranges outside of them cannot be read.
+        """
+        index = self.find_containing_entry(address)
+        if index is None:
+            raise ValueError(f"Memory at {hex(address)} is not in the snapshot")
+        start = address - self.keys[index]
+        data = self.get_entry(index)
+        if start + size > len(data):
+            raise ValueError(f"Memory range {hex(address)}-{hex(address + size)} is not in the snapshot")
+        return data[start:start + size]
+
+
+SNAPSHOT_CLASSES = {
+    "debugpy": DebugpySnapshot,
+    "gdb": GdbSnapshot,
+}
+
+
+def open_snapshot(path: str) -> Snapshot:
+    with Snapshot(path) as snapshot:
+        backend = snapshot.backend
+    if backend not in SNAPSHOT_CLASSES:
+        raise ValueError(f"Unknown snapshot backend {backend}")
+    return SNAPSHOT_CLASSES[backend](path)
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(__doc__.strip().splitlines()[-1])
+        return 1
+    with open_snapshot(sys.argv[1]) as snapshot:
+        print(f"Backend: {snapshot.backend}")
+        print(f"Entries: {snapshot.entry_count()}")
+        for (index, thread) in enumerate(snapshot.get_threads()):
+            print(f"Thread {index}:")
+            for frame in thread["frames"]:
+                print(f"  {frame.get('name')} ({len(frame['places'])} places)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,10 @@ import type {
   ThreadId,
 } from "process-def";
 import type {
+  CellVal,
+  FrameVal,
+  FunctionVal,
+  GeneratorVal,
   KeyValuePair,
   ObjectVal,
   Value as PythonValue,
@@ -79,6 +83,34 @@ export interface GetObjectRes extends Response {
   };
 }
 
+export interface GetFunctionRes extends Response {
+  kind: "get-function";
+  data: {
+    function: FunctionVal;
+  };
+}
+
+export interface GetGeneratorRes extends Response {
+  kind: "get-generator";
+  data: {
+    generator: GeneratorVal;
+  };
+}
+
+export interface GetFrameRes extends Response {
+  kind: "get-frame";
+  data: {
+    frame: FrameVal;
+  };
+}
+
+export interface GetCellRes extends Response {
+  kind: "get-cell";
+  data: {
+    cell: CellVal;
+  };
+}
+
 export interface ReadMemoryRes extends Response {
   kind: "read-memory";
   data: {
@@ -104,7 +136,17 @@ interface MemoryFreedEvent {
   address: AddressStr;
 }
 
-export type MemoryAllocEvent = MemoryAllocatedEvent | MemoryFreedEvent;
+// Some allocation events were lost, so the tracked heap is incomplete
+interface MemoryEventsDroppedEvent {
+  kind: "mem-events-dropped";
+  // Total number of lost events
+  count: number;
+}
+
+export type MemoryAllocEvent =
+  | MemoryAllocatedEvent
+  | MemoryFreedEvent
+  | MemoryEventsDroppedEvent;
 
 export interface ErrorRes extends Response {
   kind: "error";
@@ -123,7 +165,11 @@ export type ExtensionToMemvizDebugpyResponse =
   | GetFlatCollectionElementsRes
   | GetDictEntriesRes
   | GetStringContentsRes
-  | GetObjectRes;
+  | GetObjectRes
+  | GetFunctionRes
+  | GetGeneratorRes
+  | GetFrameRes
+  | GetCellRes;
 
 export type ExtensionToMemvizResponse =
   | ExtensionToMemvizCommonResponse
@@ -183,6 +229,26 @@ export interface GetObjectReq extends Request {
   id: AddressStr;
 }
 
+export interface GetFunctionReq extends Request {
+  kind: "get-function";
+  id: AddressStr;
+}
+
+export interface GetGeneratorReq extends Request {
+  kind: "get-generator";
+  id: AddressStr;
+}
+
+export interface GetFrameReq extends Request {
+  kind: "get-frame";
+  id: AddressStr;
+}
+
+export interface GetCellReq extends Request {
+  kind: "get-cell";
+  id: AddressStr;
+}
+
 export interface ReadMemoryReq extends Request {
   kind: "read-memory";
   address: AddressStr;
@@ -201,5 +267,9 @@ export type MemvizToExtensionMsg =
   | GetDictEntriesReq
   | GetStringContentsReq
   | GetObjectReq
+  | GetFunctionReq
+  | GetGeneratorReq
+  | GetFrameReq
+  | GetCellReq
   | ReadMemoryReq
   | TakeAllocEventsReq;
@@ -2,6 +2,7 @@ import type { AddressStr, StoppedPlace } from "process-def";
 
 import type {
   RichAttribute,
+  RichFunctionContents,
   RichKeyValuePair,
   RichValue,
   RichVariables,
@@ -39,4 +40,16 @@ export class DebugpyResolver {
   getObject(id: AddressStr): Promise<RichAttribute[]> {
     return this.resolver.getObject(id);
   }
+  getFunction(id: AddressStr): Promise<RichFunctionContents> {
+    return this.resolver.getFunction(id);
+  }
+  getGenerator(id: AddressStr): Promise<RichAttribute[]> {
+    return this.resolver.getGenerator(id);
+  }
+  getFrame(id: AddressStr): Promise<RichAttribute[]> {
+    return this.resolver.getFrame(id);
+  }
+  getCell(id: AddressStr): Promise<RichValue | null> {
+    return this.resolver.getCell(id);
+  }
 }
@@ -3,6 +3,7 @@ import type { Place as GDBPlace } from "process-def/gdb";
 import type { MemoryAllocEvent } from "../messages";
 import type {
   RichAttribute,
+  RichFunctionContents,
   RichKeyValuePair,
   RichVariables as RichPythonVariables,
   RichValue,
@@ -31,4 +32,8 @@ export interface ProcessResolverCore {
     count: number,
   ): Promise<RichKeyValuePair[]>;
   getObject(id: AddressStr): Promise<RichAttribute[]>;
+  getFunction(id: AddressStr): Promise<RichFunctionContents>;
+  getGenerator(id: AddressStr): Promise<RichAttribute[]>;
+  getFrame(id: AddressStr): Promise<RichAttribute[]>;
+  getCell(id: AddressStr): Promise<RichValue | null>;
 }
@@ -4,11 +4,16 @@ import type { MemoryAllocEvent } from "../../messages";
 import { addressToStr, strToAddress } from "../../utils";
 import type {
   RichAttribute,
+  RichFunctionContents,
   RichKeyValuePair,
   RichVariables as RichPythonVariables,
   RichValue,
 } from "../../visualization/debugpy/type/type";
-import { rawToRichValues } from "../../visualization/debugpy/type/value-mapper";
+import {
+  rawToRichAttributes,
+  rawToRichFunctionContents,
+  rawToRichValues,
+} from "../../visualization/debugpy/type/value-mapper";
 import type { ProcessResolverCore } from "../core";
 import type { FullProcessState as FullDebugpyProcessState } from "./utils/debugpy";
 import type { FullProcessState as FullGdbProcessState } from "./utils/gdb";
@@ -153,11 +158,63 @@ export class EagerResolver implements ProcessResolverCore {
       throw new Error(`No object attributes found for id ${id}`);
     }
 
-    return attributes.map((attr) => ({
-      name: attr.name,
-      value: attr.value ? rawToRichValues([attr.value])[0] : null,
-      is_descriptor: attr.is_descriptor,
-    }));
+    return rawToRichAttributes(attributes);
+  }
+
+  async getFunction(id: AddressStr): Promise<RichFunctionContents> {
+    const state = this.debugpyState;
+    if (!state) {
+      throw new Error(
+        "Debugpy state not provided to EagerResolver but needed for getFunction",
+      );
+    }
+
+    const contents = state.functionContents.get(id);
+    if (!contents) {
+      throw new Error(`No function contents found for id ${id}`);
+    }
+
+    return rawToRichFunctionContents(contents);
+  }
+
+  async getGenerator(id: AddressStr): Promise<RichAttribute[]> {
+    return this.getLocals(id, "getGenerator");
+  }
+
+  async getFrame(id: AddressStr): Promise<RichAttribute[]> {
+    return this.getLocals(id, "getFrame");
+  }
+
+  private getLocals(id: AddressStr, method: string): RichAttribute[] {
+    const state = this.debugpyState;
+    if (!state) {
+      throw new Error(
+        `Debugpy state not provided to EagerResolver but needed for ${method}`,
+      );
+    }
+
+    const locals = state.localVariables.get(id);
+    if (!locals) {
+      throw new Error(`No local variables found for id ${id}`);
+    }
+
+    return rawToRichAttributes(locals);
+  }
+
+  async getCell(id: AddressStr): Promise<RichValue | null> {
+    const state = this.debugpyState;
+    if (!state) {
+      throw new Error(
+        "Debugpy state not provided to EagerResolver but needed for getCell",
+      );
+    }
+
+    const value = state.cellValues.get(id);
+    if (value === undefined) {
+      throw new Error(`No cell value found for id ${id}`);
+    }
+
+    return value ? rawToRichValues([value])[0] : null;
   }
 
   async takeAllocEvents(): Promise<MemoryAllocEvent[]> {
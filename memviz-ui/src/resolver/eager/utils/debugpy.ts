@@ -7,11 +7,14 @@ import {
 import type {
   Attribute,
   BoolVal,
+  CellVal,
   ComplexVal,
   DeferredDictVal,
   DeferredListVal,
   DeferredStrVal,
   FloatVal,
+  FunctionVal,
+  GeneratorVal,
   IntVal,
   KeyValuePair,
   NoneVal,
@@ -31,8 +34,13 @@ export interface FullProcessState extends ProcessState {
   stringContents: Map<PythonId, string>;
   dictPairs: Map<PythonId, KeyValuePair[]>;
   objectAttributes: Map<PythonId, Attribute[]>;
+  functionContents: Map<PythonId, FunctionContents>;
+  localVariables: Map<PythonId, Attribute[]>;
+  cellValues: Map<PythonId, Value | null>;
 }
 
+type FunctionContents = Pick<FunctionVal, "free_variables" | "receiver">;
+
 interface FullStackTrace {
   frames: FullStackFrame[];
 }
@@ -55,6 +63,9 @@ export class DebugpyProcessBuilder {
   private stringContents = new Map<PythonId, string>();
   private dictPairs = new Map<PythonId, KeyValuePair[]>();
   private objectAttributes = new Map<PythonId, Attribute[]>();
+  private functionContents = new Map<PythonId, FunctionContents>();
+  private localVariables = new Map<PythonId, Attribute[]>();
+  private cellValues = new Map<PythonId, Value | null>();
 
   startFrame(name: string, file = "main.py", line: number | null = null) {
     if (this.activeFrame) this.endFrame();
@@ -93,6 +104,9 @@ export class DebugpyProcessBuilder {
       this.stringContents,
       this.dictPairs,
       this.objectAttributes,
+      this.functionContents,
+      this.localVariables,
+      this.cellValues,
     );
   }
 
@@ -124,6 +138,9 @@ export class DebugpyProcessBuilder {
       stringContents: this.stringContents,
       dictPairs: this.dictPairs,
       objectAttributes: this.objectAttributes,
+      functionContents: this.functionContents,
+      localVariables: this.localVariables,
+      cellValues: this.cellValues,
     };
 
     const resolver = new EagerResolver(undefined, processState);
@@ -139,6 +156,9 @@ export class ValueBuilder {
     private strings: Map<PythonId, string>,
     private dicts: Map<PythonId, KeyValuePair[]>,
     private objects: Map<PythonId, Attribute[]>,
+    private functions: Map<PythonId, FunctionContents>,
+    private locals: Map<PythonId, Attribute[]>,
+    private cells: Map<PythonId, Value | null>,
   ) {}
 
   withElements(elements: Value[]) {
@@ -160,6 +180,24 @@ export class ValueBuilder {
     this.objects.set(this.id, attrs);
     return this;
   }
+
+  withFreeVariables(
+    freeVariables: Attribute[],
+    receiver: Value | null = null,
+  ) {
+    this.functions.set(this.id, { free_variables: freeVariables, receiver });
+    return this;
+  }
+
+  withLocals(locals: Attribute[]) {
+    this.locals.set(this.id, locals);
+    return this;
+  }
+
+  withCellValue(value: Value | null) {
+    this.cells.set(this.id, value);
+    return this;
+  }
 }
 
 export const makeNone = (b: DebugpyProcessBuilder): NoneVal => ({
@@ -254,3 +292,29 @@ export const makeObject = (
   type_name: type,
   attributes: attrs,
 });
+
+export const makeGenerator = (
+  b: DebugpyProcessBuilder,
+  name: string,
+  locals: Attribute[] | null,
+): GeneratorVal => ({
+  kind: ValueKind.GENERATOR,
+  id: b.generateId(),
+  size: 200,
+  type_name: "generator",
+  name,
+  state: "suspended",
+  line: 1,
+  locals,
+});
+
+export const makeCell = (
+  b: DebugpyProcessBuilder,
+  value: Value | null,
+): CellVal => ({
+  kind: ValueKind.CELL,
+  id: b.generateId(),
+  size: 40,
+  empty: false,
+  value,
+});
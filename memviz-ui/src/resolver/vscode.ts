@@ -9,10 +9,18 @@ import type { Place as GDBPlace } from "process-def/gdb";
 import type { WebviewApi } from "vscode-webview";
 import type {
   ExtensionToMemvizResponse,
+  GetCellReq,
+  GetCellRes,
   GetDictEntriesReq,
   GetDictEntriesRes,
   GetFlatCollectionElementsReq,
   GetFlatCollectionElementsRes,
+  GetFrameReq,
+  GetFrameRes,
+  GetFunctionReq,
+  GetFunctionRes,
+  GetGeneratorReq,
+  GetGeneratorRes,
   GetObjectReq,
   GetObjectRes,
   GetPlacesReq,
@@ -35,11 +43,16 @@ import type {
 import { assert } from "../utils";
 import type {
   RichAttribute,
+  RichFunctionContents,
   RichKeyValuePair,
   RichVariables as RichPythonVariables,
   RichValue,
 } from "../visualization/debugpy/type/type";
-import { rawToRichValues } from "../visualization/debugpy/type/value-mapper";
+import {
+  rawToRichAttributes,
+  rawToRichFunctionContents,
+  rawToRichValues,
+} from "../visualization/debugpy/type/value-mapper";
 import { deserializePlaces } from "../visualization/gdb/type";
 import type { ProcessResolverCore } from "./core";
 
@@ -173,11 +186,44 @@ export class VsCodeResolver implements ProcessResolverCore {
       res.object.attributes !== null,
       `Object ${id} received null attributes`,
     );
-    return res.object.attributes.map((attr) => ({
-      name: attr.name,
-      value: attr.value ? rawToRichValues([attr.value])[0] : null,
-      is_descriptor: attr.is_descriptor,
-    }));
+    return rawToRichAttributes(res.object.attributes);
+  }
+
+  async getFunction(id: AddressStr): Promise<RichFunctionContents> {
+    const res = await this.sendRequest<GetFunctionReq, GetFunctionRes>({
+      kind: "get-function",
+      id,
+    });
+    return rawToRichFunctionContents(res.function);
+  }
+
+  async getGenerator(id: AddressStr): Promise<RichAttribute[]> {
+    const res = await this.sendRequest<GetGeneratorReq, GetGeneratorRes>({
+      kind: "get-generator",
+      id,
+    });
+    assert(
+      res.generator.locals !== null,
+      `Generator ${id} received null locals`,
+    );
+    return rawToRichAttributes(res.generator.locals);
+  }
+
+  async getFrame(id: AddressStr): Promise<RichAttribute[]> {
+    const res = await this.sendRequest<GetFrameReq, GetFrameRes>({
+      kind: "get-frame",
+      id,
+    });
+    assert(res.frame.locals !== null, `Frame ${id} received null locals`);
+    return rawToRichAttributes(res.frame.locals);
+  }
+
+  async getCell(id: AddressStr): Promise<RichValue | null> {
+    const res = await this.sendRequest<GetCellReq, GetCellRes>({
+      kind: "get-cell",
+      id,
+    });
+    return res.cell.value ? rawToRichValues([res.cell.value])[0] : null;
   }
 
   async readMemory(address: AddressStr, size: number): Promise<ArrayBuffer> {
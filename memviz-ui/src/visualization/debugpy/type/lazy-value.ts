@@ -8,6 +8,8 @@ import {
 } from "../value-display-settings";
 import {
   type RichAttribute,
+  type RichFunctionContents,
+  RichFunctionVal,
   type RichKeyValuePair,
   type RichValue,
   SizedDescribedRichValue,
@@ -507,43 +509,200 @@ export class LazyDictVal extends LazyCollectionVal<RichKeyValuePair[]> {
   }
 }
 
-export class LazyObjectVal extends SizedDescribedRichValue {
+// Value whose contents are shown as a list of named attributes
+// and are loaded only when the value is opened
+export abstract class LazyAttributeListVal extends SizedDescribedRichValue {
+  constructor(
+    id: string,
+    size: number,
+    private attributes: RichAttribute[] | null = null,
+  ) {
+    super(id, size);
+  }
+
+  protected abstract fetchAttributes(
+    resolver: DebugpyResolver,
+  ): Promise<RichAttribute[]>;
+
+  public isResolved(): boolean {
+    return this.attributes !== null;
+  }
+
+  public async getAttributes(
+    resolver: DebugpyResolver,
+  ): Promise<RichAttribute[]> {
+    if (this.attributes === null) {
+      try {
+        this.attributes = await this.fetchAttributes(resolver);
+      } catch (e) {
+        this.attributes = [];
+        console.error(
+          `Failed to fetch attributes for ${this.get_type_label()} ${this.id}:`,
+          e,
+        );
+      }
+    }
+    return this.attributes!;
+  }
+
+  public getFetchedAttributes(): RichAttribute[] | null {
+    return this.attributes;
+  }
+
+  public override getFetchedChildIds(): PythonId[] {
+    return getAttributeIds(this.attributes);
+  }
+
+  public setValues(attributes: RichAttribute[] | null): void {
+    this.attributes = attributes;
+  }
+}
+
+function getAttributeIds(attributes: RichAttribute[] | null): PythonId[] {
+  const childIds: PythonId[] = [];
+  for (const attribute of attributes ?? []) {
+    if (attribute.value !== null) {
+      childIds.push(attribute.value.id);
+    }
+  }
+  return childIds;
+}
+
+export class LazyObjectVal extends LazyAttributeListVal {
   readonly kind = ValueKind.OBJECT;
 
   constructor(
     id: string,
     size: number,
     public readonly type_name: string,
-    private attributes: RichAttribute[] | null = null,
+    attributes: RichAttribute[] | null = null,
   ) {
-    super(id, size);
+    super(id, size, attributes);
   }
 
   public override get_type_label(): string {
     return this.type_name;
   }
 
-  public isResolved(): boolean {
-    return this.attributes !== null;
+  protected async fetchAttributes(
+    resolver: DebugpyResolver,
+  ): Promise<RichAttribute[]> {
+    return await resolver.getObject(this.id);
   }
+}
 
-  private async fetchAttributes(resolver: DebugpyResolver) {
-    try {
-      this.attributes = await resolver.getObject(this.id);
-    } catch (e) {
-      this.attributes = [];
-      console.error(
-        `Failed to fetch attributes for object ${this.id} (type: ${this.type_name}):`,
-        e,
-      );
-    }
+export class LazyGeneratorVal extends LazyAttributeListVal {
+  readonly kind = ValueKind.GENERATOR;
+
+  constructor(
+    id: string,
+    size: number,
+    public readonly type_name: string,
+    public readonly name: string,
+    public readonly state: string,
+    public readonly line: number | null,
+    locals: RichAttribute[] | null = null,
+  ) {
+    super(id, size, locals);
+  }
+
+  public override get_type_label(): string {
+    return this.type_name;
+  }
+
+  protected async fetchAttributes(
+    resolver: DebugpyResolver,
+  ): Promise<RichAttribute[]> {
+    return await resolver.getGenerator(this.id);
+  }
+}
+
+export class LazyFrameVal extends LazyAttributeListVal {
+  readonly kind = ValueKind.FRAME;
+
+  constructor(
+    id: string,
+    size: number,
+    public readonly name: string,
+    public readonly file: string,
+    public readonly line: number | null,
+    locals: RichAttribute[] | null = null,
+  ) {
+    super(id, size, locals);
+  }
+
+  protected async fetchAttributes(
+    resolver: DebugpyResolver,
+  ): Promise<RichAttribute[]> {
+    return await resolver.getFrame(this.id);
+  }
+}
+
+// The contents of a cell are shown as its cell_contents attribute
+export function getCellAttributes(value: RichValue | null): RichAttribute[] {
+  return value === null
+    ? []
+    : [{ name: "cell_contents", value, is_descriptor: false }];
+}
+
+export class LazyCellVal extends LazyAttributeListVal {
+  readonly kind = ValueKind.CELL;
+
+  constructor(
+    id: string,
+    size: number,
+    public readonly empty: boolean,
+    value: RichValue | null = null,
+  ) {
+    // an empty cell has no contents to load
+    super(id, size, empty || value !== null ? getCellAttributes(value) : null);
+  }
+
+  protected async fetchAttributes(
+    resolver: DebugpyResolver,
+  ): Promise<RichAttribute[]> {
+    return getCellAttributes(await resolver.getCell(this.id));
+  }
+}
+
+// The free variables of a function are followed by the object
+// that a bound method is bound to, named as its __self__ attribute
+export function getFunctionAttributes(
+  contents: RichFunctionContents,
+): RichAttribute[] {
+  const attributes = [...contents.free_variables];
+  if (contents.receiver !== null) {
+    attributes.push({
+      name: "__self__",
+      value: contents.receiver,
+      is_descriptor: false,
+    });
+  }
+  return attributes;
+}
+
+export class LazyFunctionVal extends RichFunctionVal {
+  private attributes: RichAttribute[] | null = null;
+
+  public isResolved(): boolean {
+    return this.attributes !== null;
   }
 
   public async getAttributes(
     resolver: DebugpyResolver,
   ): Promise<RichAttribute[]> {
     if (this.attributes === null) {
-      await this.fetchAttributes(resolver);
+      try {
+        this.attributes = getFunctionAttributes(
+          await resolver.getFunction(this.id),
+        );
+      } catch (e) {
+        this.attributes = [];
+        console.error(
+          `Failed to fetch free variables for function ${this.id} (${this.qualified_name}):`,
+          e,
+        );
+      }
     }
     return this.attributes!;
   }
@@ -553,16 +712,13 @@ export class LazyObjectVal extends SizedDescribedRichValue {
   }
 
   public override getFetchedChildIds(): PythonId[] {
-    const childIds: PythonId[] = [];
-    for (const attribute of this.attributes ?? []) {
-      if (attribute.value !== null) {
-        childIds.push(attribute.value.id);
-      }
-    }
-    return childIds;
+    return getAttributeIds(this.attributes);
   }
 
   public setValues(attributes: RichAttribute[] | null): void {
     this.attributes = attributes;
   }
 }
+
+// Values that the attribute table can open and load
+export type LazyAttributeContainer = LazyAttributeListVal | LazyFunctionVal;
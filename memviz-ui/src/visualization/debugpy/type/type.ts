@@ -142,6 +142,11 @@ export interface RichAttribute {
   readonly is_descriptor: boolean;
 }
 
+export interface RichFunctionContents {
+  readonly free_variables: RichAttribute[];
+  readonly receiver: RichValue | null;
+}
+
 export class RichModuleVal extends RichValue {
   readonly kind = ValueKind.MODULE;
 
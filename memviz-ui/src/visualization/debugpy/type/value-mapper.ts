@@ -1,5 +1,7 @@
 import {
+  type Attribute,
   type BoolVal,
+  type CellVal,
   type ComplexVal,
   type DeferredDictVal,
   type DeferredFrozenSetVal,
@@ -9,7 +11,9 @@ import {
   type DeferredTupleVal,
   type FlatCollectionVal,
   type FloatVal,
+  type FrameVal,
   type FunctionVal,
+  type GeneratorVal,
   type IntVal,
   type ModuleVal,
   type NoneVal,
@@ -22,21 +26,31 @@ import {
 import { assert } from "../../../utils";
 import { valueState } from "../store";
 import {
+  getCellAttributes,
+  getFunctionAttributes,
+  LazyCellVal,
   LazyDictVal,
   type LazyFlatCollectionVal,
+  LazyFrameVal,
   LazyFrozenSetVal,
+  LazyFunctionVal,
+  LazyGeneratorVal,
   LazyListVal,
   LazyObjectVal,
   LazySetVal,
   LazyStrVal,
   LazyTupleVal,
 } from "./lazy-value";
-import type { RichAttribute, RichKeyValuePair, RichValue } from "./type";
+import type {
+  RichAttribute,
+  RichFunctionContents,
+  RichKeyValuePair,
+  RichValue,
+} from "./type";
 import {
   RichBoolVal,
   RichComplexVal,
   RichFloatVal,
-  RichFunctionVal,
   RichIntVal,
   RichModuleVal,
   RichNoneVal,
@@ -116,10 +130,39 @@ function isRawTypeVal(v: Value): v is TypeVal {
 function isRawObjectVal(v: Value): v is ObjectVal {
   return v.kind === ValueKind.OBJECT;
 }
+
+function isRawGeneratorVal(v: Value): v is GeneratorVal {
+  return v.kind === ValueKind.GENERATOR;
+}
+
+function isRawFrameVal(v: Value): v is FrameVal {
+  return v.kind === ValueKind.FRAME;
+}
+
+function isRawCellVal(v: Value): v is CellVal {
+  return v.kind === ValueKind.CELL;
+}
 export function rawToRichValues(rawValues: Value[]): RichValue[] {
   return rawValues.map(rawToRichValue);
 }
 
+export function rawToRichAttributes(attributes: Attribute[]): RichAttribute[] {
+  return attributes.map((attr) => ({
+    name: attr.name,
+    value: attr.value ? rawToRichValue(attr.value) : null,
+    is_descriptor: attr.is_descriptor,
+  }));
+}
+
+export function rawToRichFunctionContents(
+  val: FunctionVal,
+): RichFunctionContents {
+  return {
+    free_variables: rawToRichAttributes(val.free_variables ?? []),
+    receiver: val.receiver ? rawToRichValue(val.receiver) : null,
+  };
+}
+
 function rawToRichValue(val: Value): RichValue {
   const existingVal = valueState.value.getValue(val.id);
   if (existingVal) {
@@ -208,7 +251,7 @@ function createEmptyValue(val: Value): RichValue {
     return new RichRangeVal(val.id, val.size, val.start, val.stop, val.step);
   }
   if (isRawFunctionVal(val)) {
-    return new RichFunctionVal(
+    return new LazyFunctionVal(
       val.id,
       val.name,
       val.qualified_name,
@@ -228,6 +271,22 @@ function createEmptyValue(val: Value): RichValue {
   if (isRawTypeVal(val)) {
     return new RichTypeVal(val.id, val.name, val.module);
   }
+  if (isRawGeneratorVal(val)) {
+    return new LazyGeneratorVal(
+      val.id,
+      val.size,
+      val.type_name,
+      val.name,
+      val.state,
+      val.line,
+    );
+  }
+  if (isRawFrameVal(val)) {
+    return new LazyFrameVal(val.id, val.size, val.name, val.file, val.line);
+  }
+  if (isRawCellVal(val)) {
+    return new LazyCellVal(val.id, val.size, val.empty);
+  }
 
   return val as RichValue;
 }
@@ -245,15 +304,27 @@ function populateValue(rawVal: Value, richVal: RichValue): void {
       (richVal as LazyFlatCollectionVal).setValues(richElements);
     }
   } else if (isRawObjectVal(rawVal)) {
-    let attributes: RichAttribute[] | null = null;
-    if (rawVal.attributes) {
-      attributes = rawVal.attributes.map((attr) => ({
-        name: attr.name,
-        value: attr.value ? rawToRichValue(attr.value) : null,
-        is_descriptor: attr.is_descriptor,
-      }));
+    (richVal as LazyObjectVal).setValues(
+      rawVal.attributes ? rawToRichAttributes(rawVal.attributes) : null,
+    );
+  } else if (isRawGeneratorVal(rawVal) || isRawFrameVal(rawVal)) {
+    if (rawVal.locals) {
+      (richVal as LazyGeneratorVal | LazyFrameVal).setValues(
+        rawToRichAttributes(rawVal.locals),
+      );
+    }
+  } else if (isRawCellVal(rawVal)) {
+    if (rawVal.value) {
+      (richVal as LazyCellVal).setValues(
+        getCellAttributes(rawToRichValue(rawVal.value)),
+      );
+    }
+  } else if (isRawFunctionVal(rawVal)) {
+    if (rawVal.free_variables) {
+      (richVal as LazyFunctionVal).setValues(
+        getFunctionAttributes(rawToRichFunctionContents(rawVal)),
+      );
     }
-    (richVal as LazyObjectVal).setValues(attributes);
   } else if (isRawDictVal(rawVal)) {
     const richPairs: RichKeyValuePair[] = [];
     if (rawVal.pairs !== null) {
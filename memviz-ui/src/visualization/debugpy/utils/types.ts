@@ -1,8 +1,13 @@
 import { ValueKind } from "process-def/debugpy";
 import type {
+  LazyAttributeContainer,
+  LazyCellVal,
   LazyDictVal,
   LazyFlatCollectionVal,
+  LazyFrameVal,
   LazyFrozenSetVal,
+  LazyFunctionVal,
+  LazyGeneratorVal,
   LazyListVal,
   LazyObjectVal,
   LazySetVal,
@@ -13,7 +18,6 @@ import type {
   RichBoolVal,
   RichComplexVal,
   RichFloatVal,
-  RichFunctionVal,
   RichIntVal,
   RichModuleVal,
   RichNoneVal,
@@ -63,7 +67,7 @@ export function isRange(value: RichValue): value is RichRangeVal {
   return value.kind === ValueKind.RANGE;
 }
 
-export function isFunction(value: RichValue): value is RichFunctionVal {
+export function isFunction(value: RichValue): value is LazyFunctionVal {
   return value.kind === ValueKind.FUNCTION;
 }
 
@@ -71,6 +75,30 @@ export function isObject(value: RichValue): value is LazyObjectVal {
   return value.kind === ValueKind.OBJECT;
 }
 
+export function isGenerator(value: RichValue): value is LazyGeneratorVal {
+  return value.kind === ValueKind.GENERATOR;
+}
+
+export function isFrame(value: RichValue): value is LazyFrameVal {
+  return value.kind === ValueKind.FRAME;
+}
+
+export function isCell(value: RichValue): value is LazyCellVal {
+  return value.kind === ValueKind.CELL;
+}
+
+export function hasLazyAttributes(
+  value: RichValue,
+): value is LazyAttributeContainer {
+  return (
+    isObject(value) ||
+    isGenerator(value) ||
+    isFrame(value) ||
+    isCell(value) ||
+    isFunction(value)
+  );
+}
+
 export function isModule(value: RichValue): value is RichModuleVal {
   return value.kind === ValueKind.MODULE;
 }
@@ -22,6 +22,9 @@ export const valueDisplaySettings: Map<string, DisplayMode> = new Map([
   [ValueKind.OBJECT, DisplayMode.DETACHED],
   [ValueKind.MODULE, DisplayMode.INLINE],
   [ValueKind.TYPE, DisplayMode.INLINE],
+  [ValueKind.GENERATOR, DisplayMode.DETACHED],
+  [ValueKind.FRAME, DisplayMode.DETACHED],
+  [ValueKind.CELL, DisplayMode.DETACHED],
 ]);
 
 export const COLLECTION_ITEM_DISPLAY_COUNT_DEFAULT = 5;
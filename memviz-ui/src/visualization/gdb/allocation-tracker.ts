@@ -14,11 +14,22 @@ export class AllocationTracker {
   private allocations: BTree<Address, HeapAllocation> = new BTree();
   // Inactive allocations that should be remove on the next "memory allocated" event.
   private pending: Address[] = [];
+  // Number of allocation events that were lost by the debugger
+  private droppedEvents = 0;
 
   getAllocations(): HeapAllocation[] {
     return this.allocations.valuesArray();
   }
 
+  // Are some allocations missing or stale because events were lost?
+  isIncomplete(): boolean {
+    return this.droppedEvents > 0;
+  }
+
+  setDroppedEvents(count: number) {
+    this.droppedEvents = count;
+  }
+
   getAllocationContaining(address: Address): HeapAllocation | null {
     const entry = this.allocations.getPairOrNextLower(address);
     if (entry === undefined) return null;
@@ -113,6 +113,9 @@ function processAllocEvents(events: MemoryAllocEvent[]) {
       } else if (event.kind === "mem-freed") {
         console.debug(`Heap memory freed at ${event.address}`);
         tracker.freeMemory(strToAddress(event.address));
+      } else if (event.kind === "mem-events-dropped") {
+        console.warn(`${event.count} heap allocation events were lost`);
+        tracker.setDroppedEvents(event.count);
       }
     }
 
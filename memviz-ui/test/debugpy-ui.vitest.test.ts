@@ -13,9 +13,11 @@ import {
 import {
   DebugpyProcessBuilder,
   makeBool,
+  makeCell,
   makeComplex,
   makeDict,
   makeFloat,
+  makeGenerator,
   makeInt,
   makeList,
   makeNone,
@@ -191,6 +193,49 @@ describe("Debugpy UI rendering", () => {
     });
   });
 
+  test("loads generator locals on request", async () => {
+    builder.startFrame("main");
+    const locals = [
+      { name: "counter", value: makeInt(builder, 42), is_descriptor: false },
+    ];
+    const generator = makeGenerator(builder, "count_up", null);
+    builder.place("gen", generator).withLocals(locals);
+
+    await renderState();
+
+    await vi.waitFor(() => {
+      const text = renderedText();
+      expect(text).toContain("count_up");
+      expect(text).toContain("suspended at line 1");
+      expect(text).not.toContain("counter");
+    });
+
+    const loadButton = container.querySelector<HTMLElement>(".not-resolved");
+    expect(loadButton).not.toBeNull();
+    loadButton!.click();
+
+    await vi.waitFor(() => {
+      const text = renderedText();
+      expect(text).toContain("Locals");
+      expect(text).toContain("counter");
+      expect(text).toContain("42");
+    });
+  });
+
+  test("renders closure cells", async () => {
+    builder.startFrame("main");
+    const cell = makeCell(builder, makeStr(builder, "captured"));
+    builder.place("cell", cell);
+
+    await renderState();
+
+    await vi.waitFor(() => {
+      const text = renderedText();
+      expect(text).toContain("cell_contents");
+      expect(text).toContain("captured");
+    });
+  });
+
   test("renders stack frames", async () => {
     const builder = new DebugpyProcessBuilder();
     builder.startFrame("main");
@@ -21,6 +21,9 @@ export type {
   ObjectVal,
   ModuleVal,
   TypeVal,
+  GeneratorVal,
+  FrameVal,
+  CellVal,
   Attribute,
 } from "./value";
 
@@ -17,6 +17,9 @@ export enum ValueKind {
   OBJECT = "object",
   MODULE = "module",
   TYPE = "type",
+  GENERATOR = "generator",
+  FRAME = "frame",
+  CELL = "cell",
 }
 
 export interface Value {
@@ -115,6 +118,8 @@ export interface FunctionVal extends Value {
   qualified_name: string;
   module: string | null;
   signature: string | null;
+  free_variables?: Attribute[] | null;
+  receiver?: Value | null;
 }
 
 export interface ObjectVal extends Value {
@@ -140,3 +145,29 @@ export interface TypeVal extends Value {
   name: string;
   module: string | null;
 }
+
+export interface GeneratorVal extends Value {
+  kind: ValueKind.GENERATOR;
+  size: number;
+  type_name: string;
+  name: string;
+  state: string;
+  line: number | null;
+  locals: Attribute[] | null;
+}
+
+export interface FrameVal extends Value {
+  kind: ValueKind.FRAME;
+  size: number;
+  name: string;
+  file: string;
+  line: number | null;
+  locals: Attribute[] | null;
+}
+
+export interface CellVal extends Value {
+  kind: ValueKind.CELL;
+  size: number;
+  empty: boolean;
+  value: Value | null;
+}